@@ -34,6 +34,7 @@ from flask.cli import with_appcontext
 from halo import Halo
 
 from invenio_record_importer_kcworks.serializer import serialize_json
+from invenio_record_importer_kcworks.services.overrides import OverridesIndex
 from invenio_record_importer_kcworks.services.serialization import (
     SerializationService,
 )
@@ -57,12 +58,121 @@ def cli():
 
 
 @cli.command(name="serialize")
+@click.option(
+    "--resume-from",
+    default=None,
+    help=(
+        "Resume an interrupted run at this line number (beginning at 1) of "
+        "the serialized records file, or pass 'last' to resume after the "
+        "last complete line written. Records already written are kept."
+    ),
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=1,
+    help=(
+        "The number of worker processes to use for serializing records. The "
+        "output order is the same as with a single process."
+    ),
+)
+@click.option(
+    "--stats-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help=(
+        "A file to which the timing statistics for each serializer stage "
+        "should be written as JSON."
+    ),
+)
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help=(
+        "If True, only serialize the records that were added or changed "
+        "since the last completed run, and patch the existing output files."
+    ),
+)
+@click.option(
+    "--changed-ids-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help=(
+        "A file to which the ids of the records re-serialized by an "
+        "--incremental run should be written, one per line."
+    ),
+)
 @with_appcontext
-def serialize_command_wrapper():
+def serialize_command_wrapper(
+    resume_from: Optional[str],
+    workers: int,
+    stats_file: Optional[str],
+    incremental: bool,
+    changed_ids_file: Optional[str],
+):
     """
     Serialize all exported legacy CORE deposits as JSON that Invenio can ingest
+
+    Each serialized record is written to the output file as soon as it is
+    produced. If a run is interrupted, it can be picked up again with the
+    --resume-from option.
+
+    Args:
+
+        resume_from (str, optional): The line number (beginning at 1) in
+            the serialized records file at which to resume an interrupted
+            run, or 'last' to resume after the last complete line written.
+            Defaults to None (serialize all records, overwriting the output
+            files).
+
+        workers (int, optional): The number of worker processes to use. If
+            greater than 1, the records are serialized in chunks (of
+            RECORD_IMPORTER_SERIALIZE_CHUNK_SIZE records) by a process pool.
+            Defaults to 1.
+
+        stats_file (str, optional): A file to which the cumulative wall
+            time, call count, and error count of each serializer stage
+            should be written as JSON. The same statistics are printed at
+            the end of every run.
+
+        incremental (bool, optional): If True, only the records that were
+            added, changed, or removed in the raw export since the last
+            completed run are processed, and the serialized records file
+            and serialized failed records file are patched in place. The
+            ids of the re-serialized records can then be loaded with
+            `invenio importer load --sourceids-file CHANGED_IDS_FILE`.
+            Defaults to False.
+
+        changed_ids_file (str, optional): The file to which an incremental
+            run writes the ids of the re-serialized records. Defaults to
+            the RECORD_IMPORTER_SERIALIZED_PATH file path with `.changed`
+            appended.
     """
-    serialize_json()
+    if incremental and resume_from is not None:
+        raise click.BadParameter(
+            "cannot be combined with --incremental",
+            param_hint="--resume-from",
+        )
+    if resume_from is not None and resume_from != "last":
+        try:
+            resume_from = int(resume_from)
+        except ValueError:
+            resume_from = 0
+        if resume_from < 1:
+            raise click.BadParameter(
+                "must be a line number (beginning at 1) or 'last'",
+                param_hint="--resume-from",
+            )
+    serialize_json(
+        resume_from=resume_from,
+        workers=workers,
+        stats_path=stats_file,
+        incremental=incremental,
+        changed_ids_path=changed_ids_file,
+    )
 
 
 @cli.command(name="load")
@@ -97,6 +207,16 @@ def serialize_command_wrapper():
         " source system instead of positional indices."
     ),
 )
+@click.option(
+    "--sourceids-file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help=(
+        "A file of ids in the source system (one per line) of the records "
+        "to load, such as the changed ids file written by an incremental "
+        "serializer run. If the file is empty, no records are loaded."
+    ),
+)
 @click.option(
     "--scheme",
     default="hclegacy-pid",
@@ -160,12 +280,55 @@ def serialize_command_wrapper():
     default=False,
     help="Stop loading records if an error is encountered",
 )
+@click.option(
+    "-w",
+    "--workers",
+    type=int,
+    default=1,
+    help=(
+        "The number of worker processes to use for loading records. Each "
+        "worker runs with its own application context and database session."
+    ),
+)
+@click.option(
+    "--celery",
+    "use_celery",
+    is_flag=True,
+    default=False,
+    help=(
+        "If True, queue the records as Celery tasks to be loaded by the "
+        "running Celery workers instead of loading them in this process."
+    ),
+)
+@click.option(
+    "-f",
+    "--force",
+    is_flag=True,
+    default=False,
+    help=(
+        "If True, load records even if their metadata, files, and overrides "
+        "are unchanged since they were last imported successfully."
+    ),
+)
+@click.option(
+    "--defer-indexing",
+    is_flag=True,
+    default=False,
+    help=(
+        "If True, do not index the records after each change while they are "
+        "loaded. Instead queue each changed record once for bulk indexing. "
+        "The loaded records cannot be found by DOI until the queue is "
+        "processed, except by records with the same DOI later in the same "
+        "run. Cannot be combined with --workers or --celery."
+    ),
+)
 @with_appcontext
 def load_records(
     records: list,
     no_updates: bool,
     retry_failed: bool,
     use_sourceids: bool,
+    sourceids_file: Optional[str],
     scheme: str,
     aggregate: bool,
     start_date: Optional[str],
@@ -173,6 +336,10 @@ def load_records(
     clean_filenames: bool,
     verbose: bool,
     stop_on_error: bool,
+    workers: int,
+    use_celery: bool,
+    force: bool,
+    defer_indexing: bool,
 ):
     """
     Load serialized exported records into InvenioRDM.
@@ -205,11 +372,30 @@ def load_records(
 
             invenio importer load --use-sourceids hc:4723 hc:8271 hc:2246
 
+        To load the records re-serialized by an incremental serializer run,
+        pass the file of changed ids it wrote. (If the file is empty, no
+        records are loaded.)
+
+            invenio importer load --sourceids-file serialized.jsonl.changed
+
         To aggregate usage statistics after loading, add the --aggregate flag.
         For example, to load all records and aggregate usage statistics, run:
 
             invenio importer load --aggregate
 
+        To load all records using a pool of 4 worker processes, run:
+
+            invenio importer load --workers 4
+
+        To queue all records for loading by the Celery workers, run:
+
+            invenio importer load --celery
+
+        To index the loaded records in bulk rather than after each change,
+        run:
+
+            invenio importer load --defer-indexing
+
     Notes:
 
         This program must be run from the base knowledge_commons_works
@@ -286,6 +472,12 @@ def load_records(
             are interpreted as ids in the source system instead of positional
             indices. Defaults to False.
 
+        sourceids_file (str, optional): A file of ids in the source system
+            (one per line) of the records to load, in addition to any ids
+            given as positional arguments. Implies --use-sourceids. If the
+            file holds no ids and no RECORDS are given, nothing is loaded
+            (rather than all records). Defaults to None.
+
         scheme (str, optional): The identifier scheme to use for the records
             when the --use-sourceids flag is True. Defaults to 'hclegacy-pid'
             for the ids used by the old Humanities Commons CORE repository.
@@ -314,10 +506,59 @@ def load_records(
         stop_on_error (bool, optional): Stop loading records if an error is
             encountered. Defaults to False.
 
+        workers (int, optional): The number of worker processes to use for
+            loading records. If greater than 1, the records are sent in
+            chunks to a pool of processes, each with its own application
+            context and database session. The created and failed records
+            logs are still written only by the main process. Defaults to 1.
+
+        use_celery (bool, optional): If True, queue the records as Celery
+            tasks (one per chunk of RECORD_IMPORTER_LOAD_CHUNK_SIZE records)
+            instead of loading them in this process. The command waits for
+            the tasks to finish, and the created and failed records logs
+            are still written only by this process. The --stop-on-error
+            flag is ignored in this mode. Defaults to False.
+
+        force (bool, optional): If True, load every selected record, even
+            if its serialized metadata, files, and overrides are unchanged
+            since it was last imported successfully. By default such
+            records are counted as unchanged without any calls to Invenio.
+            Defaults to False.
+
+        defer_indexing (bool, optional): If True, the records are not
+            indexed after each operation (creation, draft update,
+            publication, ownership change, collection inclusion) while they
+            are loaded. Instead each changed record is queued once for
+            bulk indexing, every RECORD_IMPORTER_REINDEX_BATCH_SIZE records
+            and at the end of the run. Until the bulk indexing queue is
+            processed, the loaded records are not found by the DOI searches
+            for existing records. A record with the same DOI as one loaded
+            earlier in the run updates the earlier record, which is read
+            from the database instead. Since records that share a DOI may
+            be loaded in different chunks by different processes, this
+            flag cannot be combined with --workers or --celery. Defaults
+            to False.
+
     Returns:
 
         None
     """
+    if sourceids_file:
+        with open(sourceids_file) as ids_file:
+            file_ids = [line.strip() for line in ids_file if line.strip()]
+        if not file_ids and not records:
+            print(f"No source ids in {sourceids_file}. Nothing to load.")
+            app.logger.info(
+                f"No source ids in {sourceids_file}. Nothing to load."
+            )
+            return
+        records = list(records) + file_ids
+        use_sourceids = True
+    if defer_indexing and (use_celery or workers > 1):
+        raise click.BadParameter(
+            "cannot be combined with --workers or --celery",
+            param_hint="--defer-indexing",
+        )
     named_params = {
         "no_updates": no_updates,
         "retry_failed": retry_failed,
@@ -329,6 +570,10 @@ def load_records(
         "clean_filenames": clean_filenames,
         "verbose": verbose,
         "stop_on_error": stop_on_error,
+        "workers": workers,
+        "use_celery": use_celery,
+        "force": force,
+        "defer_indexing": defer_indexing,
     }
     if len(records) > 0 and "-" in records[0]:
         if use_sourceids:
@@ -611,6 +856,43 @@ def count_objects():
         print(f"Error: File not found at {serialized_path}")
 
 
+@cli.command(name="overrides")
+@click.argument("source_ids", nargs=-1)
+@click.option(
+    "-o",
+    "--origin",
+    default="knowledgeCommons",
+    help=(
+        "The name of the source service whose overrides file should be read."
+        " Defaults to 'knowledgeCommons'."
+    ),
+)
+@with_appcontext
+def read_overrides(source_ids: list, origin: str):
+    """
+    Print the metadata overrides that the loader will apply to records.
+
+    If SOURCE_IDS are provided, only the overrides for those source ids
+    are printed. Otherwise all of the overrides for the source are printed.
+
+    The overrides file is read from the RECORD_IMPORTER_OVERRIDES_FOLDER
+    directory and is named `record-importer-overrides_{origin}.jsonl`.
+    """
+    index = OverridesIndex()
+    entries = index.for_source(origin)
+    if not entries:
+        print(f"No overrides found in {index.path_for(origin)}")
+        return
+    if source_ids:
+        entries = {s: entries.get(s) for s in source_ids}
+    for source_id, entry in entries.items():
+        if entry is None:
+            print(f"{source_id}: no overrides")
+        else:
+            print(f"{source_id}: skip={entry['skip']}")
+            pprint(entry["overrides"])
+
+
 @cli.command(name="delete")
 @click.argument("records", nargs=-1)
 def delete_records(records):
@@ -65,6 +65,90 @@ class ImporterConfig:
             )
         )
 
+        self.RECORD_IMPORTER_LEDGER_PATH = Path(
+            app.config.get(
+                "RECORD_IMPORTER_LEDGER_PATH",
+                Path(
+                    self.RECORD_IMPORTER_LOGS_LOCATION,
+                    "record_importer_ledger.sqlite3",
+                ),
+            )
+        )
+
+        self.RECORD_IMPORTER_LANGUAGE_CACHE_PATH = Path(
+            app.config.get(
+                "RECORD_IMPORTER_LANGUAGE_CACHE_PATH",
+                Path(
+                    self.RECORD_IMPORTER_LOGS_LOCATION,
+                    "record_importer_language_cache.sqlite3",
+                ),
+            )
+        )
+
+        self.RECORD_IMPORTER_REMOTE_USER_CACHE_PATH = Path(
+            app.config.get(
+                "RECORD_IMPORTER_REMOTE_USER_CACHE_PATH",
+                Path(
+                    self.RECORD_IMPORTER_LOGS_LOCATION,
+                    "record_importer_remote_users.sqlite3",
+                ),
+            )
+        )
+
+        self.RECORD_IMPORTER_REMOTE_USER_CACHE_TTL = app.config.get(
+            "RECORD_IMPORTER_REMOTE_USER_CACHE_TTL", 86400
+        )
+
+        self.RECORD_IMPORTER_REMOTE_USER_WORKERS = app.config.get(
+            "RECORD_IMPORTER_REMOTE_USER_WORKERS", 8
+        )
+
+        self.RECORD_IMPORTER_GROUP_COLLECTION_CACHE_PATH = app.config.get(
+            "RECORD_IMPORTER_GROUP_COLLECTION_CACHE_PATH", None
+        )
+
+        self.RECORD_IMPORTER_MISSING_GROUP_TTL = app.config.get(
+            "RECORD_IMPORTER_MISSING_GROUP_TTL", 86400
+        )
+
+        self.RECORD_IMPORTER_MISSING_GROUPS = app.config.get(
+            "RECORD_IMPORTER_MISSING_GROUPS",
+            [
+                "1003749",
+                "1000743",
+                "1004285",
+                "1000737",
+                "1000754",
+                "1003111",
+                "1001232",
+                "1004181",
+                "344",
+                "1002956",
+                "1002947",
+                "1003017",
+                "1003436",
+                "1003608",
+                "1003410",
+                "1004047",
+            ],
+        )
+
+        self.RECORD_IMPORTER_BATCH_COLLECTION_INCLUSION = app.config.get(
+            "RECORD_IMPORTER_BATCH_COLLECTION_INCLUSION", False
+        )
+
+        self.RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LENGTH = app.config.get(
+            "RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LENGTH", 0
+        )
+
+        self.RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LANGUAGE = app.config.get(
+            "RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LANGUAGE", "en"
+        )
+
+        self.RECORD_IMPORTER_SUBJECTS_VOCABULARY_PATH = app.config.get(
+            "RECORD_IMPORTER_SUBJECTS_VOCABULARY_PATH", None
+        )
+
         # TODO: For testing was Path(__file__).parent / "data"
         # / "serialized_data.jsonl"
         self.RECORD_IMPORTER_SERIALIZED_PATH = Path(
@@ -97,6 +181,26 @@ class ImporterConfig:
             )
         )
 
+        self.RECORD_IMPORTER_LOAD_CHUNK_SIZE = app.config.get(
+            "RECORD_IMPORTER_LOAD_CHUNK_SIZE", 10
+        )
+
+        self.RECORD_IMPORTER_DOI_BATCH_SIZE = app.config.get(
+            "RECORD_IMPORTER_DOI_BATCH_SIZE", 100
+        )
+
+        self.RECORD_IMPORTER_REINDEX_BATCH_SIZE = app.config.get(
+            "RECORD_IMPORTER_REINDEX_BATCH_SIZE", 500
+        )
+
+        self.RECORD_IMPORTER_SERIALIZE_CHUNK_SIZE = app.config.get(
+            "RECORD_IMPORTER_SERIALIZE_CHUNK_SIZE", 200
+        )
+
+        self.RECORD_IMPORTER_SERIALIZER_STAGES = app.config.get(
+            "RECORD_IMPORTER_SERIALIZER_STAGES", None
+        )
+
         self.RECORD_IMPORTER_START_DATE = app.config.get(
             "RECORD_IMPORTER_START_DATE",
             arrow.get("2015-01-01").isoformat(),
@@ -1,6 +1,7 @@
+from functools import lru_cache
 import glob
 import re
-from typing import List
+from typing import List, Optional
 import arrow
 import dateparser
 from invenio_record_importer_kcworks.utils import (
@@ -12,6 +13,122 @@ from flask import current_app as app
 import regex
 import timefhuman
 
+# The maximum number of distinct date strings whose results are memoized
+# by `DateParser.repair_date` and `DateParser.repair_range`
+DATE_CACHE_SIZE = 8192
+
+# Precompiled patterns used by the DateParser methods
+_WORD_DATE_DELIMITERS = re.compile(r"[, \.\/-]")
+_LETTERS = regex.compile(r"\p{L}+")
+_DAY_SUFFIXES = re.compile(r"(th|st|nd|rd|e)")
+_ZERO_FILL_DELIMITERS = re.compile(r"[\.\-:\/,]+")
+_NUMERIC_DATE_DELIMITERS = re.compile(r"[\.\-:\/ ]+")
+_FOUR_DIGITS = re.compile(r"\d{4}")
+_TWO_DIGITS = re.compile(r"\d{2}")
+_WORDS = re.compile(r"\w+")
+_TWO_DIGIT_YEAR_DATE = re.compile(r"^\d{2}[/,-\.]\d{2}[/,-\.]\d{2}$")
+_PARENTHESES = re.compile(r"\(|\)")
+_MASHED_NUMERIC = re.compile(r"\d{8}")
+_MASHED_YEAR_FIRST = re.compile(r"(19|20)\d{2}\d{2}")
+_MASHED_YEAR_LAST = re.compile(r"\d{2}\d{2}(19|20)")
+_MASHED_YEAR_WORD_DAY = regex.compile(r"\d{4}\p{L}+\d\d?")
+_MASHED_DAY_WORD_YEAR = regex.compile(r"\d\d?\p{L}+\d{4}")
+_MASHED_YEAR_WORD = regex.compile(r"\d{4}\p{L}+")
+_MASHED_WORD_YEAR = regex.compile(r"\p{L}+\d{4}")
+_ADJACENT_YEARS = re.compile(r".*\d{4}[\.\s]+\d{4}.*")
+_YEAR = re.compile(r"\b(19|20)\d{2}\b")
+_YEAR_START = re.compile(r"(19|20)\d{2}?")
+_RANGE_DELIMITERS = re.compile(r"[\-–\/]")
+_RANGE_TO = re.compile(r" to ")
+_SEASON_YEAR_RANGE = re.compile(r"\s(19|20)\d{2}?[\-\/](19|20)\d{2}?")
+_TWO_DIGIT_PART = re.compile(r"\D*\s*\d{2}\s*\D*")
+_FOUR_DIGIT_PART = re.compile(r"\D*\s*\d{4}\s*\D*")
+
+# Patterns for the shape buckets used by `DateParser.repair_dates`
+_PLAIN_YEAR = re.compile(r"\d{4}")
+_ISO_DATE = re.compile(r"\d{4}-\d{2}(?:-\d{2})?")
+_WORD_YEAR = regex.compile(r"(\p{L}+)\.?,?\s+([12]\d{3})")
+_YEAR_WORD = regex.compile(r"([12]\d{3}),?\s+(\p{L}+)")
+_YEAR_RANGE = re.compile(
+    r"((?:19|20)\d{2})(?:\s*[-/]\s*|\s+to\s+)((?:19|20)\d{2})"
+)
+
+_FILLER_WORDS = frozenset(["del", "de", "of", "di", " ", ""])
+
+_MONTH_ABBREVS = {
+    "jan": "01",
+    "janv": "01",
+    "ja": "01",
+    "ene": "01",
+    "feb": "02",
+    "febr": "02",
+    "fe": "02",
+    "fev": "02",
+    "mar": "03",
+    "apr": "04",
+    "ap": "04",
+    "may": "05",
+    "jun": "06",
+    "jul": "07",
+    "aug": "08",
+    "au": "08",
+    "augus": "08",
+    "sep": "09",
+    "sept": "09",
+    "septmber": "09",
+    "se": "09",
+    "oct": "10",
+    "octo": "10",
+    "oc": "10",
+    "nov": "11",
+    "no": "11",
+    "dec": "12",
+    "de": "12",
+    "dez": "12",
+}
+
+_SEASON_ABBREVS = {
+    "spr": "03",
+    "sum": "06",
+    "fal": "09",
+    "win": "12",
+}
+
+# A single lookup table from every month and season word and abbreviation
+# (in all supported languages) to its month number. Seasons are treated as
+# the first month of the season. Where a word appears in more than one
+# source, month names take precedence over month abbreviations, which take
+# precedence over season names and then season abbreviations.
+DATE_WORDS = {
+    **{k: v.split("-")[0] for k, v in _SEASON_ABBREVS.items()},
+    **{k: v.split("-")[0] for k, v in seasonwords.items()},
+    **_MONTH_ABBREVS,
+    **monthwords,
+}
+
+_SEASONS = frozenset(
+    [
+        "spring",
+        "summer",
+        "fall",
+        "winter",
+        "autumn",
+        "spr",
+        "sum",
+        "fal",
+        "win",
+        "aut",
+        "intersession",
+    ]
+)
+
+_SEASON_ENDS = {
+    "03": "05",
+    "06": "08",
+    "09": "11",
+    "12": "02",
+}
+
 
 class DateParser:
     """A class for parsing dirty human-readable date strings.
@@ -44,6 +161,10 @@ class DateParser:
     manipulating date strings, such as `fill_missing_zeros`,
     `reorder_date_parts`, etc. All of these are static methods and can be
     used independently of the `repair_date` and `repair_range` methods.
+
+    Legacy data repeats the same date strings very often, so the results of
+    `repair_date` and `repair_range` are memoized in bounded LRU caches
+    keyed on the input string (see `cache_info` and `cache_clear`).
     """
 
     def __init__(self):
@@ -64,74 +185,24 @@ class DateParser:
         Returns:
             str: The date string with words converted to numbers
         """
-        date_parts = re.split(r"[, \.\/-]", date)
+        date_parts = _WORD_DATE_DELIMITERS.split(date)
         if len(date_parts) == 1:
             date_parts = DateParser.split_mashed_datestring(date)
-        date_parts = [
-            p
-            for p in date_parts
-            if p.strip() not in ["del", "de", "of", "di", " ", ""]
-        ]
+        date_parts = [p for p in date_parts if p.strip() not in _FILLER_WORDS]
         if (
             len(date_parts) <= 3
-            and len([d for d in date_parts if regex.match(r"\p{L}+", d)]) <= 1
+            and len([d for d in date_parts if _LETTERS.match(d)]) <= 1
         ):
             # print(date_parts)
             month = ""
             day = ""
             year = ""
-            month_abbrevs = {
-                "jan": "01",
-                "janv": "01",
-                "ja": "01",
-                "ene": "01",
-                "feb": "02",
-                "febr": "02",
-                "fe": "02",
-                "fev": "02",
-                "mar": "03",
-                "apr": "04",
-                "ap": "04",
-                "may": "05",
-                "jun": "06",
-                "jul": "07",
-                "aug": "08",
-                "au": "08",
-                "augus": "08",
-                "sep": "09",
-                "sept": "09",
-                "septmber": "09",
-                "se": "09",
-                "oct": "10",
-                "octo": "10",
-                "oc": "10",
-                "nov": "11",
-                "no": "11",
-                "dec": "12",
-                "de": "12",
-                "dez": "12",
-            }
-            season_abbrevs = {
-                "spr": "03",
-                "sum": "06",
-                "fal": "09",
-                "win": "12",
-            }
-            # try to identify month words and abbreviations
+            # try to identify month and season words and abbreviations
             # and convert to numbers
             for d in date_parts:
                 d_cand = d.lower().strip().replace(",", "").replace(".", "")
-                if d_cand in monthwords.keys():
-                    month = monthwords[d_cand]
-                    date_parts = [p for p in date_parts if p != d]
-                elif d_cand in month_abbrevs.keys():
-                    month = month_abbrevs[d_cand]
-                    date_parts = [p for p in date_parts if p != d]
-                elif d_cand in seasonwords.keys():
-                    month = seasonwords[d_cand].split("-")[0]
-                    date_parts = [p for p in date_parts if p != d]
-                elif d_cand in season_abbrevs.keys():
-                    month = season_abbrevs[d_cand].split("-")[0]
+                if d_cand in DATE_WORDS:
+                    month = DATE_WORDS[d_cand]
                     date_parts = [p for p in date_parts if p != d]
             # try to identify a 4-digit year
             for d in date_parts:
@@ -145,8 +216,7 @@ class DateParser:
                         return date
             # try to identify a day by looking at suffixes
             for d in date_parts:
-                suffixes = r"(th|st|nd|rd|e)"
-                day_cand = re.sub(suffixes, "", d.lower())
+                day_cand = _DAY_SUFFIXES.sub("", d.lower())
                 if day_cand.isdigit() and len(day_cand) <= 2:
                     day = day_cand
                     date_parts = [p for p in date_parts if p != d]
@@ -187,7 +257,7 @@ class DateParser:
         Returns:
             str: The date string with missing zeros filled in
         """
-        date_parts = list(filter(None, re.split(r"[\.\-:\/,]+", date)))
+        date_parts = list(filter(None, _ZERO_FILL_DELIMITERS.split(date)))
         for i, part in enumerate(date_parts):
             if len(part) < 2:
                 date_parts[i] = "0" + part
@@ -233,7 +303,7 @@ class DateParser:
             str: The date string with parts in the order YYYY-MM-DD
         """
         date = DateParser.fill_missing_zeros(date)
-        date_parts = list(filter(None, re.split(r"[\.\-:\/ ]+", date)))
+        date_parts = list(filter(None, _NUMERIC_DATE_DELIMITERS.split(date)))
         if len(date_parts) == 1:
             date_parts = DateParser.split_mashed_datestring(date)
         # print(date_parts)
@@ -271,7 +341,7 @@ class DateParser:
                 not month
                 and not day
                 and len(others) == 1
-                and re.match(r"\d{4}", others[0])
+                and _FOUR_DIGITS.match(others[0])
             ):
                 return "-".join([year, others[0][:2], others[0][2:]])
             else:
@@ -303,40 +373,26 @@ class DateParser:
     @staticmethod
     def is_seasonal_date(date: str) -> bool:
         """Return True if the date is a human readable seasonal date."""
-        seasons = [
-            "spring",
-            "summer",
-            "fall",
-            "winter",
-            "autumn",
-            "spr",
-            "sum",
-            "fal",
-            "win",
-            "aut",
-            "intersession",
-        ]
         date_parts = date.split(" ")
         valid = False
         if len(date_parts) == 2:
             years = [d for d in date_parts if len(d) in [2, 4] and d.isdigit()]
             if len(years) == 1:
                 season_part = [d for d in date_parts if d != years[0]][0]
-                season_parts = re.findall(r"\w+", season_part)
-                if all(s for s in season_parts if s.lower() in seasons):
+                season_parts = _WORDS.findall(season_part)
+                if all(s for s in season_parts if s.lower() in _SEASONS):
                     valid = True
         return valid
 
     @staticmethod
     def restore_2digit_year(date: str) -> str:
-        pattern = r"^\d{2}[/,-\.]\d{2}[/,-\.]\d{2}$"
-        if re.match(pattern, date):
+        if _TWO_DIGIT_YEAR_DATE.match(date):
             date = arrow.get(dateparser.parse(date)).date().isoformat()
         return date
 
     @staticmethod
     def remove_stray_parentheses(date: str) -> str:
-        return re.sub(r"\(|\)", "", date)
+        return _PARENTHESES.sub("", date)
 
     @staticmethod
     def split_mashed_datestring(date: str) -> List[str]:
@@ -352,30 +408,30 @@ class DateParser:
         :return: A list of date parts
         """
         parts = [date]
-        if re.match(r"\d{8}", date):
-            if re.match(r"(19|20)\d{2}\d{2}", date) and not re.match(
-                r"\d{2}\d{2}(19|20)", date
+        if _MASHED_NUMERIC.match(date):
+            if _MASHED_YEAR_FIRST.match(date) and not _MASHED_YEAR_LAST.match(
+                date
             ):
                 parts = [date[:4], date[4:6], date[6:]]
-            elif re.match(r"\d{2}\d{2}(19|20)", date):
+            elif _MASHED_YEAR_LAST.match(date):
                 parts = [date[:2], date[2:4], date[4:]]
-        elif regex.match(r"\d{4}\p{L}+\d\d?", date) and (
+        elif _MASHED_YEAR_WORD_DAY.match(date) and (
             date[-2:] <= "31" or date[-1:] <= "9"
         ):
             if date[-2:].isdigit():
                 parts = [date[:4], date[4:-2], date[-2:]]
             else:
                 parts = [date[:4], date[4:-1], date[-1:]]
-        elif regex.match(r"\d\d?\p{L}+\d{4}", date) and (
+        elif _MASHED_DAY_WORD_YEAR.match(date) and (
             date[:2] <= "31" or date[:1] <= "9"
         ):
             if date[:2].isdigit():
                 parts = [date[:2], date[2:-4], date[-4:]]
             else:
                 parts = [date[:1], date[1:-4], date[-4:]]
-        elif regex.match(r"\d{4}\p{L}+", date):
+        elif _MASHED_YEAR_WORD.match(date):
             parts = [date[:4], date[4:]]
-        elif regex.match(r"\p{L}+\d{4}", date):
+        elif _MASHED_WORD_YEAR.match(date):
             parts = [date[:-4], date[-4:]]
         return parts
 
@@ -670,9 +726,12 @@ class DateParser:
         (True, '2016 2019')
 
         """
-        print_id = None
-        if id == print_id:
-            print(f"repairing date: {date}")
+        return DateParser._repair_date(date)
+
+    @staticmethod
+    @lru_cache(maxsize=DATE_CACHE_SIZE)
+    def _repair_date(date: str) -> tuple[bool, str]:
+        """Memoized implementation of `repair_date`."""
         invalid = True
         date = DateParser.remove_stray_parentheses(date.strip())
         if date and date[-1] == ".":
@@ -685,12 +744,7 @@ class DateParser:
             DateParser.parse_human_readable,
         ]:
             newdate = date_func(date)
-            if id == print_id:
-                print(date_func)
-                print(newdate)
-            if valid_date(newdate) and not re.match(
-                r".*\d{4}[\.\s]+\d{4}.*", newdate
-            ):
+            if valid_date(newdate) and not _ADJACENT_YEARS.match(newdate):
                 invalid = False
                 break
 
@@ -698,7 +752,7 @@ class DateParser:
 
     @staticmethod
     def extract_year(s):
-        match = re.search(r"\b(19|20)\d{2}\b", s)
+        match = _YEAR.search(s)
         if match:
             return match.group(0)
         return None
@@ -782,22 +836,25 @@ class DateParser:
         (True, '2016, 2nd. corr. ed.')
 
         """
-        print_id = None
+        return DateParser._repair_range(date)
+
+    @staticmethod
+    @lru_cache(maxsize=DATE_CACHE_SIZE)
+    def _repair_range(date: str) -> tuple[bool, str]:
+        """Memoized implementation of `repair_range`."""
         invalid = True
-        raw_range_parts = re.split(r"[\-–\/]", date)
+        raw_range_parts = _RANGE_DELIMITERS.split(date)
         range_parts = [*raw_range_parts]
         # handle dates like "winter/fall 2019/2020"
-        if len(range_parts) == 3 and re.match(
-            r"\s(19|20)\d{2}?[\-\/](19|20)\d{2}?", date[-10:]
-        ):
+        if len(range_parts) == 3 and _SEASON_YEAR_RANGE.match(date[-10:]):
             range_parts = [
                 f"{range_parts[0]} {range_parts[1][-4:]}",
                 f"{range_parts[1][:-4]} {range_parts[2]}",
             ]
         elif (
             len(range_parts) == 3
-            and re.match(r"(19|20)\d{2}?", range_parts[2])
-            and not re.match(r"(19|20)\d{2}?", range_parts[1])
+            and _YEAR_START.match(range_parts[2])
+            and not _YEAR_START.match(range_parts[1])
         ):
             range_parts = [
                 range_parts[0],
@@ -805,9 +862,7 @@ class DateParser:
             ]
         # handle dates like "2019 to 2020"
         if len(range_parts) == 1:
-            range_parts = re.split(r" to ", date)
-        if id == print_id:
-            print(f"range_parts: {range_parts}")
+            range_parts = _RANGE_TO.split(date)
         # FIXME: expand 2-digit years to 4-digit years
         if len(range_parts) == 2:
             if (
@@ -821,15 +876,13 @@ class DateParser:
             digit_parts_2 = [
                 (idx, p)
                 for idx, p in enumerate(range_parts)
-                if p and re.match(r"\D*\s*\d{2}\s*\D*", p)
+                if p and _TWO_DIGIT_PART.match(p)
             ]
             digit_parts_4 = [
-                p
-                for p in range_parts
-                if p and re.match(r"\D*\s*\d{4}\s*\D*", p)
+                p for p in range_parts if p and _FOUR_DIGIT_PART.match(p)
             ]
             if len(digit_parts_2) == 1 and not digit_parts_4:
-                yr = re.findall(r"\d{2}", digit_parts_2[0][1])[0]
+                yr = _TWO_DIGITS.findall(digit_parts_2[0][1])[0]
                 new_part = digit_parts_2[0][1].replace(
                     yr, DateParser.fill_2digit_year(yr)
                 )
@@ -845,11 +898,9 @@ class DateParser:
             global_seasons = [
                 part
                 for part in range_parts
-                if any([p for p in seasonwords.keys() if p in part])
+                if any(p in part for p in seasonwords)
             ]
             for i, part in enumerate(range_parts):
-                if id == print_id:
-                    print(f"part: {part}")
                 if not valid_date(part):
                     # handle dates like "winter/spring 2019"
                     if (
@@ -857,19 +908,15 @@ class DateParser:
                         and len(global_years) > 0
                     ):
                         invalid, repaired = DateParser.repair_date(
-                            part + " " + global_years[0], id
+                            part + " " + global_years[0]
                         )
                     else:
-                        invalid, repaired = DateParser.repair_date(part, id)
+                        invalid, repaired = DateParser.repair_date(part)
                     range_parts[i] = repaired
-                    if id == "hc:16967":
-                        print(f"repaired: {repaired}")
                 if not valid_date(range_parts[i]):
                     invalid = True
                 else:
                     invalid = False
-                if id == "hc:16967":
-                    print(f"range_parts[i]: {range_parts[i]}")
             # print(range_parts)
             if not invalid:
                 # re-add month for end of season dates
@@ -879,14 +926,8 @@ class DateParser:
                         for k, v in seasonwords.items()
                         if k in global_seasons[0]
                     ][0]
-                    season_ends = {
-                        "03": "05",
-                        "06": "08",
-                        "09": "11",
-                        "12": "02",
-                    }
                     range_parts[1] = (
-                        f"{range_parts[1]}-{season_ends[seasonstart]}"
+                        f"{range_parts[1]}-{_SEASON_ENDS[seasonstart]}"
                     )
                 # catch cases where ending is earlier than beginning
                 if range_parts[0] > range_parts[1]:
@@ -918,3 +959,144 @@ class DateParser:
                     invalid = True
                 date = "/".join(range_parts)
         return invalid, date
+
+    @staticmethod
+    def date_shape(date: str) -> tuple[str, tuple]:
+        """Classify a date string into one of the `repair_dates` buckets.
+
+        The buckets are "year" (a plain 4-digit year), "iso" (YYYY-MM or
+        YYYY-MM-DD), "month_word" and "season" (a month or season word
+        with a 4-digit year), "range" (a range between two 4-digit years),
+        and "other" for everything else.
+
+        >>> DateParser.date_shape("Spring 2020")
+        ('season', ('Spring', '2020'))
+
+        >>> DateParser.date_shape("2019 - 2021")
+        ('range', ('2019', '2021'))
+
+        Returns:
+            tuple[str, tuple]: The bucket name and the parts of the date
+                string matched for the bucket (word and year for the
+                month_word and season buckets, start and end year for the
+                range bucket)
+        """
+        if _PLAIN_YEAR.fullmatch(date):
+            return "year", ()
+        if _ISO_DATE.fullmatch(date):
+            return "iso", ()
+        word_match = _WORD_YEAR.fullmatch(date)
+        if word_match:
+            word, year = word_match.groups()
+        else:
+            word_match = _YEAR_WORD.fullmatch(date)
+            if word_match:
+                year, word = word_match.groups()
+        if word_match:
+            word_key = word.lower()
+            if word_key in monthwords or word_key in _MONTH_ABBREVS:
+                return "month_word", (word, year)
+            if word_key in DATE_WORDS:
+                return "season", (word, year)
+        range_match = _YEAR_RANGE.fullmatch(date)
+        if range_match:
+            return "range", range_match.groups()
+        return "other", ()
+
+    @staticmethod
+    def _repair_word_date(word: str, year: str) -> Optional[tuple[bool, str]]:
+        """Repair a month or season word with a year, e.g. "Spring 2020".
+
+        Returns None if the word is not a month or season word that
+        `repair_date` would convert.
+        """
+        word_key = word.lower()
+        if word_key in _FILLER_WORDS or word_key not in DATE_WORDS:
+            return None
+        repaired = f"{year}-{DATE_WORDS[word_key]}"
+        return (False, repaired) if valid_date(repaired) else None
+
+    @staticmethod
+    def _repair_year_range(start: str, end: str) -> Optional[tuple[bool, str]]:
+        """Repair a range between two years, e.g. "2019-2020".
+
+        Returns None if the range ends before it starts.
+        """
+        return (False, f"{start}/{end}") if start <= end else None
+
+    @staticmethod
+    def _repair_single(date: str) -> tuple[bool, str]:
+        """Repair a date string as a single date or, failing that, a range."""
+        if valid_date(date):
+            return False, date
+        invalid, repaired = DateParser.repair_date(date)
+        if invalid:
+            invalid, repaired = DateParser.repair_range(repaired)
+        return invalid, repaired
+
+    @staticmethod
+    def repair_dates(dates: list[str]) -> list[tuple[bool, str]]:
+        """Repair a batch of date strings.
+
+        Each date string gets the same result as it would get from the
+        serializer's single-date path: a valid date is returned unchanged,
+        and any other string is repaired with `repair_date` and then, if
+        that fails, with `repair_range`.
+
+        Each distinct string is only repaired once. The distinct strings
+        are classified into shape buckets (see `date_shape`) in one pass,
+        and plain years, ISO dates, month and season words with a year,
+        and simple year ranges are repaired directly without the full
+        `repair_date` cascade. Anything the specialized paths cannot
+        handle falls back to the full cascade.
+
+        >>> DateParser.repair_dates(["2019", "Spring 2020", "2019"])
+        [(False, '2019'), (False, '2020-03'), (False, '2019')]
+
+        >>> DateParser.repair_dates(["jun, 2019", "2019 to 2020"])
+        [(False, '2019-06'), (False, '2019/2020')]
+
+        Args:
+            dates (list[str]): The date strings to repair
+
+        Returns:
+            list[tuple[bool, str]]: For each input string (in the same
+                order), whether it is still invalid and the repaired date
+                string
+        """
+        buckets: dict[str, list] = {}
+        for date in dict.fromkeys(dates):
+            bucket, parts = DateParser.date_shape(date)
+            buckets.setdefault(bucket, []).append((date, parts))
+
+        results = {}
+        for bucket, items in buckets.items():
+            for date, parts in items:
+                result = None
+                if bucket in ["year", "iso"]:
+                    result = (False, date) if valid_date(date) else None
+                elif bucket in ["month_word", "season"]:
+                    result = DateParser._repair_word_date(*parts)
+                elif bucket == "range":
+                    result = DateParser._repair_year_range(*parts)
+                results[date] = result or DateParser._repair_single(date)
+        return [results[date] for date in dates]
+
+    @staticmethod
+    def cache_info() -> dict:
+        """Return the statistics of the date repair caches.
+
+        Returns:
+            dict: The `functools` cache info for each method, keyed by
+                method name
+        """
+        return {
+            "repair_date": DateParser._repair_date.cache_info(),
+            "repair_range": DateParser._repair_range.cache_info(),
+        }
+
+    @staticmethod
+    def cache_clear() -> None:
+        """Empty the `repair_date` and `repair_range` caches."""
+        DateParser._repair_date.cache_clear()
+        DateParser._repair_range.cache_clear()
@@ -10,6 +10,7 @@ from invenio_accounts.models import User
 from invenio_db import db
 from invenio_oauthclient.models import UserIdentity
 from invenio_pidstore.errors import PIDUnregistered, PIDDoesNotExistError
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_rdm_records.records.api import RDMRecord
 from invenio_rdm_records.proxies import (
     current_rdm_records,
@@ -30,27 +31,43 @@ from invenio_record_importer_kcworks.services.communities import (
     CommunitiesHelper,
 )
 from invenio_record_importer_kcworks.services.files import FilesHelper
+from invenio_record_importer_kcworks.services.indexing import (
+    DeferredIndexing,
+)
+from invenio_record_importer_kcworks.services.ledger import ImportLedger
+from invenio_record_importer_kcworks.services.overrides import OverridesIndex
+from invenio_record_importer_kcworks.services.record_index import (
+    SerializedRecordIndex,
+)
 from invenio_record_importer_kcworks.services.stats.stats import (
     StatsFabricator,
     AggregationFabricator,
 )
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
 import itertools
 import json
 from simplejson.errors import JSONDecodeError as SimpleJSONDecodeError
 import jsonlines
 from marshmallow.exceptions import ValidationError
+import multiprocessing
 from pathlib import Path
 import requests
 from requests.exceptions import JSONDecodeError as RequestsJSONDecodeError
+from sqlalchemy import func
 from sqlalchemy.orm.exc import NoResultFound, StaleDataError
 from traceback import print_exc
-from typing import Optional, Union
+from typing import NamedTuple, Optional, Union
 from pprint import pformat
 
 from invenio_record_importer_kcworks.utils.file_utils import sanitize_filenames
 from invenio_record_importer_kcworks.utils.utils import (
     CommunityRecordHelper,
     UsersHelper,
+    init_worker_app_context,
     replace_value_in_nested_dict,
     compare_metadata,
 )
@@ -168,9 +185,184 @@ def api_request(
     return result_dict
 
 
+class ExistingRecord(NamedTuple):
+    """An existing Invenio record found by its DOI."""
+
+    id: str
+    uuid: str
+    status: str
+    metadata: dict
+
+
+def resolve_existing_dois(
+    dois: list[str], batch_size: Optional[int] = None
+) -> dict:
+    """
+    Find the existing Invenio records for a batch of DOIs in bulk.
+
+    The DOIs are looked up with one `search_drafts` query per
+    `batch_size` DOIs (a disjunction of the DOIs), instead of one query
+    per record. The result can be passed to `create_invenio_record`,
+    which then needs no search calls for the resolved DOIs.
+
+    Only DOIs that resolve unambiguously are included. DOIs that occur
+    more than once in the batch, DOIs matched by more than one existing
+    record, DOIs whose per-record query would differ (those with more
+    than one "/"), and DOIs from a failed or truncated search are left
+    out, so that `create_invenio_record` searches for them individually
+    as usual.
+
+    params:
+        dois (list[str]): the DOIs of the records to be loaded
+        batch_size (int): the maximum number of DOIs per search. Defaults
+            to the RECORD_IMPORTER_DOI_BATCH_SIZE config value.
+
+    returns:
+        dict: the ExistingRecord for each resolved DOI (or None if no
+            record has the DOI), keyed by the lowercased DOI
+    """
+    batch_size = batch_size or app.config.get(
+        "RECORD_IMPORTER_DOI_BATCH_SIZE", 100
+    )
+    counts = Counter(d.lower() for d in dois if d)
+    wanted = [
+        d
+        for d in dict.fromkeys(dois)
+        if d and counts[d.lower()] == 1 and d.count("/") == 1
+    ]
+    resolved = {}
+    for start in range(0, len(wanted), batch_size):
+        batch = wanted[start : start + batch_size]
+        terms = " OR ".join(
+            '"{}"'.format(d.replace("\\", "\\\\").replace('"', '\\"'))
+            for d in batch
+        )
+        try:
+            results = records_service.search_drafts(
+                system_identity,
+                q=f"pids.doi.identifier:({terms})",
+                size=len(batch) * 2,
+            )
+            hits = list(zip(results.hits, results._results))
+        except Exception as e:
+            app.logger.warning(
+                f"    bulk lookup of {len(batch)} DOIs failed ({e}). "
+                "Searching for them record by record..."
+            )
+            continue
+        if results.total > len(hits):
+            app.logger.warning(
+                f"    bulk lookup of {len(batch)} DOIs found too many "
+                "records. Searching for them record by record..."
+            )
+            continue
+        found = defaultdict(list)
+        for hit, raw_hit in hits:
+            doi = hit.get("pids", {}).get("doi", {}).get("identifier", "")
+            found[doi.lower()].append(
+                ExistingRecord(
+                    hit["id"], raw_hit.to_dict()["uuid"], hit["status"], hit
+                )
+            )
+        for doi in batch:
+            matches = found.get(doi.lower(), [])
+            if len(matches) < 2:
+                resolved[doi.lower()] = matches[0] if matches else None
+    return resolved
+
+
+def _remember_loaded_record(
+    loaded_records: Optional[dict], outcome: dict
+) -> None:
+    """Note the Invenio id of a record loaded in this run by its DOI.
+
+    Used when indexing is deferred, since the records loaded in the run
+    cannot be found by a DOI search until they are indexed.
+    """
+    if loaded_records is None:
+        return
+    doi = outcome["log_object"]["invenio_id"]
+    if (
+        doi
+        and outcome["invenio_recid"]
+        and outcome["status"] not in ["failed", "skipped"]
+    ):
+        loaded_records[doi.lower()] = outcome["invenio_recid"]
+
+
+def _with_loaded_record(
+    existing_records: Optional[dict],
+    rec: dict,
+    loaded_records: Optional[dict],
+) -> Optional[dict]:
+    """Add a record loaded earlier in the run to the existing records.
+
+    If a record with the same DOI as `rec` was loaded earlier in the run
+    (see `_remember_loaded_record`), it is read from the database the way
+    a DOI search would find it (its draft if it has one, otherwise the
+    published record) and added to a copy of `existing_records`. So
+    `create_invenio_record` updates it instead of searching for the DOI
+    in the index.
+    """
+    doi = rec.get("pids", {}).get("doi", {}).get("identifier")
+    if not loaded_records or not doi or doi.lower() not in loaded_records:
+        return existing_records
+    record_id = loaded_records[doi.lower()]
+    try:
+        try:
+            result = records_service.read_draft(system_identity, record_id)
+        except PIDDoesNotExistError:
+            result = records_service.read(system_identity, record_id)
+    except Exception as e:
+        app.logger.warning(
+            f"    could not read record {record_id} loaded earlier with the "
+            f"DOI {doi}: {e}"
+        )
+        return existing_records
+    data = result.to_dict()
+    return {
+        **(existing_records or {}),
+        doi.lower(): ExistingRecord(
+            data["id"], str(result._record.id), data["status"], data
+        ),
+    }
+
+
+def _with_stored_record(rec: dict) -> Optional[dict]:
+    """Find the record that holds a record's DOI in the database.
+
+    Used to retry a record while indexing is deferred, since the draft
+    saved by the first attempt cannot be found by a DOI search until it
+    is indexed. The DOI is resolved through the pidstore instead, and the
+    record that holds it is read as in `_with_loaded_record`.
+
+    returns:
+        dict: the existing records to pass to `create_invenio_record`,
+            or None if no record holds the DOI (so that it is searched
+            for as usual)
+    """
+    doi = rec.get("pids", {}).get("doi", {}).get("identifier")
+    if not doi:
+        return None
+    doi_pid = PersistentIdentifier.query.filter(
+        PersistentIdentifier.pid_type == "doi",
+        func.lower(PersistentIdentifier.pid_value) == doi.lower(),
+        PersistentIdentifier.status != PIDStatus.DELETED,
+    ).first()
+    recid = None
+    if doi_pid is not None and doi_pid.object_uuid is not None:
+        recid = PersistentIdentifier.query.filter_by(
+            pid_type="recid", object_uuid=doi_pid.object_uuid
+        ).first()
+    if recid is None:
+        return None
+    return _with_loaded_record(None, rec, {doi.lower(): recid.pid_value})
+
+
 def create_invenio_record(
     metadata: dict,
     no_updates: bool,
+    existing_records: Optional[dict] = None,
 ) -> dict:
     """
     Create a new Invenio record from the provided dictionary of metadata
@@ -185,6 +377,9 @@ def create_invenio_record(
             same DOI if it exists
         overrides (dict): optional dictionary of values to update the
             metadata before creating the record
+        existing_records (dict): the existing records for a batch of DOIs,
+            as returned by `resolve_existing_dois`. If the record's DOI
+            was resolved there, no search for existing records is run.
 
     returns:
         dict: a dictionary containing the status of the record creation
@@ -208,60 +403,73 @@ def create_invenio_record(
     # Check for existing record with same DOI
     if "pids" in metadata.keys() and "doi" in metadata["pids"].keys():
         my_doi = metadata["pids"]["doi"]["identifier"]
-        doi_for_query = my_doi.split("/")
-        # TODO: Can we include deleted records here somehow?
-        try:
-            same_doi = records_service.search_drafts(
-                system_identity,
-                q=f'pids.doi.identifier:"{doi_for_query[0]}/'
-                f'{doi_for_query[1]}"',
-            )
-            # app.logger.debug(f"same_doi: {my_doi}")
-            # app.logger.debug(f"same_doi: {pformat(same_doi)}")
-        except Exception as e:
-            app.logger.error(
-                "    error checking for existing record with same DOI:"
-            )
-            app.logger.error(same_doi.to_dict())
-            raise e
-        if same_doi.total > 0:
-            app.logger.info(
-                f"    found {same_doi.total} existing"
-                " records with same DOI..."
-            )
-            # delete extra records with the same doi
-            if same_doi.total > 1:
-                rec_list = [(j["id"], j["status"]) for j in same_doi.hits]
+        existing_metadata = None
+        existing_uuid = None
+        if existing_records is not None and my_doi.lower() in existing_records:
+            existing = existing_records[my_doi.lower()]
+            if existing is not None:
                 app.logger.info(
-                    "    found more than one existing record with same DOI:"
-                    f" {rec_list}"
+                    "    found existing record with same DOI (prefetched)..."
                 )
-                app.logger.info("   deleting extra records...")
-                for i in [
-                    h["id"]
-                    for h in list(same_doi.hits)[1:]
-                    if "draft" in h["status"]
-                ]:
-                    try:
-                        delete_invenio_draft_record(i)
-                    except PIDUnregistered as e:
-                        app.logger.error(
-                            "    error deleting extra record with same DOI:"
-                        )
-                        raise DraftDeletionFailedError(
-                            f"Draft deletion failed because PID for record "
-                            f"{i} was unregistered: {str(e)}"
-                        )
-                    except Exception as e:
-                        app.logger.error(
-                            f"    error deleting extra record {i} with "
-                            "same DOI:"
-                        )
-                        raise DraftDeletionFailedError(
-                            f"Draft deletion failed for record {i} with "
-                            f"same DOI: {str(e)}"
-                        )
-            existing_metadata = next(same_doi.hits)
+                existing_metadata = existing.metadata
+                existing_uuid = existing.uuid
+        else:
+            doi_for_query = my_doi.split("/")
+            # TODO: Can we include deleted records here somehow?
+            try:
+                same_doi = records_service.search_drafts(
+                    system_identity,
+                    q=f'pids.doi.identifier:"{doi_for_query[0]}/'
+                    f'{doi_for_query[1]}"',
+                )
+                # app.logger.debug(f"same_doi: {my_doi}")
+                # app.logger.debug(f"same_doi: {pformat(same_doi)}")
+            except Exception as e:
+                app.logger.error(
+                    "    error checking for existing record with same DOI:"
+                )
+                app.logger.error(same_doi.to_dict())
+                raise e
+            if same_doi.total > 0:
+                app.logger.info(
+                    f"    found {same_doi.total} existing"
+                    " records with same DOI..."
+                )
+                # delete extra records with the same doi
+                if same_doi.total > 1:
+                    rec_list = [(j["id"], j["status"]) for j in same_doi.hits]
+                    app.logger.info(
+                        "    found more than one existing record with same "
+                        f"DOI: {rec_list}"
+                    )
+                    app.logger.info("   deleting extra records...")
+                    for i in [
+                        h["id"]
+                        for h in list(same_doi.hits)[1:]
+                        if "draft" in h["status"]
+                    ]:
+                        try:
+                            delete_invenio_draft_record(i)
+                        except PIDUnregistered as e:
+                            app.logger.error(
+                                "    error deleting extra record with same "
+                                "DOI:"
+                            )
+                            raise DraftDeletionFailedError(
+                                "Draft deletion failed because PID for "
+                                f"record {i} was unregistered: {str(e)}"
+                            )
+                        except Exception as e:
+                            app.logger.error(
+                                f"    error deleting extra record {i} with "
+                                "same DOI:"
+                            )
+                            raise DraftDeletionFailedError(
+                                f"Draft deletion failed for record {i} with "
+                                f"same DOI: {str(e)}"
+                            )
+                existing_metadata = next(same_doi.hits)
+        if existing_metadata is not None:
             # app.logger.debug(
             #     f"existing_metadata: {pformat(existing_metadata)}"
             # )
@@ -428,14 +636,19 @@ def create_invenio_record(
                     f"    continuing with existing {record_type} record "
                     "(same metadata)..."
                 )
-                existing_record_hit = records_service.search_drafts(
-                    system_identity,
-                    q=f"id:{existing_metadata['id']}",
-                )._results[0]
+                if existing_uuid is None:
+                    existing_uuid = (
+                        records_service.search_drafts(
+                            system_identity,
+                            q=f"id:{existing_metadata['id']}",
+                        )
+                        ._results[0]
+                        .to_dict()["uuid"]
+                    )
                 result = {
                     "record_data": existing_metadata,
                     "status": f"unchanged_existing_{record_type}",
-                    "recid": existing_record_hit.to_dict()["uuid"],
+                    "recid": existing_uuid,
                 }
                 app.logger.debug(
                     f"metadata for existing record: {pformat(result)}"
@@ -724,27 +937,23 @@ def change_record_ownership(
     return result.parent.access.owned_by
 
 
-def assign_record_ownership(
-    draft_id: str,
-    core_data: dict,
-    record_source: str,
-    existing_record: Optional[dict] = None,
-):
-    # Create/find the necessary user account
-    app.logger.info("    creating or finding the user (submitter)...")
+def _submitter_of(core_data: dict) -> tuple:
+    """Return the submitter of a record.
+
+    Records without a submitter email or username are assigned to the
+    configured admin user.
+
+    returns:
+        tuple: the submitter's email address, username on the source
+            service (or None), and full name (or an empty string)
+    """
     # TODO: Make sure this will be the same email used for SAML login
-    new_owner_email = core_data["custom_fields"].get("kcr:submitter_email")
-    new_owner_username = core_data["custom_fields"].get(
-        "kcr:submitter_username"
-    )
-    if not new_owner_email and not new_owner_username:
-        app.logger.warning(
-            "    no submitter email or username found in source metadata. "
-            "Assigning ownership to configured admin user..."
-        )
+    email = core_data["custom_fields"].get("kcr:submitter_email")
+    username = core_data["custom_fields"].get("kcr:submitter_username")
+    if not email and not username:
         # admin = UsersHelper.get_admins()[0]
-        new_owner_email = app.config["RECORD_IMPORTER_ADMIN_EMAIL"]
-        new_owner_username = None
+        email = app.config["RECORD_IMPORTER_ADMIN_EMAIL"]
+        username = None
     full_name = ""
     for c in [
         *core_data["metadata"].get("creators", []),
@@ -753,38 +962,206 @@ def assign_record_ownership(
         for i in c["person_or_org"].get("identifiers", []):
             if i["scheme"] == "hc_username":
                 full_name = c["person_or_org"]["name"]
-    existing_user = current_accounts.datastore.get_user_by_email(
-        new_owner_email
-    )
-    if not existing_user:
-        # handle case where user has multiple emails
+    return email, username, full_name
+
+
+def _add_source_identifiers(
+    user: User, email: str, username: str, record_source: str
+) -> None:
+    """Record a submitter's email and source username in a user's profile.
+
+    Used when the user was found by their source username rather than by
+    their email (i.e., when a user has multiple emails). The change is not
+    committed.
+    """
+    idp_slug = "kc" if record_source == "knowledgeCommons" else record_source
+    user.user_profile[f"identifier_{idp_slug}_username"] = (username,)
+    user.user_profile["identifier_email"] = (email,)
+
+
+def resolve_submitters(
+    records: list[dict], record_source: str, known: Optional[dict] = None
+) -> dict:
+    """Find or create the users who submitted a batch of records.
+
+    The distinct submitters of the records (see `_submitter_of`) are
+    looked up by email in one query, and those not found are looked up
+    by their source username in a second one. Submitters who have no
+    Invenio account yet are created (with their SAML login) once each by
+    `create_invenio_user`, instead of once per record. The remote user
+    data of new submitters who have no email in the records is prefetched
+    concurrently (see `RemoteUserClient.prefetch`).
+
+    params:
+        records (list[dict]): the serialized records
+        record_source (str): the name of the source service
+        known (dict): submitters that were already resolved, which are
+            not looked up again
+
+    returns:
+        dict: the Invenio user id for each (email, source username) pair
+            that could be resolved. Submitters who could not be
+            provisioned are left out, so that the error is raised when
+            the record itself is imported.
+    """
+    known = known or {}
+    submitters = {}
+    for rec in records:
+        email, username, full_name = _submitter_of(rec)
+        if (email, username) not in known.keys():
+            submitters.setdefault((email, username), full_name)
+    user_ids = {}
+    if not submitters:
+        return user_ids
+
+    emails = {email.lower() for email, _ in submitters.keys() if email}
+    by_email = {}
+    if emails:
+        by_email = {
+            u.email.lower(): u
+            for u in User.query.filter(func.lower(User.email).in_(emails))
+        }
+    usernames = [
+        f"{record_source.lower()}-{username}"
+        for email, username in submitters.keys()
+        if not email or email.lower() not in by_email.keys()
+    ]
+    by_username = {}
+    if usernames:
+        by_username = {
+            u.username: u
+            for u in User.query.filter(User.username.in_(usernames))
+        }
+
+    # new submitters known only by username need their email fetched from
+    # the source's user data API, so fetch all of them at once
+    remote_ids = [
+        username
+        for email, username in submitters.keys()
+        if username
+        and not email
+        and f"{record_source.lower()}-{username}" not in by_username.keys()
+    ]
+    if remote_ids:
         try:
-            existing_user = current_accounts.datastore.find_user(
-                username=f"{record_source.lower()}-{new_owner_username}",
-            )
-            assert existing_user
-            idp_slug = (
-                "kc" if record_source == "knowledgeCommons" else record_source
-            )
-            existing_user.user_profile[f"identifier_{idp_slug}_username"] = (
-                new_owner_username,
+            UsersHelper.remote_user_client(record_source).prefetch(remote_ids)
+        except Exception as e:
+            app.logger.warning(f"    could not prefetch remote user data: {e}")
+
+    profiles_changed = False
+    new_submitters = {}
+    for (email, username), full_name in submitters.items():
+        user = by_email.get(email.lower()) if email else None
+        if not user:
+            user = by_username.get(f"{record_source.lower()}-{username}")
+            if user:
+                _add_source_identifiers(user, email, username, record_source)
+                profiles_changed = True
+        if user:
+            user_ids[(email, username)] = user.id
+        else:
+            new_submitters[(email, username)] = full_name
+    # commit the profile changes before any users are created, so that the
+    # rollback after a failed creation does not discard them
+    if profiles_changed:
+        current_accounts.datastore.commit()
+    for (email, username), full_name in new_submitters.items():
+        try:
+            user = create_invenio_user(
+                email, username, full_name, record_source
+            )["user"]
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(
+                f"    could not provision the user {email} "
+                f"({username} on {record_source}): {e}"
             )
-            existing_user.user_profile["identifier_email"] = (new_owner_email,)
-            current_accounts.datastore.commit()
-        except (NoResultFound, AssertionError):
-            pass
-    if existing_user:
-        new_owner = existing_user
+            continue
+        user_ids[(email, username)] = user.id
+    app.logger.info(
+        f"    resolved {len(user_ids)} of {len(submitters)} submitters"
+    )
+    return user_ids
+
+
+def assign_record_ownership(
+    draft_id: str,
+    core_data: dict,
+    record_source: str,
+    existing_record: Optional[dict] = None,
+    submitter_ids: Optional[dict] = None,
+):
+    """Make the record's submitter the owner of the record.
+
+    params:
+        draft_id (str): the id of the record
+        core_data (dict): the serialized record
+        record_source (str): the name of the source service
+        existing_record (dict): the existing record, if any
+        submitter_ids (dict): a cache of the Invenio user ids of
+            submitters (see `resolve_submitters`). Submitters found in it
+            are not looked up again, and submitters who are looked up or
+            created are added to it.
+
+    returns:
+        User: the new owner of the record
+    """
+    # Create/find the necessary user account
+    app.logger.info("    creating or finding the user (submitter)...")
+    if not (
+        core_data["custom_fields"].get("kcr:submitter_email")
+        or core_data["custom_fields"].get("kcr:submitter_username")
+    ):
+        app.logger.warning(
+            "    no submitter email or username found in source metadata. "
+            "Assigning ownership to configured admin user..."
+        )
+    new_owner_email, new_owner_username, full_name = _submitter_of(core_data)
+    submitter = (new_owner_email, new_owner_username)
+
+    new_owner = None
+    if submitter_ids and submitter in submitter_ids.keys():
+        new_owner = current_accounts.datastore.get_user(
+            submitter_ids[submitter]
+        )
+    if new_owner:
         app.logger.debug(
-            f"    assigning ownership to existing user: "
-            f"{pformat(existing_user)} {existing_user.email}"
+            f"    assigning ownership to known user {new_owner.id}"
         )
     else:
-        new_owner_result = create_invenio_user(
-            new_owner_email, new_owner_username, full_name, record_source
+        existing_user = current_accounts.datastore.get_user_by_email(
+            new_owner_email
         )
-        new_owner = new_owner_result["user"]
-        app.logger.info(f"    new user created: {pformat(new_owner)}")
+        if not existing_user:
+            # handle case where user has multiple emails
+            try:
+                existing_user = current_accounts.datastore.find_user(
+                    username=f"{record_source.lower()}-{new_owner_username}",
+                )
+                assert existing_user
+                _add_source_identifiers(
+                    existing_user,
+                    new_owner_email,
+                    new_owner_username,
+                    record_source,
+                )
+                current_accounts.datastore.commit()
+            except (NoResultFound, AssertionError):
+                pass
+        if existing_user:
+            new_owner = existing_user
+            app.logger.debug(
+                f"    assigning ownership to existing user: "
+                f"{pformat(existing_user)} {existing_user.email}"
+            )
+        else:
+            new_owner_result = create_invenio_user(
+                new_owner_email, new_owner_username, full_name, record_source
+            )
+            new_owner = new_owner_result["user"]
+            app.logger.info(f"    new user created: {pformat(new_owner)}")
+        if submitter_ids is not None:
+            submitter_ids[submitter] = new_owner.id
 
     # if existing_record:
     #     app.logger.debug("existing record data")
@@ -824,6 +1201,8 @@ def import_record_to_invenio(
     no_updates: bool = False,
     record_source: Optional[str] = None,
     overrides: dict = {},
+    existing_records: Optional[dict] = None,
+    submitter_ids: Optional[dict] = None,
 ) -> dict:
     """
     Create an invenio record with file uploads, ownership, communities.
@@ -844,6 +1223,12 @@ def import_record_to_invenio(
     overrides : dict
         A dictionary of metadata fields to override in the import data
         if manual corrections are necessary
+    existing_records : dict
+        The existing records found for a batch of DOIs by
+        `resolve_existing_dois`, if any
+    submitter_ids : dict
+        The user ids of the submitters of a batch of records, as returned
+        by `resolve_submitters`, if any
 
     Returns
     -------
@@ -901,7 +1286,9 @@ def import_record_to_invenio(
 
     # Create the basic metadata record
     app.logger.info("    finding or creating draft metadata record...")
-    record_created = create_invenio_record(import_data, no_updates)
+    record_created = create_invenio_record(
+        import_data, no_updates, existing_records
+    )
     result["metadata_record_created"] = record_created
     result["status"] = record_created["status"]
     app.logger.info(f"    record status: {record_created['status']}")
@@ -945,7 +1332,11 @@ def import_record_to_invenio(
 
     # Assign ownership of the record
     result["assigned_ownership"] = assign_record_ownership(
-        draft_id, import_data, record_source, existing_record=existing_record
+        draft_id,
+        import_data,
+        record_source,
+        existing_record=existing_record,
+        submitter_ids=submitter_ids,
     )
 
     # Add the record to the appropriate group collections
@@ -971,140 +1362,896 @@ def import_record_to_invenio(
     return result
 
 
-def _log_created_record(
-    index: int = 0,
-    invenio_id: str = "",
-    invenio_recid: str = "",
-    commons_id: str = "",
-    core_record_id: str = "",
-    created_records: list = [],
-) -> list:
+def _record_log_object(rec: dict, index: int) -> dict:
+    """Return the identifiers used to log a serialized record."""
+    return {
+        "index": index,
+        "invenio_recid": None,
+        "invenio_id": (
+            rec["pids"]["doi"]["identifier"] if "pids" in rec.keys() else ""
+        ),
+        "commons_id": [
+            r
+            for r in rec["metadata"]["identifiers"]
+            if r["scheme"] == "hclegacy-pid"
+        ][0]["identifier"],
+        "core_record_id": [
+            r
+            for r in rec["metadata"]["identifiers"]
+            if r["scheme"] == "hclegacy-record-id"
+        ][0]["identifier"],
+    }
+
+
+def _load_record(
+    rec: dict,
+    index: int,
+    record_source: str,
+    overrides: dict = {},
+    skip: bool = False,
+    no_updates: bool = False,
+    fingerprint: Optional[str] = None,
+    existing_records: Optional[dict] = None,
+    submitter_ids: Optional[dict] = None,
+    defer_indexing: bool = False,
+) -> dict:
     """
-    Log a created record to the created records log file.
+    Import one serialized record and summarize the outcome.
 
-    This does not update the log file if the record has already been created.
-    If the record does not appear in the log file, it is added at the end.
+    The summary contains only plain values, so it can be handed back
+    from a worker process and logged by the process running the import.
 
-    :param index: the index of the record in the source file
-    :param invenio_id: the doi of the record in Invenio
-    :param invenio_recid: the recid of the record in Invenio
-    :param commons_id: the user-facing id of the record in the source system
-    :param core_record_id: the Fedora system id of the record in the
-        source database
-    :param created_records: the list of previously created records in this
-        run
+    params:
+        rec (dict): the serialized record to import
+        index (int): the line number of the record in the source jsonl
+            file (beginning at 1)
+        record_source (str): the name of the source service for the record
+        overrides (dict): metadata overrides for the record
+        skip (bool): whether the record is marked for skipping in the
+            overrides file
+        no_updates (bool): whether to update existing records
+        fingerprint (str): the fingerprint of the import payload (see
+            `ImportLedger.fingerprint`), to be logged if the import
+            succeeds
+        existing_records (dict): the existing records found for the DOIs
+            of the record's batch by `resolve_existing_dois`
+        submitter_ids (dict): the user ids of the submitters of the
+            record's batch, as returned by `resolve_submitters`
+        defer_indexing (bool): whether indexing is deferred (see
+            `DeferredIndexing`). If so, a retried import finds the record
+            saved by the first attempt in the database (see
+            `_with_stored_record`), since the record is not indexed yet.
 
-    :returns: the updated list of created records
+    returns:
+        dict: a dictionary with the following keys:
+            - log_object: the identifiers used to log the record
+            - status: the status of the record operation (as returned by
+              import_record_to_invenio), or "skipped" or "failed"
+            - invenio_recid: the id of the created or updated Invenio
+              record
+            - existing_record: whether the record already existed
+            - reason: the reason for the failure, if it is a known error
+            - fingerprint: the fingerprint of the import payload
     """
-    created_log_path = app.config["RECORD_IMPORTER_CREATED_LOG_PATH"]
-    created_rec = {
-        "index": index,
-        "invenio_id": invenio_id,
-        "invenio_recid": invenio_recid,
-        "commons_id": commons_id,
-        "core_record_id": core_record_id,
-        "timestamp": arrow.now().format(),
+    log_object = _record_log_object(rec, index)
+    app.logger.info(f"....starting to load record {index}")
+    app.logger.info(
+        f"    DOI:{log_object['invenio_id']} {log_object['invenio_recid']} "
+        f"{log_object['commons_id']} {log_object['core_record_id']}"
+        f"{record_source}"
+    )
+    outcome = {
+        "log_object": log_object,
+        "status": "failed",
+        "invenio_recid": None,
+        "existing_record": False,
+        "reason": None,
+        "fingerprint": fingerprint,
     }
-    existing_lines = [
-        (idx, t)
-        for idx, t in enumerate(created_records)
-        if t["commons_id"] == commons_id and t["invenio_id"] == invenio_id
-    ]
-    if not existing_lines:
-        created_records.append(created_rec)
-
-        with jsonlines.open(
-            created_log_path,
-            "a",
-        ) as created_writer:
-            created_writer.write(created_rec)
-    elif (
-        existing_lines
-        and existing_lines[0][1]["invenio_recid"] != invenio_recid
-    ):
-        i = existing_lines[0][0]
-        created_records = [
-            *created_records[:i],
-            *created_records[i + 1 :],  # noqa: E203
-            created_rec,
-        ]
-        with jsonlines.open(
-            created_log_path,
-            "w",
-        ) as created_writer:
-            for t in created_records:
-                created_writer.write(t)
-
-    return created_records
-
-
-def _log_failed_record(
-    index=-1,
-    invenio_id=None,
-    commons_id=None,
-    core_record_id=None,
-    failed_records=None,
-    residual_failed_records=None,
-    reason=None,
-    skipped_records=None,
-) -> None:
+    try:
+        result = {}
+        if skip:
+            raise SkipRecord("Record marked for skipping in override file")
+        # FIXME: This is a hack to handle StaleDataError which
+        # is consistently resolved on a second attempt -- seems
+        # to arise when a record is being added to several
+        # communities at once
+        try:
+            result = import_record_to_invenio(
+                rec,
+                no_updates,
+                record_source,
+                overrides,
+                existing_records,
+                submitter_ids,
+            )
+        except StaleDataError:
+            # the first attempt may have created the record already
+            result = import_record_to_invenio(
+                rec,
+                no_updates,
+                record_source,
+                overrides,
+                _with_stored_record(rec) if defer_indexing else None,
+                submitter_ids=submitter_ids,
+            )
+        outcome["status"] = result["status"]
+        outcome["invenio_recid"] = (
+            result.get("metadata_record_created").get("record_data").get("id")
+        )
+        outcome["existing_record"] = bool(result.get("existing_record"))
+        app.logger.debug("result status: %s", result.get("status"))
+    except SkipRecord:
+        outcome["status"] = "skipped"
+    except Exception as e:
+        print("ERROR:", e)
+        print_exc()
+        app.logger.error(f"ERROR: {e}")
+        msg = str(e)
+        try:
+            msg = e.messages
+        except AttributeError:
+            pass
+        error_reasons = {
+            "CommonsGroupNotFoundError": msg,
+            "CommonsGroupServiceError": msg,
+            "DraftDeletionFailedError": msg,
+            "ExistingRecordNotUpdatedError": msg,
+            "FileKeyNotFoundError": msg,
+            "FailedCreatingUsageEventsError": msg,
+            "FileUploadError": msg,
+            "UploadFileNotFoundError": msg,
+            "InvalidKeyError": msg,
+            "MissingNewUserEmailError": msg,
+            "MissingParentMetadataError": msg,
+            "MultipleActiveCollectionsError": msg,
+            "PublicationValidationError": msg,
+            "RestrictedRecordPublicationError": msg,
+            "StaleDataError": msg,
+            "TooManyViewEventsError": msg,
+            "TooManyDownloadEventsError": msg,
+            "UpdateValidationError": msg,
+        }
+        if e.__class__.__name__ in error_reasons.keys():
+            outcome["reason"] = error_reasons[e.__class__.__name__]
+
+    return outcome
+
+
+class LoadResultsTracker:
+    """Tally the outcomes of a loading run and keep the logs up to date.
+
+    Outcomes may arrive in any order (e.g., from a pool of worker
+    processes), but the created and failed records logs are only ever
+    written by the process that owns the tracker. They are kept in an
+    ImportLedger, and the failed records log is exported from the
+    ledger by `close` at the end of the run.
+    """
+
+    def __init__(self):
+        """Load the created and failed records logs from prior runs."""
+        self.record_counter = 0
+        self.failed_records = []
+        self.skipped_records = []
+        self.successful_records = 0
+        self.updated_drafts = 0
+        self.updated_published = 0
+        self.unchanged_existing = 0
+        self.new_records = 0
+        self.repaired_failed = []
+        self.closed = False
+
+        # Load the created and failed records from prior runs
+        self.ledger = ImportLedger()
+        self.existing_failed_records = self.ledger.failed_records()
+        self.existing_failed_indices = {
+            r["index"] for r in self.existing_failed_records
+        }
+        self.existing_failed_hcids = {
+            r["commons_id"] for r in self.existing_failed_records
+        }
+        # prior failures not yet failed again or repaired in this run
+        self.residual_failed_records = {
+            r["commons_id"]: r for r in self.existing_failed_records
+        }
+
+    def add(self, outcome: dict) -> None:
+        """Tally the outcome of one record and update the logs.
+
+        params:
+            outcome (dict): the record outcome returned by `_load_record`
+        """
+        log_object = outcome["log_object"]
+        commons_id = log_object["commons_id"]
+        if outcome["status"] == "skipped":
+            self.skipped_records.append(log_object)
+            self.ledger.remove_failed(commons_id)
+            self.residual_failed_records.pop(commons_id, None)
+        elif outcome["status"] == "failed":
+            failed_obj = {
+                "index": log_object["index"],
+                "invenio_id": log_object["invenio_id"],
+                "commons_id": commons_id,
+                "core_record_id": log_object["core_record_id"],
+                "reason": outcome["reason"],
+                "datestamp": arrow.now().format(),
+            }
+            self.failed_records.append(failed_obj)
+            self.ledger.log_failed(failed_obj)
+            self.residual_failed_records.pop(commons_id, None)
+        else:
+            self.ledger.log_created(
+                {
+                    "index": log_object["index"],
+                    "invenio_id": log_object["invenio_id"],
+                    "invenio_recid": outcome["invenio_recid"],
+                    "commons_id": commons_id,
+                    "core_record_id": log_object["core_record_id"],
+                    "timestamp": arrow.now().format(),
+                    "fingerprint": outcome.get("fingerprint"),
+                }
+            )
+            self.ledger.remove_failed(commons_id)
+            self.successful_records += 1
+            if not outcome["existing_record"]:
+                self.new_records += 1
+            if "unchanged_existing" in outcome["status"]:
+                self.unchanged_existing += 1
+            if outcome["status"] == "updated_published":
+                self.updated_published += 1
+            if outcome["status"] == "updated_draft":
+                self.updated_drafts += 1
+            if commons_id in self.existing_failed_hcids:
+                app.logger.info("    repaired previously failed record...")
+                app.logger.info(
+                    f"    {log_object['invenio_id']} "
+                    f"{commons_id} "
+                    f"{log_object['core_record_id']}"
+                )
+                self.residual_failed_records.pop(commons_id, None)
+                self.repaired_failed.append(log_object)
+        self.record_counter += 1
+
+    def unchanged_outcome(self, task: dict) -> Optional[dict]:
+        """Return the outcome for a record unchanged since its last import.
+
+        A record is unchanged if it was last imported successfully with
+        the same payload fingerprint and has not failed since.
+
+        params:
+            task (dict): the arguments for `_load_record` for the record
+
+        returns:
+            dict | None: an "unchanged_existing" outcome for the record, or
+                None if the record has to be loaded
+        """
+        if task["skip"] or not task.get("fingerprint"):
+            return None
+        log_object = _record_log_object(task["rec"], task["index"])
+        if log_object["commons_id"] in self.existing_failed_hcids:
+            return None
+        invenio_recid = self.ledger.unchanged_recid(
+            log_object["commons_id"],
+            log_object["invenio_id"],
+            task["fingerprint"],
+        )
+        if invenio_recid is None:
+            return None
+        return {
+            "log_object": log_object,
+            "status": "unchanged_existing",
+            "invenio_recid": invenio_recid,
+            "existing_record": True,
+            "reason": None,
+            "fingerprint": task["fingerprint"],
+        }
+
+    def close(self) -> None:
+        """Export the created and failed records logs (once)."""
+        if not self.closed:
+            self.closed = True
+            self.ledger.close()
+
+    def summary(self, start_index: int = 1, nonconsecutive: list = []) -> str:
+        """Return the summary message for the loading run."""
+        set_string = ""
+        if nonconsecutive:
+            set_string = f"{' '.join([str(n) for n in nonconsecutive])}"
+        else:
+            target_string = (
+                f" to {start_index + self.record_counter - 1}"
+                if self.record_counter > 1
+                else ""
+            )
+            set_string = f"{start_index}{target_string}"
+        return (
+            f"Processed {str(self.record_counter)} records in InvenioRDM "
+            f"({set_string})"
+            f" \n    {str(self.successful_records)} successful \n   "
+            f" {str(self.new_records)} new records created \n   "
+            f" {str(self.successful_records - self.new_records)} already "
+            "existed \n       "
+            f" {str(self.updated_published)} updated published records \n"
+            "       "
+            f" {str(self.updated_drafts)} updated existing draft records \n"
+            "       "
+            f" {str(self.unchanged_existing)} unchanged existing records \n"
+            "       "
+            f" {str(len(self.repaired_failed))} previously failed records "
+            "repaired \n "
+            f"   {str(len(self.failed_records))} failed \n"
+            f"   {str(len(self.skipped_records))} records skipped (marked in "
+            "overrides)"
+            f"\n   "
+        )
+
+
+def _iter_selected_records(
+    json_source,
+    start_index: int = 1,
+    stop_index: int = -1,
+    source_ids: Optional[list] = None,
+    sourceid_scheme: str = "hclegacy-pid",
+):
+    """Lazily select the records to load from the serialized records.
+
+    Records are yielded as soon as they are read, so loading can begin
+    before the whole serialized file has been read, and the file is only
+    read until all of the requested records have been found. (Records
+    requested by line number, or by an id indexed in the
+    SerializedRecordIndex, are read with `_iter_indexed_records` instead.)
+
+    params:
+        json_source: an iterator over the serialized records (e.g., a
+            jsonlines reader)
+        start_index (int): the line number of the first record in a
+            range to load (beginning at 1)
+        stop_index (int): the line number of the last record in a range to
+            load (inclusive). If -1, the range runs to the end of the file.
+        source_ids (list): the ids (in the source system) of the records
+            to load
+        sourceid_scheme (str): the identifier scheme of the source ids
+
+    returns:
+        Iterator[dict]: the selected serialized records
+    """
+    if source_ids is not None:
+        wanted = set(source_ids)
+        for j in json_source:
+            matches = wanted.intersection(
+                i["identifier"]
+                for i in j["metadata"]["identifiers"]
+                if i["scheme"] == sourceid_scheme
+            )
+            if matches:
+                wanted -= matches
+                yield j
+                if not wanted:
+                    return
+    else:
+        if stop_index == -1:
+            stop = None
+        elif stop_index >= start_index:
+            stop = stop_index
+        else:
+            stop = start_index
+        yield from itertools.islice(json_source, start_index - 1, stop)
+
+
+def _iter_indexed_records(record_index: SerializedRecordIndex, line_nums):
+    """Lazily read the records at the given line numbers of the file.
+
+    Each record is given a "jsonl_index" key with its line number. Line
+    numbers past the end of the file are skipped.
     """
-    Log a failed record to the failed records log file.
+    record_count = len(record_index)
+    for line_num in line_nums:
+        if line_num < 1 or line_num > record_count:
+            app.logger.warning(f"    no serialized record at line {line_num}")
+            continue
+        record = record_index.read(line_num)
+        record["jsonl_index"] = line_num
+        yield record
+
+
+def _iter_load_tasks(
+    record_set, start_index: int, overrides_index: OverridesIndex
+):
+    """Yield the arguments for `_load_record` for each record in the set.
+
+    This is where the metadata overrides for each record are looked up
+    (for manual fixing of import data after serialization).
     """
-    failed_log_path = Path(app.config["RECORD_IMPORTER_FAILED_LOG_PATH"])
+    for position, rec in enumerate(record_set):
+        record_source = rec.pop("record_source")
+        # allow skipping records in the source file
+        overrides, skip = overrides_index.lookup(
+            record_source,
+            [
+                i["identifier"]
+                for i in rec["metadata"]["identifiers"]
+                if i["scheme"] == "hclegacy-pid"
+            ],
+        )
+        if "jsonl_index" in rec.keys():
+            current_record = rec["jsonl_index"]
+        else:
+            current_record = start_index + position
+        yield {
+            "rec": rec,
+            "index": current_record,
+            "record_source": record_source,
+            "overrides": overrides,
+            "skip": skip,
+            "fingerprint": ImportLedger.fingerprint(
+                rec, overrides, record_source
+            ),
+        }
+
+
+def _skip_unchanged_records(load_tasks, tracker: LoadResultsTracker):
+    """Filter out the records that are unchanged since their last import.
+
+    For each record whose payload fingerprint matches the one logged for
+    its last successful import (see `LoadResultsTracker.unchanged_outcome`)
+    an "unchanged_existing" outcome is recorded without any calls to the
+    database, search index, or file storage. The other load tasks are
+    yielded unchanged.
 
-    failed_obj = {
-        "index": index,
-        "invenio_id": invenio_id,
-        "commons_id": commons_id,
-        "core_record_id": core_record_id,
-        "reason": reason,
-        "datestamp": arrow.now().format(),
-    }
-    if index > -1:
-        failed_records.append(failed_obj)
-    skipped_ids = []
-    if len(skipped_records) > 0:
-        skipped_ids = [r["commons_id"] for r in skipped_records if r]
-    with jsonlines.open(
-        failed_log_path,
-        "w",
-    ) as failed_writer:
-        total_failed = [
-            r for r in failed_records if r["commons_id"] not in skipped_ids
+    params:
+        load_tasks: an iterator over the arguments for `_load_record`
+        tracker (LoadResultsTracker): the tracker with the ledger to check
+    """
+    for task in load_tasks:
+        outcome = tracker.unchanged_outcome(task)
+        if outcome is None:
+            yield task
+        else:
+            tracker.add(outcome)
+            app.logger.info(
+                f"....record {task['index']} is unchanged since it was "
+                "last imported"
+            )
+
+
+def _batch_pre_pass(func):
+    """Make a batch pre-pass fall back to the per-record lookups on error.
+
+    The pre-passes (e.g. `_resolve_task_submitters`) run outside of
+    `_load_record`'s error handling, so an error raised for one record
+    (or by one failed query) would otherwise abort its whole batch or
+    chunk. Instead the error is logged, the database session is rolled
+    back, and an empty map is returned, so that each record of the batch
+    is looked up by itself (and fails by itself) when it is imported.
+    """
+
+    @wraps(func)
+    def wrapper(load_tasks: list[dict], *args, **kwargs) -> dict:
+        try:
+            return func(load_tasks, *args, **kwargs) or {}
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(
+                f"    {func.__name__} failed for records "
+                f"{[t['index'] for t in load_tasks]}, falling back to "
+                f"per-record lookups: {e}"
+            )
+            return {}
+
+    return wrapper
+
+
+@_batch_pre_pass
+def _resolve_task_dois(load_tasks: list[dict]) -> dict:
+    """Look up the existing records for the DOIs of some load tasks."""
+    return resolve_existing_dois(
+        [
+            t["rec"]["pids"]["doi"]["identifier"]
+            for t in load_tasks
+            if not t["skip"] and "doi" in t["rec"].get("pids", {})
         ]
-        failed_ids = [r["commons_id"] for r in failed_records if r]
-        for e in residual_failed_records:
-            if e["commons_id"] not in failed_ids and e not in total_failed:
-                total_failed.append(e)
-        ordered_failed_records = sorted(total_failed, key=lambda r: r["index"])
-        for o in ordered_failed_records:
-            failed_writer.write(o)
+    )
+
+
+def _records_by_source(load_tasks: list[dict]) -> dict:
+    """Group the records of some load tasks (not marked to skip) by source."""
+    records_by_source = defaultdict(list)
+    for t in load_tasks:
+        if not t["skip"]:
+            records_by_source[t["record_source"]].append(t["rec"])
+    return records_by_source
+
+
+@_batch_pre_pass
+def _resolve_task_submitters(
+    load_tasks: list[dict], known: Optional[dict] = None
+) -> dict:
+    """Find or create the users who submitted the records of some tasks."""
+    submitter_ids = {}
+    for record_source, records in _records_by_source(load_tasks).items():
+        submitter_ids.update(resolve_submitters(records, record_source, known))
+    return submitter_ids
+
+
+@_batch_pre_pass
+def _warm_task_group_collections(load_tasks: list[dict]) -> None:
+    """Look up the group collections of the records of some load tasks."""
+    for record_source, records in _records_by_source(load_tasks).items():
+        CommunitiesHelper.warm_group_collection_cache(records, record_source)
+
+
+def _load_record_chunk(
+    load_tasks: list[dict], no_updates: bool, defer_indexing: bool = False
+) -> list:
+    """Import a chunk of records inside a worker process.
+
+    The DOIs of the whole chunk are looked up in bulk before the records
+    are imported (see `resolve_existing_dois`), and so are its submitters
+    (see `resolve_submitters`) and group collections (see
+    `CommunitiesHelper.warm_group_collection_cache`).
+
+    If `defer_indexing` is True, the records changed by the chunk are
+    queued for bulk indexing once the chunk is loaded (see
+    `DeferredIndexing`) instead of being indexed by each operation. A
+    record with the same DOI as one loaded earlier in the chunk then
+    updates that record (see `_with_loaded_record`).
+    """
+    existing_records = _resolve_task_dois(load_tasks)
+    submitter_ids = _resolve_task_submitters(load_tasks)
+    _warm_task_group_collections(load_tasks)
+    loaded_records = {} if defer_indexing else None
+    outcomes = []
+    with DeferredIndexing() if defer_indexing else nullcontext():
+        for t in load_tasks:
+            outcome = _load_record(
+                **t,
+                no_updates=no_updates,
+                existing_records=_with_loaded_record(
+                    existing_records, t["rec"], loaded_records
+                ),
+                submitter_ids=submitter_ids,
+                defer_indexing=defer_indexing,
+            )
+            _remember_loaded_record(loaded_records, outcome)
+            outcomes.append(outcome)
+    return outcomes
+
+
+def _failed_chunk_outcomes(load_tasks: list[dict], error: Exception) -> list:
+    """Return "failed" outcomes for a chunk of records that was not loaded.
 
-    return failed_records, residual_failed_records
+    Used when a whole chunk fails (e.g., because its worker process
+    died), so that its records are still logged as failed and can be
+    retried with the --retry-failed flag.
+    """
+    outcomes = []
+    for t in load_tasks:
+        try:
+            log_object = _record_log_object(t["rec"], t["index"])
+        except (KeyError, IndexError, TypeError):
+            log_object = {
+                "index": t["index"],
+                "invenio_recid": None,
+                "invenio_id": "",
+                "commons_id": "",
+                "core_record_id": "",
+            }
+        outcomes.append(
+            {
+                "log_object": log_object,
+                "status": "failed",
+                "invenio_recid": None,
+                "existing_record": False,
+                "reason": f"{error.__class__.__name__}: {error}",
+                "fingerprint": t.get("fingerprint"),
+            }
+        )
+    return outcomes
 
 
-def _load_prior_failed_records() -> tuple[list, list, list, list]:
-    failed_log_path = Path(app.config["RECORD_IMPORTER_FAILED_LOG_PATH"])
-    existing_failed_records = []
+def _chunk_outcomes(future, load_tasks: list[dict]) -> list:
+    """Return the outcomes of a chunk loaded by a worker process."""
     try:
-        with jsonlines.open(
-            failed_log_path,
-            "r",
-        ) as reader:
-            existing_failed_records = [obj for obj in reader]
-    except FileNotFoundError:
-        app.logger.info("**no existing failed records log file found...**")
-    existing_failed_indices = [r["index"] for r in existing_failed_records]
-    existing_failed_hcids = [r["commons_id"] for r in existing_failed_records]
-    residual_failed_records = [*existing_failed_records]
-
-    return (
-        existing_failed_records,
-        residual_failed_records,
-        existing_failed_indices,
-        existing_failed_hcids,
+        return future.result()
+    except Exception as e:
+        app.logger.error(
+            f"    failed to load the chunk of records "
+            f"{[t['index'] for t in load_tasks]}: {e}"
+        )
+        return _failed_chunk_outcomes(load_tasks, e)
+
+
+def _load_records_in_pool(
+    load_tasks,
+    tracker: LoadResultsTracker,
+    workers: int,
+    no_updates: bool = False,
+    stop_on_error: bool = False,
+    defer_indexing: bool = False,
+) -> None:
+    """Import records using a pool of worker processes.
+
+    The records are handed to the workers in chunks of
+    RECORD_IMPORTER_LOAD_CHUNK_SIZE records. Only a few chunks per
+    worker are queued at a time. The outcomes are tallied and logged
+    by the tracker in this (the parent) process as each chunk finishes.
+
+    If a chunk fails as a whole (e.g., because its worker process died),
+    its records are tallied as failed. If the pool breaks, no more
+    chunks are queued. With `stop_on_error`, the chunks that have not
+    started are cancelled, but the outcomes of the chunks that are
+    already running are still tallied.
+    """
+    chunk_size = app.config.get("RECORD_IMPORTER_LOAD_CHUNK_SIZE", 10)
+    task_iter = iter(load_tasks)
+    chunks = {}
+    pending = set()
+    pool_broken = False
+
+    def track(future):
+        for outcome in _chunk_outcomes(future, chunks.pop(future)):
+            tracker.add(outcome)
+            app.logger.info(
+                f"....done with record {outcome['log_object']['index']}"
+            )
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker_app_context,
+    ) as executor:
+        while True:
+            while not pool_broken and len(pending) < workers * 2:
+                chunk = list(itertools.islice(task_iter, chunk_size))
+                if not chunk:
+                    break
+                try:
+                    future = executor.submit(
+                        _load_record_chunk, chunk, no_updates, defer_indexing
+                    )
+                except BrokenProcessPool as e:
+                    app.logger.error(
+                        f"    the worker pool is broken, so no more records "
+                        f"will be loaded: {e}"
+                    )
+                    for outcome in _failed_chunk_outcomes(chunk, e):
+                        tracker.add(outcome)
+                    pool_broken = True
+                    break
+                chunks[future] = chunk
+                pending.add(future)
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                track(future)
+            if stop_on_error and tracker.failed_records:
+                # chunks that are already running cannot be cancelled, so
+                # wait for them and tally their outcomes
+                for future in pending:
+                    if not future.cancel():
+                        track(future)
+                break
+
+
+def _load_records_in_batches(
+    load_tasks,
+    tracker: LoadResultsTracker,
+    no_updates: bool = False,
+    stop_on_error: bool = False,
+    defer_indexing: bool = False,
+) -> None:
+    """Import records one at a time in this process.
+
+    The records are read in batches of RECORD_IMPORTER_DOI_BATCH_SIZE
+    records, and the DOIs of each batch are looked up in bulk (see
+    `resolve_existing_dois`) before its records are imported. So are the
+    submitters of each batch who were not found for an earlier batch (see
+    `resolve_submitters`) and the group collections that are not cached
+    yet (see `CommunitiesHelper.warm_group_collection_cache`).
+
+    If `defer_indexing` is True, the records changed by the run are
+    queued for bulk indexing every RECORD_IMPORTER_REINDEX_BATCH_SIZE
+    records and at the end of the run (see `DeferredIndexing`) instead
+    of being indexed by each operation. A record with the same DOI as
+    one loaded earlier in the run then updates that record (see
+    `_with_loaded_record`).
+    """
+    batch_size = app.config.get("RECORD_IMPORTER_DOI_BATCH_SIZE", 100)
+    reindex_batch_size = app.config.get(
+        "RECORD_IMPORTER_REINDEX_BATCH_SIZE", 500
+    )
+    task_iter = iter(load_tasks)
+    submitter_ids = {}
+    loaded_records = {} if defer_indexing else None
+    loaded_count = 0
+    with DeferredIndexing() if defer_indexing else nullcontext() as deferred:
+        while True:
+            batch = list(itertools.islice(task_iter, batch_size))
+            if not batch:
+                break
+            existing_records = _resolve_task_dois(batch)
+            submitter_ids.update(
+                _resolve_task_submitters(batch, submitter_ids)
+            )
+            _warm_task_group_collections(batch)
+            for task in batch:
+                spinner = Halo(
+                    text=f"    Loading record {task['index']}",
+                    spinner="dots",
+                )
+                spinner.start()
+                outcome = _load_record(
+                    **task,
+                    no_updates=no_updates,
+                    existing_records=_with_loaded_record(
+                        existing_records, task["rec"], loaded_records
+                    ),
+                    submitter_ids=submitter_ids,
+                    defer_indexing=defer_indexing,
+                )
+                _remember_loaded_record(loaded_records, outcome)
+                tracker.add(outcome)
+                spinner.stop()
+                app.logger.info(f"....done with record {task['index']}")
+                loaded_count += 1
+                if (
+                    deferred is not None
+                    and loaded_count % reindex_batch_size == 0
+                ):
+                    deferred.flush()
+                if (
+                    stop_on_error
+                    and outcome["status"] in ["failed", "skipped"]
+                    and tracker.failed_records
+                ):
+                    return
+
+
+def _load_records_with_celery(
+    load_tasks,
+    tracker: LoadResultsTracker,
+    no_updates: bool = False,
+    defer_indexing: bool = False,
+) -> None:
+    """Import records with the running Celery workers.
+
+    One `load_record_chunk` task is queued for every
+    RECORD_IMPORTER_LOAD_CHUNK_SIZE records. This process then waits for
+    the tasks and tallies the outcomes they return with `tracker`, so
+    that the ledger and the created and failed records logs are only
+    ever written on the host that started the run, not on the workers.
+
+    If a task's result cannot be retrieved (e.g., because its worker
+    was lost), the records of its chunk are tallied as failed.
+    """
+    from .tasks import load_record_chunk
+
+    chunk_size = app.config.get("RECORD_IMPORTER_LOAD_CHUNK_SIZE", 10)
+    task_iter = iter(load_tasks)
+    queued = []
+    while True:
+        chunk = list(itertools.islice(task_iter, chunk_size))
+        if not chunk:
+            break
+        queued.append(
+            (
+                load_record_chunk.delay(
+                    chunk, no_updates=no_updates, defer_indexing=defer_indexing
+                ),
+                chunk,
+            )
+        )
+    print(f"Queued {len(queued)} chunks of records for loading.")
+    app.logger.info(
+        f"Queued {len(queued)} Celery tasks to load records. Waiting for "
+        "them to finish..."
+    )
+
+    for result, chunk in queued:
+        try:
+            outcomes = result.get()
+        except Exception as e:
+            app.logger.error(
+                f"    failed to get the results of the chunk of records "
+                f"{[t['index'] for t in chunk]}: {e}"
+            )
+            outcomes = _failed_chunk_outcomes(chunk, e)
+        for outcome in outcomes:
+            tracker.add(outcome)
+            app.logger.info(
+                f"....done with record {outcome['log_object']['index']}"
+            )
+
+
+def _finish_loading_run(
+    tracker: LoadResultsTracker,
+    start_index: int = 1,
+    nonconsecutive: list = [],
+    aggregate: bool = False,
+    start_date: str = "",
+    end_date: str = "",
+    verbose: bool = False,
+) -> str:
+    """
+    Log the summary of a loading run and aggregate the usage stats.
+
+    This runs once at the end of a run, in the process that started it,
+    whether the records were loaded in this process, by a pool of worker
+    processes, or by Celery tasks.
+
+    params:
+        tracker (LoadResultsTracker): the tracker holding the outcomes of
+            the run
+        start_index (int): the starting index of the records loaded
+        nonconsecutive (list): the nonconsecutive indices or ids loaded
+        aggregate (bool): whether to aggregate usage stats for the records
+        start_date (str): the starting date of usage events to aggregate
+        end_date (str): the ending date of usage events to aggregate
+        verbose (bool): whether to log verbose output
+
+    returns:
+        str: the summary message for the run
+    """
+    app.logger.info("All done loading records into InvenioRDM")
+    tracker.close()
+    message = tracker.summary(
+        start_index=start_index, nonconsecutive=nonconsecutive
     )
+    app.logger.info(message)
+
+    # Aggregate the stats again now
+    start_date = (
+        start_date
+        if start_date
+        else arrow.utcnow().shift(days=-1).naive.date().isoformat()
+    )
+    end_date = (
+        end_date
+        if end_date
+        else arrow.utcnow().shift(days=1).naive.date().isoformat()
+    )
+    if aggregate:
+        aggregations = AggregationFabricator().create_stats_aggregations(
+            start_date=arrow.get(start_date).naive,
+            end_date=arrow.get(end_date).naive,
+            bookmark_override=arrow.get(start_date).naive,
+            eager=True,
+        )
+        app.logger.debug("    created usage aggregations...")
+        app.logger.debug(pformat(aggregations))
+    else:
+        app.logger.warning(
+            "    Skipping usage stats aggregation. Usage stats "
+            "for the imported records will not be visible "
+            "until an aggregation is performed."
+        )
+
+    # Report
+    if verbose and (
+        tracker.repaired_failed
+        or (
+            tracker.existing_failed_records
+            and not tracker.residual_failed_records
+        )
+    ):
+        app.logger.info("Previously failed records repaired:")
+        for r in tracker.repaired_failed:
+            print(r)
+            app.logger.info(r)
+
+    # Report and log failed records
+    if tracker.failed_records:
+        if verbose:
+            app.logger.info("Failed records:")
+            for r in tracker.failed_records:
+                app.logger.info(r)
+        app.logger.info(
+            "Failed records written to"
+            f" {app.config['RECORD_IMPORTER_FAILED_LOG_PATH']}"
+        )
+
+    return message
 
 
 def load_records_into_invenio(
@@ -1121,15 +2268,25 @@ def load_records_into_invenio(
     clean_filenames: bool = False,
     verbose: bool = False,
     stop_on_error: bool = False,
+    workers: int = 1,
+    use_celery: bool = False,
+    force: bool = False,
+    defer_indexing: bool = False,
 ) -> None:
     """
     Create new InvenioRDM records and upload files for serialized deposits.
 
+    Records whose import payload (serialized metadata, files, and
+    overrides) is unchanged since their last successful import are not
+    loaded again, unless `force` is True. They are counted as
+    "unchanged_existing" without any calls to Invenio.
+
     params:
         start_index (int): the starting index of the records to load in the
             source jsonl file
         stop_index (int): the stopping index of the records to load in the
-            source jsonl file (inclusive)
+            source jsonl file (inclusive). If -1, all records from the
+            start index to the end of the file are loaded.
         nonconsecutive (list): a list of nonconsecutive indices to load in the
             source jsonl file
         no_updates (bool): whether to update existing records
@@ -1148,35 +2305,35 @@ def load_records_into_invenio(
             loading process
         stop_on_error (bool): whether to stop the loading process if an error
             is encountered
+        workers (int): the number of worker processes to use. If greater
+            than 1, the records are partitioned across a pool of processes,
+            each with its own application context and database session.
+        use_celery (bool): whether to queue the records as Celery tasks
+            (in chunks of RECORD_IMPORTER_LOAD_CHUNK_SIZE records) instead
+            of loading them in this process. This process waits for the
+            tasks and logs their outcomes, so the logs and the ledger are
+            only written on this host.
+        force (bool): whether to load records even if their payload is
+            unchanged since their last successful import
+        defer_indexing (bool): whether to skip indexing the records after
+            each operation, and instead queue each changed record for bulk
+            indexing once (see `DeferredIndexing`). The records are queued
+            every RECORD_IMPORTER_REINDEX_BATCH_SIZE records and at the end
+            of the run. Cannot be combined with `workers` or `use_celery`,
+            since records that share a DOI could then be loaded in
+            different processes, which cannot find each other's unindexed
+            records.
 
     returns:
         None
     """
-    record_counter = 0
-    failed_records = []
-    created_records = []
-    skipped_records = []
-    successful_records = 0
-    updated_drafts = 0
-    updated_published = 0
-    unchanged_existing = 0
-    new_records = 0
-    repaired_failed = []
-    range_args = [start_index - 1]
-    if stop_index > -1 and stop_index >= start_index:
-        range_args.append(stop_index)
-    else:
-        range_args.append(start_index)
-
-    metadata_overrides_folder = Path(
-        app.config["RECORD_IMPORTER_OVERRIDES_FOLDER"]
-    )
-
-    created_log_path = Path(
-        app.config.get(
-            "RECORD_IMPORTER_CREATED_LOG_PATH",
-            "record_importer_created_records.jsonl",
+    if defer_indexing and (use_celery or workers > 1):
+        raise ValueError(
+            "Indexing cannot be deferred when loading with several workers "
+            "or with Celery."
         )
+    overrides_index = OverridesIndex(
+        Path(app.config["RECORD_IMPORTER_OVERRIDES_FOLDER"])
     )
 
     # sanitize the names of files before upload to avoid
@@ -1185,370 +2342,199 @@ def load_records_into_invenio(
         app.logger.info("Sanitizing file names...")
         sanitize_filenames(app.config["RECORD_IMPORTER_FILES_LOCATION"])
 
-    # Load list of previously created records
-    created_records = []
+    # Load lists of created and failed records from prior runs
+    tracker = LoadResultsTracker()
     try:
-        with jsonlines.open(
-            created_log_path,
-            "r",
-        ) as reader:
-            created_records = [obj for obj in reader]
-    except FileNotFoundError:
-        app.logger.info("**no existing created records log file found...**")
-
-    # Load list of failed records from prior runs
-    (
-        existing_failed_records,
-        residual_failed_records,
-        existing_failed_indices,
-        existing_failed_hcids,
-    ) = _load_prior_failed_records()
-
-    app.logger.info("Starting to load records into Invenio...")
-    if no_updates:
-        app.logger.info(
-            "    **no-updates flag is set, so skipping updating existing"
-            " records...**"
-        )
-    if not nonconsecutive:
-        stop_string = "" if stop_index == -1 else f" to {stop_index}"
-        app.logger.info(
-            f"Loading records from {str(start_index) + stop_string}..."
-        )
-    else:
-        id_type = (
-            "source record id" if use_sourceids else "index in import file"
-        )
-        app.logger.info(
-            f"Loading records {' '.join([str(s) for s in nonconsecutive])} "
-            f"(by {id_type})..."
-        )
-
-    app.logger.info(
-        f"Loading records from serialized data: "
-        f"{app.config.get('RECORD_IMPORTER_SERIALIZED_PATH')}..."
-    )
-    with jsonlines.open(
-        Path(app.config.get("RECORD_IMPORTER_SERIALIZED_PATH")), "r"
-    ) as json_source:
-        # decide how to determine the record set
-        if retry_failed:
-            if no_updates:
-                print("Cannot retry failed records with no-updates flag set.")
-                app.logger.error(
-                    "Cannot retry failed records with no-updates flag set."
-                )
-                return
-            if not existing_failed_records:
-                print("No previously failed records to retry.")
-                app.logger.info("No previously failed records to retry.")
-                return
-            line_num = 1
-            record_set = []
-            for j in json_source:
-                if line_num in existing_failed_indices:
-                    j["jsonl_index"] = line_num
-                    record_set.append(j)
-                line_num += 1
-        elif nonconsecutive:
-            record_set = []
-            if use_sourceids:
-                for j in json_source:
-                    if [
-                        i["identifier"]
-                        for i in j["metadata"]["identifiers"]
-                        if i["identifier"] in nonconsecutive
-                        and i["scheme"] == sourceid_scheme
-                    ]:
-                        record_set.append(j)
-            else:
-                line_num = 1
-                for j in json_source:
-                    if line_num in nonconsecutive:
-                        j["jsonl_index"] = line_num
-                        record_set.append(j)
-                    line_num += 1
-        else:
-            record_set = list(itertools.islice(json_source, *range_args))
-
-        if len(record_set) == 0:
-            print("No records found to load.")
-            app.logger.info("No records found to load.")
-            return
-
-        for rec in record_set:
-            record_source = rec.pop("record_source")
-            # get metadata overrides for the record (for manual fixing
-            # of inport data after serialization)
-            overrides = {}
-            skip = False  # allow skipping records in the source file
-            with jsonlines.open(
-                metadata_overrides_folder
-                / f"record-importer-overrides_{record_source}.jsonl",
-                "r",
-            ) as override_reader:
-                for o in override_reader:
-                    if o["source_id"] in [
-                        i["identifier"]
-                        for i in rec["metadata"]["identifiers"]
-                        if i["scheme"] == "hclegacy-pid"
-                    ]:
-                        overrides = o.get("overrides")
-                        skip = (
-                            True
-                            if o.get("skip") in [True, "True", "true", 1, "1"]
-                            else False
-                        )
-            if "jsonl_index" in rec.keys():
-                current_record = rec["jsonl_index"]
-            else:
-                current_record = start_index + record_counter
-            rec_doi = (
-                rec["pids"]["doi"]["identifier"]
-                if "pids" in rec.keys()
-                else ""
+        app.logger.info("Starting to load records into Invenio...")
+        if no_updates:
+            app.logger.info(
+                "    **no-updates flag is set, so skipping updating existing"
+                " records...**"
             )
-            rec_hcid = [
-                r
-                for r in rec["metadata"]["identifiers"]
-                if r["scheme"] == "hclegacy-pid"
-            ][0]["identifier"]
-            rec_recid = [
-                r
-                for r in rec["metadata"]["identifiers"]
-                if r["scheme"] == "hclegacy-record-id"
-            ][0]["identifier"]
-            rec_invenioid = None
-            app.logger.info(f"....starting to load record {current_record}")
+        if defer_indexing:
             app.logger.info(
-                f"    DOI:{rec_doi} {rec_invenioid} {rec_hcid} {rec_recid}"
-                f"{record_source}"
+                "    **defer-indexing flag is set, so queueing the loaded"
+                " records for bulk indexing instead of indexing each"
+                " change...**"
             )
-            spinner = Halo(
-                text=f"    Loading record {current_record}", spinner="dots"
+        if not nonconsecutive:
+            stop_string = "" if stop_index == -1 else f" to {stop_index}"
+            app.logger.info(
+                f"Loading records from {str(start_index) + stop_string}..."
             )
-            spinner.start()
-            rec_log_object = {
-                "index": current_record,
-                "invenio_recid": rec_invenioid,
-                "invenio_id": rec_doi,
-                "commons_id": rec_hcid,
-                "core_record_id": rec_recid,
-            }
-            try:
-                result = {}
-                # FIXME: This is a hack to handle StaleDataError which
-                # is consistently resolved on a second attempt -- seems
-                # to arise when a record is being added to several
-                # communities at once
-                if skip:
-                    skipped_records.append(rec_log_object)
-                    raise SkipRecord(
-                        "Record marked for skipping in override file"
-                    )
-                try:
-                    result = import_record_to_invenio(
-                        rec, no_updates, record_source, overrides
+        else:
+            id_type = (
+                "source record id" if use_sourceids else "index in import file"
+            )
+            app.logger.info(
+                "Loading records "
+                f"{' '.join([str(s) for s in nonconsecutive])} "
+                f"(by {id_type})..."
+            )
+
+        app.logger.info(
+            f"Loading records from serialized data: "
+            f"{app.config.get('RECORD_IMPORTER_SERIALIZED_PATH')}..."
+        )
+        serialized_path = Path(
+            app.config.get("RECORD_IMPORTER_SERIALIZED_PATH")
+        )
+        record_index = SerializedRecordIndex(serialized_path)
+        with jsonlines.open(serialized_path, "r") as json_source:
+            # decide how to determine the record set
+            if retry_failed:
+                if no_updates:
+                    print(
+                        "Cannot retry failed records with no-updates flag set."
                     )
-                except StaleDataError:
-                    result = import_record_to_invenio(
-                        rec, no_updates, record_source, overrides
+                    app.logger.error(
+                        "Cannot retry failed records with no-updates flag set."
                     )
-                created_records = _log_created_record(
-                    index=current_record,
-                    invenio_id=rec_doi,
-                    invenio_recid=result.get("metadata_record_created")
-                    .get("record_data")
-                    .get("id"),
-                    commons_id=rec_hcid,
-                    core_record_id=rec_recid,
-                    created_records=created_records,
+                    return
+                if not tracker.existing_failed_records:
+                    print("No previously failed records to retry.")
+                    app.logger.info("No previously failed records to retry.")
+                    return
+                record_set = _iter_indexed_records(
+                    record_index, sorted(tracker.existing_failed_indices)
                 )
-                successful_records += 1
-                if not result.get("existing_record"):
-                    new_records += 1
-                if "unchanged_existing" in result["status"]:
-                    unchanged_existing += 1
-                if result["status"] == "updated_published":
-                    updated_published += 1
-                if result["status"] == "updated_draft":
-                    updated_drafts += 1
-                if rec_hcid in existing_failed_hcids:
-                    app.logger.info("    repaired previously failed record...")
-                    app.logger.info(f"    {rec_doi} {rec_hcid} {rec_recid}")
-                    residual_failed_records = [
-                        d
-                        for d in residual_failed_records
-                        if d["commons_id"] != rec_hcid
-                    ]
-                    repaired_failed.append(rec_log_object)
-                    failed_records, residual_failed_records = (
-                        _log_failed_record(
-                            failed_records=failed_records,
-                            residual_failed_records=residual_failed_records,
-                            skipped_records=skipped_records,
-                        )
-                    )
-                app.logger.debug("result status: %s", result.get("status"))
-            except Exception as e:
-                print("ERROR:", e)
-                print_exc()
-                app.logger.error(f"ERROR: {e}")
-                msg = str(e)
-                try:
-                    msg = e.messages
-                except AttributeError:
-                    try:
-                        msg = e.messages
-                    except AttributeError:
-                        pass
-                error_reasons = {
-                    "CommonsGroupNotFoundError": msg,
-                    "CommonsGroupServiceError": msg,
-                    "DraftDeletionFailedError": msg,
-                    "ExistingRecordNotUpdatedError": msg,
-                    "FileKeyNotFoundError": msg,
-                    "FailedCreatingUsageEventsError": msg,
-                    "FileUploadError": msg,
-                    "UploadFileNotFoundError": msg,
-                    "InvalidKeyError": msg,
-                    "MissingNewUserEmailError": msg,
-                    "MissingParentMetadataError": msg,
-                    "MultipleActiveCollectionsError": msg,
-                    "PublicationValidationError": msg,
-                    "RestrictedRecordPublicationError": msg,
-                    "StaleDataError": msg,
-                    "TooManyViewEventsError": msg,
-                    "TooManyDownloadEventsError": msg,
-                    "UpdateValidationError": msg,
-                }
-                log_object = {
-                    "index": current_record,
-                    "invenio_id": rec_doi,
-                    "commons_id": rec_hcid,
-                    "core_record_id": rec_recid,
-                    "failed_records": failed_records,
-                    "residual_failed_records": residual_failed_records,
-                }
-                if e.__class__.__name__ in error_reasons.keys():
-                    log_object.update(
-                        {"reason": error_reasons[e.__class__.__name__]}
+            elif nonconsecutive:
+                if not use_sourceids:
+                    record_set = _iter_indexed_records(
+                        record_index, sorted(set(nonconsecutive))
                     )
-                if e.__class__.__name__ != "SkipRecord":
-                    failed_records, residual_failed_records = (
-                        _log_failed_record(
-                            **log_object, skipped_records=skipped_records
+                elif sourceid_scheme == "hclegacy-pid":
+                    line_nums = []
+                    for source_id in nonconsecutive:
+                        line_num = record_index.position_for(
+                            sourceid_scheme, source_id
                         )
+                        if line_num is None:
+                            app.logger.warning(
+                                "    no serialized record found for "
+                                f"{source_id}"
+                            )
+                        else:
+                            line_nums.append(line_num)
+                    record_set = _iter_indexed_records(
+                        record_index, sorted(set(line_nums))
                     )
-                if stop_on_error and failed_records:
-                    break
-
-            spinner.stop()
-            app.logger.info(f"....done with record {current_record}")
-            record_counter += 1
+                else:
+                    record_set = _iter_selected_records(
+                        json_source,
+                        source_ids=nonconsecutive,
+                        sourceid_scheme=sourceid_scheme,
+                    )
+            else:
+                record_set = _iter_selected_records(
+                    json_source, start_index=start_index, stop_index=stop_index
+                )
 
-    print("Finished!")
-    app.logger.info("All done loading records into InvenioRDM")
-    set_string = ""
-    if nonconsecutive:
-        set_string = f"{' '.join([str(n) for n in nonconsecutive])}"
-    else:
-        target_string = (
-            f" to {start_index + record_counter - 1}"
-            if record_counter > 1
-            else ""
-        )
-        set_string = f"{start_index}{target_string}"
-    message = (
-        f"Processed {str(record_counter)} records in InvenioRDM ({set_string})"
-        f" \n    {str(successful_records)} successful \n   "
-        f" {str(new_records)} new records created \n   "
-        f" {str(successful_records - new_records)} already existed \n       "
-        f" {str(updated_published)} updated published records \n       "
-        f" {str(updated_drafts)} updated existing draft records \n       "
-        f" {str(unchanged_existing)} unchanged existing records \n       "
-        f" {str(len(repaired_failed))} previously failed records repaired \n "
-        f"   {str(len(failed_records))} failed \n"
-        f"   {str(len(skipped_records))} records skipped (marked in overrides)"
-        f"\n   "
-    )
-    app.logger.info(message)
+            # check for an empty selection without reading past the first
+            # record
+            first_record = next(record_set, None)
+            if first_record is None:
+                print("No records found to load.")
+                app.logger.info("No records found to load.")
+                return
+            record_set = itertools.chain([first_record], record_set)
 
-    # Aggregate the stats again now
-    start_date = (
-        start_date
-        if start_date
-        else arrow.utcnow().shift(days=-1).naive.date().isoformat()
-    )
-    end_date = (
-        end_date
-        if end_date
-        else arrow.utcnow().shift(days=1).naive.date().isoformat()
-    )
-    if aggregate:
-        aggregations = AggregationFabricator().create_stats_aggregations(
-            start_date=arrow.get(start_date).naive,
-            end_date=arrow.get(end_date).naive,
-            bookmark_override=arrow.get(start_date).naive,
-            eager=True,
-        )
-        app.logger.debug("    created usage aggregations...")
-        app.logger.debug(pformat(aggregations))
-    else:
-        app.logger.warning(
-            "    Skipping usage stats aggregation. Usage stats "
-            "for the imported records will not be visible "
-            "until an aggregation is performed."
-        )
+            # find (or, before loading in parallel, create) the domain
+            # communities once rather than once per record
+            CommunitiesHelper.warm_community_cache(
+                create_missing=use_celery or workers > 1
+            )
 
-    # Report
-    if verbose and (
-        repaired_failed
-        or (existing_failed_records and not residual_failed_records)
-    ):
-        app.logger.info("Previously failed records repaired:")
-        for r in repaired_failed:
-            print(r)
-            app.logger.info(r)
+            load_tasks = _iter_load_tasks(
+                record_set, start_index, overrides_index
+            )
+            if not force:
+                load_tasks = _skip_unchanged_records(load_tasks, tracker)
+            if use_celery:
+                if stop_on_error:
+                    app.logger.warning(
+                        "    --stop-on-error is ignored when loading with "
+                        "Celery"
+                    )
+                _load_records_with_celery(
+                    load_tasks,
+                    tracker,
+                    no_updates=no_updates,
+                    defer_indexing=defer_indexing,
+                )
+            elif workers > 1:
+                app.logger.info(f"Loading records with {workers} workers...")
+                _load_records_in_pool(
+                    load_tasks,
+                    tracker,
+                    workers,
+                    no_updates=no_updates,
+                    stop_on_error=stop_on_error,
+                    defer_indexing=defer_indexing,
+                )
+            else:
+                _load_records_in_batches(
+                    load_tasks,
+                    tracker,
+                    no_updates,
+                    stop_on_error,
+                    defer_indexing,
+                )
 
-    # Report and log failed records
-    if failed_records:
-        if verbose:
-            app.logger.info("Failed records:")
-            for r in failed_records:
-                app.logger.info(r)
-        app.logger.info(
-            "Failed records written to"
-            f" {app.config['RECORD_IMPORTER_FAILED_LOG_PATH']}"
+        print("Finished!")
+        _finish_loading_run(
+            tracker,
+            start_index=start_index,
+            nonconsecutive=nonconsecutive,
+            aggregate=aggregate,
+            start_date=start_date,
+            end_date=end_date,
+            verbose=verbose,
         )
+    finally:
+        tracker.close()
 
 
 def delete_records_from_invenio(record_ids):
     """
     Delete the selected records from the invenioRDM instance.
+
+    The deleted records are also removed from the loader's created records
+    log, so that they are loaded again (rather than skipped as unchanged)
+    the next time they are selected for loading.
     """
     deleted_records = {}
-    for record_id in record_ids:
-        admin_email = app.config["RECORD_IMPORTER_ADMIN_EMAIL"]
-        admin_identity = get_identity(
-            current_accounts.datastore.get_user(admin_email)
-        )
-        service = current_rdm_records.records_service
-        record = service.read(id_=record_id, identity=system_identity)._record
-        siblings = RDMRecord.get_records_by_parent(record.parent)
-        # remove the 0th (latest) version to leave the previous version(s):
-        siblings.pop(0)
-        # already deleted previous versions will have nothing for metadata
-        # (sibling.get('id') will return nothing)
-        has_versions = any([sibling.get("id") for sibling in siblings])
-
-        if record.versions.is_latest and has_versions:
-            raise Exception(
-                "Cannot delete the latest version without first deleting "
-                "previous versions"
+    try:
+        for record_id in record_ids:
+            admin_email = app.config["RECORD_IMPORTER_ADMIN_EMAIL"]
+            admin_identity = get_identity(
+                current_accounts.datastore.get_user(admin_email)
             )
+            service = current_rdm_records.records_service
+            record = service.read(
+                id_=record_id, identity=system_identity
+            )._record
+            siblings = RDMRecord.get_records_by_parent(record.parent)
+            # remove the 0th (latest) version to leave the previous
+            # version(s):
+            siblings.pop(0)
+            # already deleted previous versions will have nothing for
+            # metadata (sibling.get('id') will return nothing)
+            has_versions = any([sibling.get("id") for sibling in siblings])
+
+            if record.versions.is_latest and has_versions:
+                raise Exception(
+                    "Cannot delete the latest version without first deleting "
+                    "previous versions"
+                )
 
-        deleted = service.delete(id_=record_id, identity=admin_identity)
-        deleted_records[record_id] = deleted
+            deleted = service.delete(id_=record_id, identity=admin_identity)
+            deleted_records[record_id] = deleted
+    finally:
+        if deleted_records:
+            ledger = ImportLedger()
+            for record_id in deleted_records.keys():
+                ledger.remove_created(invenio_recid=record_id)
+            ledger.close()
 
     return deleted_records
@@ -16,28 +16,42 @@ one json object per line, separated by newlines.
 """
 
 import arrow
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 from datetime import datetime
+import functools
 from flask import current_app as app
-from idutils import (
-    is_doi,
-    is_url,
-    normalize_pid,
-    normalize_doi,
-    detect_identifier_schemes,
-)
 from isbnlib import get_isbnlike
-import iso639
+import itertools
 import json
 import jsonlines
-from langdetect import detect_langs
+import multiprocessing
+import os
 from pathlib import Path
 from stdnum import issn
 from titlecase import titlecase
 import re
+import time
+from typing import Optional, Union
 
 from invenio_record_importer_kcworks.libs.date_parser import DateParser
+from invenio_record_importer_kcworks.services.identifier_classifier import (
+    IdentifierClassifier,
+)
+from invenio_record_importer_kcworks.services.language_cache import (
+    LanguageDetectionCache,
+)
+from invenio_record_importer_kcworks.services.record_index import (
+    RawRecordIndex,
+    SerializedRecordIndex,
+)
+from invenio_record_importer_kcworks.services.row_hashes import RowHashStore
+from invenio_record_importer_kcworks.services.subject_vocabulary import (
+    SubjectVocabulary,
+)
 from invenio_record_importer_kcworks.utils.utils import (
+    init_worker_app_context,
     valid_date,
     valid_isbn,
     normalize_string_lowercase,
@@ -652,77 +666,29 @@ def _add_author_data(
     return newrec, bad_data_dict
 
 
+_subject_vocabulary = None
+
+
+def _get_subject_vocabulary() -> SubjectVocabulary:
+    """Return the subject vocabulary index, building it on first use.
+
+    The index holds the built-in FAST headings, plus the headings from the
+    RECORD_IMPORTER_SUBJECTS_VOCABULARY_PATH file if one is configured.
+    """
+    global _subject_vocabulary
+    if _subject_vocabulary is None:
+        _subject_vocabulary = SubjectVocabulary()
+        vocab_path = app.config.get("RECORD_IMPORTER_SUBJECTS_VOCABULARY_PATH")
+        if vocab_path:
+            _subject_vocabulary.load_file(vocab_path)
+    return _subject_vocabulary
+
+
 def _get_subject_from_jsonl(subject: str) -> str:
     """
     Retrieve the full subject string corresponding to the provided label
     """
-    # FIXME: Finish finding id numbers
-    existing_subjects = {
-        "Linguistics": "999202",
-        "Digital humanities": "963599",
-        "Arabic language": "812287",
-        "Spanish language": "1128292",
-        "American literature": "807113",
-        "English literature": "911989",
-        "Poetics": "1067682",
-        "Comparative literature": "1734553",
-        "Literature and science": "1000093",
-        "German language": "941408",
-        "Philosophy": "1060777",
-        "Ethics": "915833",
-        "Religion": "1093763",
-        "Rhetoric": "1096948",
-        "Portuguese literature": "1072577",
-        "Biopolitics": "832668",
-        "Irish literature": "979030",
-        "Literature": "999953",
-        "Church history": "860740",
-        "British literature": "839082",
-        "Animal rights": "809364",
-        "Art criticism": "815492",
-        "Sculpture": "1109483",
-        "Research libraries": "1095327",
-        "Writing": "1181638",
-        "Anthropology": "810196",
-        "Environmental sociology": "1749638",
-        "Ethnomusicology": "916186",
-        "Film criticism": "924259",
-        "Continental philosophy": "1765182",
-        "Critical geography": "2031407",
-        "Earth sciences": "900729",
-        # 'Arts': '',
-        "Geography": "940469",
-        "History": "1411628",
-        "Greek literature": "947441",
-        "Jewish literature": "982834",
-        "Spanish literature": "1128568",
-        # "Ethnic studies": "",
-        "Library science": "997916",
-        "Music": "1030269",
-        "Psychiatry": "1081152",
-        "Aesthetics": "798702",
-        "Ecocriticism": "901428",
-        "Economics": "902116",
-        "Intertextuality": "977562",
-        "American poetry": "807348",
-        "Beat literature": "2002327",
-        "Dutch literature": "899846",
-        "Italian literature": "980660",
-        "Feminism": "922671",
-        "Music libraries": "1030573",
-        "Musicology": "1030893",
-        "Character": "852264",
-        "Sustainability": "1747391",
-        "Cognitive science": "866547",
-        "Polish language": "1068925",
-        "Postmodernism": "1073164",
-        "Neoliberalism": "1737382",
-        "Imperialism": "968126",
-    }
-    if subject in existing_subjects.keys():
-        return f"{existing_subjects[subject]}:{subject}:topical"
-    else:
-        return ""
+    return _get_subject_vocabulary().lookup(subject) or ""
 
 
 def add_chapter_label(
@@ -1068,6 +1034,17 @@ def add_notes(
     return newrec, bad_data_dict
 
 
+_identifier_classifier = None
+
+
+def _get_identifier_classifier() -> IdentifierClassifier:
+    """Return the identifier classifier for this process."""
+    global _identifier_classifier
+    if _identifier_classifier is None:
+        _identifier_classifier = IdentifierClassifier()
+    return _identifier_classifier
+
+
 def add_identifiers(
     newrec: dict, row: dict, bad_data_dict: dict
 ) -> tuple[dict, dict]:
@@ -1081,6 +1058,10 @@ def add_identifiers(
     Note that Invenio only allows one identifier per scheme, so multiple
     identifiers of the same type will be discarded.
 
+    Identifier schemes are detected (and identifiers normalized) through a
+    memoized IdentifierClassifier, so repeated strings are only classified
+    once per process.
+
     Args:
         newrec (_type_): The new record being prepared for serialization
         row (_type_): The CORE record being processed
@@ -1090,6 +1071,7 @@ def add_identifiers(
     Returns:
         dict: The new record dict with identifier info added
     """
+    classifier = _get_identifier_classifier()
     identifiers = {}
 
     ids = [
@@ -1102,25 +1084,23 @@ def add_identifiers(
         if i and not re.match(
             r"^(url|http|handle|doi)\:?$|^n/?a$", i, re.IGNORECASE
         ):
-            detected = detect_identifier_schemes(i)
-            if len(detected) < 1:
-                detected = detect_identifier_schemes(f"https://{i}")
-            if "doi" in detected and normalize_doi(i) != normalize_doi(
-                row["deposit_doi"]
+            detected = classifier.detect(i)
+            if "doi" in detected and classifier.normalize_doi(i) != (
+                classifier.normalize_doi(row["deposit_doi"])
             ):
                 identifiers.setdefault("doi", []).append(i)
             elif "isbn" in detected:
                 identifiers.setdefault("isbn", []).append(i)
             elif "issn" in detected:
                 identifiers.setdefault("issn", []).append(i)
-            elif "url" in detected and is_url(i):
+            elif "url" in detected and classifier.is_url(i):
                 identifiers.setdefault("url", []).append(i)
             elif re.match(r"^hc:\d+$", i):
                 identifiers.setdefault("hc", []).append(i)
             elif "handle" in detected and i == row["handle"]:
                 identifiers.setdefault("handle", []).append(i)
             else:
-                if i == normalize_doi(row["deposit_doi"]):
+                if i == classifier.normalize_doi(row["deposit_doi"]):
                     pass
                 else:
                     _append_bad_data(
@@ -1130,7 +1110,7 @@ def add_identifiers(
     # Identifiers
     # TODO: Is it right that these are all datacite dois?
     if row["deposit_doi"]:
-        if not is_doi(row["deposit_doi"]):
+        if not classifier.is_doi(row["deposit_doi"]):
             _append_bad_data(
                 row["id"],
                 ("invalid primary doi", row["deposit_doi"]),
@@ -1138,7 +1118,7 @@ def add_identifiers(
             )
         else:
             newrec.setdefault("pids", {})["doi"] = {
-                "identifier": normalize_doi(row["deposit_doi"]),
+                "identifier": classifier.normalize_doi(row["deposit_doi"]),
                 "provider": "datacite",
                 "client": "datacite",
             }
@@ -1153,7 +1133,7 @@ def add_identifiers(
             scheme = "doi" if idx == 0 else "alternate-doi"
             newrec["metadata"].setdefault("identifiers", []).append(
                 {
-                    "identifier": normalize_doi(d),
+                    "identifier": classifier.normalize_doi(d),
                     "scheme": scheme,
                 }
             )
@@ -1170,7 +1150,7 @@ def add_identifiers(
         if u and not url_found:
             newrec["metadata"].setdefault("identifiers", []).append(
                 {
-                    "identifier": normalize_pid(u, "url"),
+                    "identifier": classifier.normalize_pid(u, "url"),
                     "scheme": "url",
                 }
             )
@@ -1186,7 +1166,7 @@ def add_identifiers(
         if h and not handle_found:
             newrec["metadata"].setdefault("identifiers", []).append(
                 {
-                    "identifier": normalize_pid(h, "handle"),
+                    "identifier": classifier.normalize_pid(h, "handle"),
                     "scheme": "handle",
                 }
             )
@@ -1208,7 +1188,7 @@ def add_identifiers(
         if isbn and not isbn_found:
             newrec["metadata"].setdefault("identifiers", []).append(
                 {
-                    "identifier": normalize_pid(isbn, "isbn"),
+                    "identifier": classifier.normalize_pid(isbn, "isbn"),
                     "scheme": "isbn",
                 }
             )
@@ -1223,7 +1203,7 @@ def add_identifiers(
         if isn and not issn_found:
             newrec["metadata"].setdefault("identifiers", []).append(
                 {
-                    "identifier": normalize_pid(isn, "issn"),
+                    "identifier": classifier.normalize_pid(isn, "issn"),
                     "scheme": "issn",
                 }
             )
@@ -1236,6 +1216,17 @@ def add_identifiers(
     return newrec, bad_data_dict
 
 
+_language_cache = None
+
+
+def _get_language_cache() -> LanguageDetectionCache:
+    """Return the language detection cache for this process."""
+    global _language_cache
+    if _language_cache is None:
+        _language_cache = LanguageDetectionCache()
+    return _language_cache
+
+
 def add_language_info(
     newrec: dict, row: dict, bad_data_dict: dict
 ) -> tuple[dict, dict]:
@@ -1244,6 +1235,8 @@ def add_language_info(
     Adds the language of the CORE record to the new record as a language
     identifier. If the CORE record does not have a language, the language is
     detected from the title and abstract fields using the langdetect library.
+    Detection results and language lookups are cached on disk (see
+    LanguageDetectionCache), so unchanged texts are only detected once.
 
     Args:
         newrec (_type_): The new record being prepared for serialization
@@ -1262,7 +1255,7 @@ def add_language_info(
             row["language"] = "Greek, Modern (1453-)"
         if row["language"] == "Swahili":
             row["language"] = "Swahili (macrolanguage)"
-        mylang = iso639.Language.from_name(row["language"])
+        mylang = _get_language_cache().language_from_name(row["language"])
         newrec["metadata"]["languages"] = [
             {"id": mylang.part3, "title": {"en": mylang.name}}
         ]
@@ -1373,19 +1366,14 @@ def add_language_info(
             "hc:41659",
             "",
         ]
+        language_cache = _get_language_cache()
         lang1, lang2 = [], []
         if row["title"]:
             t = titlecase(row["title"])
-            lang1 = [
-                {"code": lang.lang, "prob": lang.prob}
-                for lang in detect_langs(t)
-            ]
+            lang1 = language_cache.detect(t)
         if row["abstract"]:
             try:
-                lang2 = [
-                    {"code": lang.lang, "prob": lang.prob}
-                    for lang in detect_langs(row["abstract"])
-                ]
+                lang2 = language_cache.detect(row["abstract"])
             except Exception:
                 pass
                 # print('language exception with abstract!!!!')
@@ -1396,7 +1384,7 @@ def add_language_info(
                 {"id": "eng", "title": {"en": "English"}}
             ]
         elif lang1[0]["prob"] > 0.99 and row["id"] not in exceptions:
-            mylang = iso639.Language.from_part1(lang1[0]["code"])
+            mylang = language_cache.language_from_part1(lang1[0]["code"])
             newrec["metadata"]["languages"] = [{"id": mylang.part3}]
         elif (
             lang1[0]["prob"] < 0.9
@@ -1404,7 +1392,7 @@ def add_language_info(
             and lang2[0]["prob"] >= 0.9
             and row["id"] not in exceptions
         ):
-            mylang = iso639.Language.from_part1(lang2[0]["code"])
+            mylang = language_cache.language_from_part1(lang2[0]["code"])
             newrec["metadata"]["languages"] = [{"id": mylang.part3}]
         elif row["id"] in exceptions:
             pass
@@ -1444,8 +1432,32 @@ def add_edition_info(
     return newrec, bad_data_dict
 
 
+def _publication_date(row: dict) -> Optional[str]:
+    """Return a row's `date` if it should be added as an issued date."""
+    if row["date_issued"] != row["date"] and row["date"] not in ["", " "]:
+        return row["date"].split("T")[0]
+    return None
+
+
+def prepare_date_info(rows: list[dict]) -> dict:
+    """Repair the publication dates for a chunk of rows in one batch.
+
+    Args:
+        rows (list[dict]): The CORE records about to be processed
+
+    Returns:
+        dict: The keyword arguments for `add_date_info` for each row in the
+            chunk (the repaired dates keyed by original date string)
+    """
+    dates = [d for d in map(_publication_date, rows) if d]
+    return {"repaired_dates": dict(zip(dates, DateParser.repair_dates(dates)))}
+
+
 def add_date_info(
-    newrec: dict, row: dict, bad_data_dict: dict
+    newrec: dict,
+    row: dict,
+    bad_data_dict: dict,
+    repaired_dates: Optional[dict] = None,
 ) -> tuple[dict, dict]:
     """Add date information to the new record.
 
@@ -1465,6 +1477,9 @@ def add_date_info(
         row (_type_): The CORE record being processed
         bad_data_dict (_type_): A dictionary of error messages recording
                                 problems with the data in the CORE record
+        repaired_dates (dict, optional): Dates already repaired for a whole
+            chunk of rows by `prepare_date_info`, keyed by the original
+            date string
 
     Returns:
         dict: The new record dict with date info added
@@ -1472,18 +1487,18 @@ def add_date_info(
 
     # FIXME: does "issued" work here?
     newrec["metadata"]["publication_date"] = row["date_issued"].split("T")[0]
-    if row["date_issued"] != row["date"] and row["date"] not in ["", " "]:
-        row["date"] = row["date"].split("T")[0]
+    publication_date = _publication_date(row)
+    if publication_date:
+        row["date"] = publication_date
         date_description = "Publication date"
         date_to_insert = row["date"]
         if not valid_date(date_to_insert):
-            invalid, date_to_insert = DateParser.repair_date(
-                date_to_insert, id=row["id"]
-            )
-            if invalid:
-                invalid, date_to_insert = DateParser.repair_range(
-                    date_to_insert, id=row["id"]
-                )
+            if repaired_dates and date_to_insert in repaired_dates:
+                invalid, date_to_insert = repaired_dates[date_to_insert]
+            else:
+                invalid, date_to_insert = DateParser.repair_dates(
+                    [date_to_insert]
+                )[0]
             # FIXME: Allow forthcoming?
             if invalid:
                 _append_bad_data(
@@ -2108,185 +2123,17 @@ def add_subjects_keywords(
             newrec["custom_fields"]["kcr:user_defined_tags"] = keywords
 
     if row["subject"]:
-        missing_subjects = [
-            "17th century",
-            "19th-century German literature",
-            "20th century",
-            "Accelerationism",
-            "African American culture",
-            "African American studies",
-            "African studies",
-            "American art",
-            "American studies",
-            "Ancient Greece",
-            "Ancient history",
-            "Ancient literature",
-            "Ancient Mediterranean religions",
-            "Archival studies",
-            "Arts",
-            "Asian history",
-            "Asian-American studies",
-            "Behavioral anthropology",
-            "Biblical studies",
-            "Bibliography",
-            "Biography",
-            "Classical studies",
-            "Coming-of-age literature",
-            "Comparative religious ethics",
-            "Contemporary art",
-            "Criticism of the arts",
-            "Cultural anthropology",
-            "Data sharing",
-            "Early Christianity",
-            "Education",
-            "English",
-            "European history",
-            "Film studies",
-            "Hebrew bible",
-            "Immigration history",
-            "Late Antiquity",
-            "Literary criticism",
-            "Literature and economics",
-            "Literature and philosophy",
-            "Medieval studies",
-            "Migration studies",
-            "Modern history",
-            "Music analysis",
-            "Music composition",
-            "Music criticism",
-            "Music information retrieval",
-            "Native American literature",
-            "Pentateuchal studies",
-            "Poesia",
-            "Polish culture",
-            "Polish studies",
-            "Poetry",
-            "Postcolonial literature",
-            "Public humanities",
-            "Religions of late Antiquity",
-            "Romanticism",
-            "Scholarly communication",
-            "Sociology of development",
-            "Theory of the arts",
-            "Translation studies",
-            "Urban studies",
-        ]
-        bad_subjects = {
-            "1178850:Transnationalism:topical": (
-                "1154884:Transnationalism:topical"
-            ),
-            "815177:Art, American:topical": "815895:Art, American:topical",
-            "1205213:Cyprus:topical": "1205213:Cyprus:geographic",
-            "1240495:Asia:topical": "1240495:Asia:geographic",
-            "1205757:Civilization, Ancient:topical": (
-                "862946:Civilization, Ancient:topical"
-            ),
-            "1239509:Africa:topical": "1239509:Africa:geographic",
-            "29097:Dante Alighieri, 1265-1321:topical": (
-                "29097:Dante Alighieri, 1265-1321:personal"
-            ),
-            "1020301:Middles Ages:topical": "1020301:Middle Ages:topical",
-            "1204082:Japan:topical": "1204082:Japan:geographic",
-            "1204543:Australia:topical": "1204543:Australia:geographic",
-            "1208380:Greece:topical": "1208380:Greece:geographic",
-            "1242804:Scandinavia:topical": "1242804:Scandinavia:geographic",
-            "1411635:Criticism, interpretation, etc.:topical": (
-                "1411635:Criticism, interpretation, etc.:form"
-            ),
-            "21st-century American literature": (
-                "807113:American literature:topical"
-            ),
-            "863509:Classsical literature:topical": (
-                "863509:Classical literature:topical"
-            ),
-            "Academic librarianship": "794993:Academic librarians:topical",
-            "Ancient law": "993683:Law--Antiquities:topical",
-            "Apostle Paul": "288253:St. Paul:personal",
-            "Art history": "815264:Art--History:topical",
-            "Australasian/Pacific literature": (
-                "821406:Australasian literature:topical"
-            ),
-            "Aesthetic theory": "798702:Aesthetics:topical",
-            "Book history": "836420:Books--History:topical",
-            "Central Europe": "1244544:Central Europe:geographic",
-            "Comics": "1921613:Comics (Graphic works):form",
-            "Contemporary history": (
-                "1865054:History of contemporary events:topical"
-            ),
-            "Cultural history": "885069:Culture--History:topical",
-            "Cultural studies": "885059:Culture:topical",
-            "Digital communication": "893634:Digital communications:topical",
-            "Epicurus": "44478:Epicurus:personal",
-            "Epigraphy": "973837:Inscriptions:topical",
-            "Ethnic studies": "916061:Ethnicity--Study and teaching:topical",
-            "Feminisms": "922671:Feminism:topical",
-            "Feminist art history": "922756:Feminist art criticism:topical",
-            "Gender studies": "939598:Gender identity--Research:topical",
-            "Gospels": "1766655:Bible stories, English--N.T. Gospels:topical",
-            "Graphic novels": "1726630:Graphic novels:form",
-            "Harlem Renaissance": "951467:Harlem Renaissance:topical",
-            "Historical musicology": "1030896:Musicology--History:topical",
-            "History of religions": "1093783:Religion--History:topical",
-            "History of the arts": "817758:Arts--History:topical",
-            "Holocaust studies": "958866:Jewish Holocaust (1939-1945):topical",
-            "Illuminated manuscripts": (
-                "967235:Illumination of books and manuscripts:topical"
-            ),
-            "India": "1210276:India:geographic",
-            "Interdisciplinary studies": (
-                "976131:Interdisciplinary research:topical"
-            ),
-            "Internet sociology": "1766793:Internet--Social aspects:topical",
-            "Jack Kerouac": "52352:Kerouac, Jack, 1922-1969:personal",
-            "James Joyce": "370728:Joyce, James:personal",
-            "Labor history": "989812:Labor--History:topical",
-            "Latin America": "1245945:Latin America:geographic",
-            "Latin American studies": "1245945:Latin America:geographic",
-            "Library and information science": "997916:Library science:topical",
-            "Literary theory": "1353577:Literature--Theory:topical",
-            "Literature and psychology": (
-                "1081551:Psychology and literature:topical"
-            ),
-            "Manuscript studies": "1008230:Manuscripts:topical",
-            "Medieval literature": "1000151:Literature, Medieval:topical",
-            "Music history": "1030330:Music--History:topical",
-            "Music performance": "1030398:Music--Performance:topical",
-            "Poetics and poetry": "1067682:Poetics:topical",
-            "Political philosophy": (
-                "1060799:Philosophy--Political aspects:topical"
-            ),
-            "Portuguese culture": (
-                "1072404:Portuguese--Ethnic identity:topical"
-            ),
-            "Religious studies": "1093763:Religion:topical",
-            "Shakespeare": "314312:Shakespeare, William, 1849-1931:personal",
-            "Social anthropology": (
-                "810233:Anthropology--Social aspects:topical"
-            ),
-            "Sociology of aging": "800348:Aging--Social aspects:topical",
-            "Sociology of agriculture": (
-                "801646:Agriculture--Social aspects:topical"
-            ),
-            "Sociology of culture": "885083:Culture--Social aspects:topical",
-            "Sociology of finance": (
-                "842573:Business enterprises--Finance--Social aspects:topical"
-            ),
-            "Stanley Cavell": "28565:Cavell, Stanley, 1926-2018:personal",
-            "Translation": "1154795:Translating and interpreting:topical",
-            "Translation of poetry": ("1067745:Poetry--Translating:topical"),
-            "Venezuela": "1204166:Venezuela:geographic",
-        }
+        subject_vocabulary = _get_subject_vocabulary()
         covered_subjects = []
         if isinstance(row["subject"], dict):
             row["subject"] = row["subject"].values()
         for s in list(set(row["subject"])):
-            if s in missing_subjects:
+            if subject_vocabulary.is_missing(s):
                 newrec["custom_fields"].setdefault(
                     "kcr:user_defined_tags", []
                 ).append(s)
             else:
-                if s in bad_subjects.keys():
-                    s = bad_subjects[s]
+                s = subject_vocabulary.correct(s)
                 # normalize inconsistent facet labels
                 pieces = list(filter(None, s.split(":")))
                 if len(pieces) < 3:
@@ -2408,159 +2255,685 @@ def add_file_info(
     return newrec, bad_data_dict
 
 
-def serialize_json() -> tuple[list[dict], dict]:
+BASE_RECORD: dict = {
+    "parent": {"access": {"owned_by": []}},
+    "custom_fields": {},
+    "metadata": {
+        "resource_type": {},
+        "title": "",
+        "creators": [],
+        "publication_date": [],
+        "identifiers": [],
+        "languages": [],
+        "rights": [],
+    },
+    "files": {"entries": []},
+}
+
+
+def add_legacy_usage_counts(
+    newrec: dict, row: dict, bad_data_dict: dict
+) -> tuple[dict, dict]:
     """
-    Parse and serialize csv data into Invenio JSON format.
+    Add the legacy view and download counts to the new record.
+
+    Args:
+        newrec (_type_): The new record being prepared for serialization
+        row (_type_): The CORE record being processed
+        bad_data_dict (_type_): A dictionary of error messages recording
+                                problems with the data in the CORE record
+
+    Returns:
+        tuple[dict, dict]: The new record dict with the usage counts added
+            and the bad data dictionary
     """
-    baserec: dict = {
-        "parent": {"access": {"owned_by": []}},
-        "custom_fields": {},
-        "metadata": {
-            "resource_type": {},
-            "title": "",
-            "creators": [],
-            "publication_date": [],
-            "identifiers": [],
-            "languages": [],
-            "rights": [],
-        },
-        "files": {"entries": []},
-    }
-
-    newrec_list: list[dict] = []
-    bad_data_dict: dict[str, list] = {}
-    line_count: int = 0
+    newrec["custom_fields"]["hclegacy:total_views"] = row["total_views"]
+    newrec["custom_fields"]["hclegacy:total_downloads"] = row[
+        "total_downloads"
+    ]
+    return newrec, bad_data_dict
 
-    with app.app_context():
-        with open(
-            Path(
-                app.config["RECORD_IMPORTER_DATA_DIR"],
-                "records-for-import.json",
+
+# Preparers for stages that can do their work for a whole chunk of rows at
+# once. Each preparer takes the chunk of rows and returns keyword arguments
+# that are passed to the stage for every row in the chunk.
+SERIALIZER_STAGE_PREPARERS: dict = {
+    "date_info": prepare_date_info,
+}
+
+# The caches used by the serializer stages. Each function returns (and
+# resets) the statistics gathered by one cache in the current process.
+SERIALIZER_CACHE_STATS: dict = {
+    "identifier_classifier": lambda: _get_identifier_classifier().pop_stats(),
+}
+
+# The named stages of the serializer pipeline, in their default order.
+# The stages to run (and their order) can be set with the
+# RECORD_IMPORTER_SERIALIZER_STAGES config variable.
+SERIALIZER_STAGES: dict = {
+    # commons info
+    "legacy_commons_info": add_legacy_commons_info,
+    "groups_info": add_groups_info,
+    "embargo_info": add_embargo_info,
+    # basic metadata
+    "titles": add_titles,
+    "descriptions": add_descriptions,
+    "notes": add_notes,
+    "resource_type": _add_resource_type,
+    "identifiers": add_identifiers,
+    "language_info": add_language_info,
+    "edition_info": add_edition_info,
+    "author_data": _add_author_data,
+    "date_info": add_date_info,
+    "subjects_keywords": add_subjects_keywords,
+    "rights_info": add_rights_info,
+    # Info for chapters and articles
+    "chapter_label": add_chapter_label,
+    "book_authors": add_book_authors,
+    "volume_info": add_volume_info,
+    "publication_details": add_publication_details,
+    "book_journal_title": add_book_journal_title,
+    "pages": add_pages,
+    "journal_info": add_journal_info,
+    # Info for dissertations and reports
+    "institution": add_institution,
+    # conference/meeting info
+    "meeting_info": add_meeting_info,
+    # Uploaded file details
+    "file_info": add_file_info,
+    "legacy_usage_counts": add_legacy_usage_counts,
+}
+
+
+class SerializerPipeline:
+    """
+    Ordered pipeline of named serializer stages with timing statistics.
+
+    Each stage is one of the `add_*` transformers registered in
+    SERIALIZER_STAGES. For each stage the pipeline records the number of
+    calls, the cumulative wall time, and the number of errors (bad data
+    entries recorded by the stage, plus any exceptions raised). It also
+    gathers the statistics of the caches in SERIALIZER_CACHE_STATS.
+    """
+
+    def __init__(self, stage_names: Optional[list[str]] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stage_names (list[str], optional): The names of the stages to
+                run, in order. Defaults to all of the stages in
+                SERIALIZER_STAGES in their default order.
+
+        Raises:
+            ValueError: If a stage name is not registered
+        """
+        if stage_names is None:
+            stage_names = list(SERIALIZER_STAGES.keys())
+        unknown = [n for n in stage_names if n not in SERIALIZER_STAGES]
+        if unknown:
+            raise ValueError(f"Unknown serializer stages: {unknown}")
+        self.stages = [(n, SERIALIZER_STAGES[n]) for n in stage_names]
+        self.stats = {
+            n: {"calls": 0, "seconds": 0.0, "errors": 0} for n in stage_names
+        }
+        self.cache_stats: dict = {}
+
+    @staticmethod
+    def _count_bad_data(bad_data_dict: dict) -> int:
+        return sum(len(v) for v in bad_data_dict.values())
+
+    def run(self, row: dict) -> tuple[dict, dict]:
+        """
+        Serialize one raw CORE deposit record in Invenio JSON format.
+
+        Args:
+            row (dict): The CORE record being processed
+
+        Returns:
+            tuple[dict, dict]: The serialized record and a dictionary of
+                error messages recording problems with the data in the CORE
+                record (keyed by the record's id)
+        """
+        return self._run_stages(row, self.stages)
+
+    def _run_stages(self, row: dict, stages: list) -> tuple[dict, dict]:
+        newrec = deepcopy(BASE_RECORD)
+        bad_data_dict: dict[str, list] = {}
+
+        for name, stage in stages:
+            stage_stats = self.stats[name]
+            bad_data_before = self._count_bad_data(bad_data_dict)
+            start = time.perf_counter()
+            try:
+                newrec, bad_data_dict = stage(newrec, row, bad_data_dict)
+            except Exception:
+                stage_stats["errors"] += 1
+                raise
+            finally:
+                stage_stats["seconds"] += time.perf_counter() - start
+                stage_stats["calls"] += 1
+            stage_stats["errors"] += (
+                self._count_bad_data(bad_data_dict) - bad_data_before
             )
-        ) as json_file:
-            top_object = json.loads(json_file.read())
-            for row in top_object:
-                newrec = deepcopy(baserec)
-
-                # commons info
-                newrec, bad_data_dict = add_legacy_commons_info(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_groups_info(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_embargo_info(
-                    newrec, row, bad_data_dict
-                )
 
-                # basic metadata
-                newrec, bad_data_dict = add_titles(newrec, row, bad_data_dict)
-                newrec, bad_data_dict = add_descriptions(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_notes(newrec, row, bad_data_dict)
-                newrec, bad_data_dict = _add_resource_type(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_identifiers(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_language_info(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_edition_info(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = _add_author_data(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_date_info(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_subjects_keywords(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_rights_info(
-                    newrec, row, bad_data_dict
-                )
+        newrec["record_source"] = "knowledgeCommons"
+
+        return newrec, bad_data_dict
+
+    def run_many(self, rows: list[dict]) -> list[tuple[dict, dict]]:
+        """
+        Serialize a chunk of raw CORE deposit records.
+
+        Stages with a preparer in SERIALIZER_STAGE_PREPARERS prepare their
+        work for the whole chunk before the rows are serialized (e.g. the
+        date_info stage repairs all of the chunk's dates in one batch). The
+        preparation time is counted as part of the stage's time.
+
+        Args:
+            rows (list[dict]): The CORE records being processed
+
+        Returns:
+            list[tuple[dict, dict]]: The serialized record and bad data
+                dictionary for each row, in the same order as the rows
+        """
+        prepared = []
+        for name, stage in self.stages:
+            preparer = SERIALIZER_STAGE_PREPARERS.get(name)
+            if preparer:
+                start = time.perf_counter()
+                stage = functools.partial(stage, **preparer(rows))
+                self.stats[name]["seconds"] += time.perf_counter() - start
+            prepared.append((name, stage))
+        return [self._run_stages(row, prepared) for row in rows]
+
+    def collect_cache_stats(self) -> None:
+        """Add the cache statistics gathered in this process."""
+        self.merge_stats(
+            {},
+            {name: pop() for name, pop in SERIALIZER_CACHE_STATS.items()},
+        )
 
-                # Info for chapters and articles
-                newrec, bad_data_dict = add_chapter_label(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_book_authors(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_volume_info(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_publication_details(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_book_journal_title(
-                    newrec, row, bad_data_dict
-                )
-                newrec, bad_data_dict = add_pages(newrec, row, bad_data_dict)
-                newrec, bad_data_dict = add_journal_info(
-                    newrec, row, bad_data_dict
-                )
+    def merge_stats(
+        self, stats: dict, cache_stats: Optional[dict] = None
+    ) -> None:
+        """Add the statistics from another run of the pipeline."""
+        for name, stage_stats in stats.items():
+            totals = self.stats.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "errors": 0}
+            )
+            for k, v in stage_stats.items():
+                totals[k] += v
+        for name, counts in (cache_stats or {}).items():
+            totals = self.cache_stats.setdefault(name, {})
+            for k, v in counts.items():
+                totals[k] = totals.get(k, 0) + v
+
+    def report(self) -> str:
+        """Return a table of the stage statistics, slowest stage first."""
+        total_seconds = sum(s["seconds"] for s in self.stats.values()) or 1
+        lines = [
+            f"{'stage':<22} {'calls':>8} {'seconds':>10} {'%':>6} "
+            f"{'ms/call':>8} {'errors':>7}"
+        ]
+        for name, s in sorted(
+            self.stats.items(), key=lambda i: i[1]["seconds"], reverse=True
+        ):
+            per_call = s["seconds"] * 1000 / s["calls"] if s["calls"] else 0
+            lines.append(
+                f"{name:<22} {s['calls']:>8} {s['seconds']:>10.2f} "
+                f"{s['seconds'] * 100 / total_seconds:>6.1f} "
+                f"{per_call:>8.3f} {s['errors']:>7}"
+            )
+        for name, counts in self.cache_stats.items():
+            lookups = counts.get("hits", 0) + counts.get("misses", 0)
+            hit_rate = counts.get("hits", 0) * 100 / lookups if lookups else 0
+            lines.append(
+                f"{name}: "
+                + ", ".join(f"{k} {v}" for k, v in counts.items())
+                + f" ({hit_rate:.1f}% hits)"
+            )
+        return "\n".join(lines)
 
-                # Info for dissertations and reports
-                newrec, bad_data_dict = add_institution(
-                    newrec, row, bad_data_dict
-                )
 
-                # conference/meeting info
-                newrec, bad_data_dict = add_meeting_info(
-                    newrec, row, bad_data_dict
-                )
+def serialize_record(
+    row: dict, pipeline: Optional[SerializerPipeline] = None
+) -> tuple[dict, dict]:
+    """
+    Serialize one raw CORE deposit record in Invenio JSON format.
+
+    Args:
+        row (dict): The CORE record being processed
+        pipeline (SerializerPipeline, optional): The pipeline of stages to
+            run. Defaults to a pipeline with all stages in their default
+            order.
+
+    Returns:
+        tuple[dict, dict]: The serialized record and a dictionary of error
+            messages recording problems with the data in the CORE record
+            (keyed by the record's id)
+    """
+    return (pipeline or SerializerPipeline()).run(row)
+
+
+def _prepare_resume(
+    serialized_path: Path, failed_path: Path, resume_from: Union[int, str]
+) -> int:
+    """
+    Trim the output files of an interrupted run so that it can be resumed.
+
+    The serialized records file is truncated just before the line at which
+    serialization will resume (dropping any partly written line), and any
+    bad data entries for records after that point are removed from the
+    failed records file.
+
+    Args:
+        serialized_path (Path): The serialized records file
+        failed_path (Path): The serialized failed records file
+        resume_from (int | str): The line number (beginning at 1) at which
+            to resume, or "last" to resume after the last complete line
+            in the serialized records file
+
+    Returns:
+        int: The number of raw records that have already been serialized
+    """
+    kept_lines = 0
+    kept_ids = set()
+    keep_bytes = 0
+    if serialized_path.exists():
+        with open(serialized_path, "rb") as serialized_file:
+            for raw_line in serialized_file:
+                if not raw_line.endswith(b"\n"):
+                    break
+                if (
+                    resume_from != "last"
+                    and kept_lines >= int(resume_from) - 1
+                ):
+                    break
+                rec = json.loads(raw_line)
+                kept_ids.add(rec["metadata"]["identifiers"][0]["identifier"])
+                kept_lines += 1
+                keep_bytes += len(raw_line)
+        with open(serialized_path, "r+b") as serialized_file:
+            serialized_file.truncate(keep_bytes)
+
+    if failed_path.exists():
+        with jsonlines.open(failed_path, "r") as failed_reader:
+            kept_failed = [f for f in failed_reader if f["id"] in kept_ids]
+        with jsonlines.open(failed_path, "w") as failed_writer:
+            failed_writer.write_all(kept_failed)
+
+    return kept_lines
+
+
+def _serialize_chunk(
+    rows: list[dict], stage_names: Optional[list[str]] = None
+) -> tuple[list[tuple[dict, dict]], dict, dict]:
+    """
+    Serialize a chunk of raw records inside a worker process.
 
-                # Uploaded file details
-                newrec, bad_data_dict = add_file_info(
-                    newrec, row, bad_data_dict
+    Returns:
+        tuple[list, dict, dict]: The serialized records and bad data
+            entries for the rows, and the stage and cache statistics for
+            the chunk
+    """
+    pipeline = SerializerPipeline(stage_names)
+    results = pipeline.run_many(rows)
+    pipeline.collect_cache_stats()
+    return results, pipeline.stats, pipeline.cache_stats
+
+
+def _serialize_in_pool(rows, workers: int, pipeline: SerializerPipeline):
+    """
+    Serialize raw records using a pool of worker processes.
+
+    The rows are sent to the workers in chunks of
+    RECORD_IMPORTER_SERIALIZE_CHUNK_SIZE rows, with only a few chunks per
+    worker in flight at a time. The results are yielded in the same order
+    as the rows.
+
+    Args:
+        rows (Iterator[dict]): The raw records to serialize
+        workers (int): The number of worker processes
+        pipeline (SerializerPipeline): The pipeline whose stages the
+            workers run. The workers' stage statistics are merged into it.
+
+    Yields:
+        tuple[dict, dict]: The serialized record and its bad data entries
+            for each row
+    """
+    chunk_size = app.config.get("RECORD_IMPORTER_SERIALIZE_CHUNK_SIZE", 200)
+    stage_names = [name for name, _ in pipeline.stages]
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker_app_context,
+    ) as executor:
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending.append(
+                    executor.submit(_serialize_chunk, chunk, stage_names)
                 )
+            if not pending:
+                break
+            results, stats, cache_stats = pending.popleft().result()
+            pipeline.merge_stats(stats, cache_stats)
+            yield from results
+
+
+def _iter_hashed(rows, hashes: dict):
+    """Yield raw records, storing the content hash of each by its id."""
+    for row in rows:
+        hashes[row["id"]] = RowHashStore.row_hash(row)
+        yield row
+
+
+def _replace_jsonl(path: Path, lines) -> None:
+    """Replace a jsonl file with new lines, without a partly written file."""
+    tmp_path = Path(f"{path}.tmp")
+    with jsonlines.open(tmp_path, "w") as writer:
+        writer.write_all(lines)
+    os.replace(tmp_path, path)
+
+
+def _serialize_all(
+    raw_records: RawRecordIndex,
+    pipeline: SerializerPipeline,
+    workers: int,
+    serialized_path: Path,
+    failed_path: Path,
+    hash_store: RowHashStore,
+    resume_from: Optional[Union[int, str]] = None,
+) -> tuple[int, int]:
+    """
+    Serialize all of the raw records, or resume an interrupted run.
 
-                newrec["custom_fields"]["hclegacy:total_views"] = row[
-                    "total_views"
-                ]
-                newrec["custom_fields"]["hclegacy:total_downloads"] = row[
-                    "total_downloads"
-                ]
+    The stored content hashes are deleted when a new run starts and saved
+    again only when the run completes.
 
-                newrec["record_source"] = "knowledgeCommons"
+    Returns:
+        tuple[int, int]: The number of records serialized and the number of
+            records with bad data
+    """
+    line_count: int = 0
+    bad_data_count: int = 0
+    skip_count = 0
+    if resume_from is not None:
+        skip_count = _prepare_resume(serialized_path, failed_path, resume_from)
+        app.logger.info(
+            f"Resuming serialization after {skip_count} records..."
+        )
+    else:
+        hash_store.clear()
+    mode = "a" if resume_from is not None else "w"
 
-                newrec_list.append(newrec)
+    row_hashes = {}
+    rows = itertools.islice(
+        _iter_hashed(raw_records.iter_records(), row_hashes), skip_count, None
+    )
+    if workers > 1:
+        app.logger.info(f"Serializing records with {workers} workers...")
+        serialized = _serialize_in_pool(rows, workers, pipeline)
+    else:
+        serialized = map(pipeline.run, rows)
+
+    with jsonlines.open(failed_path, mode, flush=True) as failed_writer:
+        with jsonlines.open(serialized_path, mode, flush=True) as output_file:
+            for newrec, bad_data_dict in serialized:
+                # write bad data first so a resumed run never loses it
+                for k, v in bad_data_dict.items():
+                    failed_writer.write({"id": k, "errors": v})
+                    bad_data_count += 1
+                output_file.write(newrec)
                 line_count += 1
+    hash_store.save(row_hashes, [name for name, _ in pipeline.stages])
+
+    print(f"Processed {line_count} lines.")
+    print(f"Found {bad_data_count} records with bad data.")
+    app.logger.info(f"Processed {line_count} lines.")
+    app.logger.info(f"Found {bad_data_count} records with bad data.")
+    # FIXME: make issn field multiple?
+
+    return line_count, bad_data_count
+
+
+def _serialize_incremental(
+    raw_records: RawRecordIndex,
+    pipeline: SerializerPipeline,
+    workers: int,
+    serialized_path: Path,
+    failed_path: Path,
+    hash_store: RowHashStore,
+) -> tuple[list[str], list[str], int]:
+    """
+    Re-serialize only the raw records that changed since the last run.
+
+    The content hash of each raw record is compared with the hashes stored
+    by the last completed run. Records that were added or changed (or
+    whose serialized record is missing) are serialized again, and the
+    serialized records file is rewritten in the order of the raw export,
+    with the stored serialized records kept for unchanged rows and removed
+    rows dropped. The bad data entries of re-serialized and removed
+    records are replaced in the serialized failed records file.
+
+    All records are treated as changed if there is no stored run, or if it
+    was run with different serializer stages.
+
+    Args:
+        raw_records (RawRecordIndex): The raw export
+        pipeline (SerializerPipeline): The pipeline to run
+        workers (int): The number of worker processes to use
+        serialized_path (Path): The serialized records file
+        failed_path (Path): The serialized failed records file
+        hash_store (RowHashStore): The stored content hashes
+
+    Returns:
+        tuple[list, list, int]: The ids of the re-serialized records, the
+            ids of the removed records, and the number of re-serialized
+            records with bad data
+    """
+    stage_names = [name for name, _ in pipeline.stages]
+    old_stages, old_hashes = hash_store.load()
+    serialized_index = None
+    if old_stages != stage_names or not serialized_path.exists():
+        app.logger.info(
+            "No stored serializer run with the same stages. Serializing "
+            "all records..."
+        )
+        old_hashes = {}
+    else:
+        serialized_index = SerializedRecordIndex(serialized_path)
+
+    new_hashes = {}
+    order = []
+    stale = set()
+    old_positions = {}
+    for row in _iter_hashed(raw_records.iter_records(), new_hashes):
+        row_id = row["id"]
+        if row_id in old_positions or row_id in stale:
+            # duplicate ids cannot be matched to their serialized records
+            stale.add(row_id)
+        elif old_hashes.get(row_id) != new_hashes[row_id]:
+            stale.add(row_id)
+        else:
+            position = serialized_index.position_for("hclegacy-pid", row_id)
+            if position is None:
+                stale.add(row_id)
+            else:
+                old_positions[row_id] = position
+        order.append(row_id)
+    removed = RowHashStore.compare(old_hashes, new_hashes)["removed"]
+
+    rows = (r for r in raw_records.iter_records() if r["id"] in stale)
+    if workers > 1:
+        serialized = _serialize_in_pool(rows, workers, pipeline)
+    else:
+        serialized = map(pipeline.run, rows)
+    kept = iter([])
+    if serialized_index is not None:
+        kept = serialized_index.read_many(
+            [old_positions[i] for i in order if i not in stale]
+        )
+    new_failed = []
+
+    def _merged_records():
+        for row_id in order:
+            if row_id in stale:
+                newrec, bad_data_dict = next(serialized)
+                new_failed.extend(
+                    {"id": k, "errors": v} for k, v in bad_data_dict.items()
+                )
+                yield newrec
+            else:
+                yield next(kept)
+
+    _replace_jsonl(serialized_path, _merged_records())
+
+    dropped = stale.union(removed)
+    kept_failed = []
+    if failed_path.exists():
+        with jsonlines.open(failed_path, "r") as failed_reader:
+            kept_failed = [f for f in failed_reader if f["id"] not in dropped]
+    _replace_jsonl(failed_path, kept_failed + new_failed)
+
+    hash_store.save(new_hashes, stage_names)
+    changed_ids = list(dict.fromkeys(i for i in order if i in stale))
+    return changed_ids, removed, len(new_failed)
+
+
+def serialize_json(
+    resume_from: Optional[Union[int, str]] = None,
+    workers: int = 1,
+    stats_path: Optional[Union[Path, str]] = None,
+    incremental: bool = False,
+    changed_ids_path: Optional[Union[Path, str]] = None,
+) -> tuple[int, int]:
+    """
+    Parse and serialize csv data into Invenio JSON format.
+
+    Each row is passed through the stages of a SerializerPipeline, as
+    configured by RECORD_IMPORTER_SERIALIZER_STAGES.
+
+    The raw records are read one at a time, and each serialized record (and
+    each bad data entry) is written to the output files as soon as it is
+    produced, so only one record is held in memory at a time and the output
+    of an interrupted run is kept.
+
+    A content hash of each raw record is stored (see RowHashStore) at the
+    end of every completed run. In incremental mode only the records that
+    were added or changed since then are serialized, and the output files
+    are patched in place (see `_serialize_incremental`). The ids of the
+    re-serialized records are written to a file, one per line, so that
+    they can be loaded with `invenio importer load --sourceids-file`.
+
+    Args:
+        resume_from (int | str, optional): The line number (beginning at 1)
+            in the serialized records file at which to resume an
+            interrupted run, or "last" to resume after the last complete
+            line written. The records already written are kept and the
+            raw records they came from are skipped. If not provided, the
+            output files are overwritten.
+        workers (int, optional): The number of worker processes to use. If
+            greater than 1, the rows are serialized in chunks by a process
+            pool. The output is written in the same order as the rows of
+            the raw export either way. Defaults to 1.
+        stats_path (Path | str, optional): A file to which the timing
+            statistics for each stage of the serializer pipeline should be
+            written as JSON. The statistics are always reported at the end
+            of the run.
+        incremental (bool, optional): If True, only serialize the records
+            that were added or changed since the last completed run, and
+            patch the existing output files. Cannot be combined with
+            resume_from. Defaults to False.
+        changed_ids_path (Path | str, optional): The file to which the ids
+            of the re-serialized records are written in incremental mode.
+            Defaults to the serialized records file path with `.changed`
+            appended.
+
+    Returns:
+        tuple[int, int]: The number of records serialized and the number of
+            records with bad data
+    """
+    if incremental and resume_from is not None:
+        raise ValueError("An incremental run cannot be resumed.")
+    if resume_from not in (None, "last") and int(resume_from) < 1:
+        raise ValueError(
+            "resume_from must be a line number (beginning at 1) or 'last'."
+        )
+
+    with app.app_context():
+        serialized_path = Path(app.config["RECORD_IMPORTER_SERIALIZED_PATH"])
+        failed_path = Path(
+            app.config["RECORD_IMPORTER_SERIALIZED_FAILED_PATH"]
+        )
+        hash_store = RowHashStore(Path(f"{serialized_path}.hashes"))
+        raw_records = RawRecordIndex(
+            Path(
+                app.config["RECORD_IMPORTER_DATA_DIR"],
+                "records-for-import.json",
+            )
+        )
+        pipeline = SerializerPipeline(
+            app.config.get("RECORD_IMPORTER_SERIALIZER_STAGES")
+        )
+
+        if incremental:
+            changed_ids, removed_ids, bad_data_count = _serialize_incremental(
+                raw_records,
+                pipeline,
+                workers,
+                serialized_path,
+                failed_path,
+                hash_store,
+            )
+            line_count = len(changed_ids)
+            changed_ids_path = Path(
+                changed_ids_path or f"{serialized_path}.changed"
+            )
+            changed_ids_path.write_text("".join(f"{i}\n" for i in changed_ids))
+            messages = [
+                f"Re-serialized {line_count} added or changed records.",
+                f"Removed {len(removed_ids)} records.",
+                f"Found {bad_data_count} re-serialized records with bad "
+                "data.",
+                f"Wrote the changed record ids to {changed_ids_path}.",
+            ]
+            if not changed_ids:
+                messages.append(
+                    "No records were added or changed, so there are no "
+                    "records to load."
+                )
+            for message in messages:
+                print(message)
+                app.logger.info(message)
+            if removed_ids:
+                app.logger.info(f"Removed records: {removed_ids}")
+        else:
+            line_count, bad_data_count = _serialize_all(
+                raw_records,
+                pipeline,
+                workers,
+                serialized_path,
+                failed_path,
+                hash_store,
+                resume_from,
+            )
+
+        pipeline.collect_cache_stats()
+        stats_report = pipeline.report()
+        print(stats_report)
+        app.logger.info(f"Serializer stage statistics:\n{stats_report}")
+        if stats_path:
+            with open(stats_path, "w") as stats_file:
+                json.dump(
+                    {"stages": pipeline.stats, "caches": pipeline.cache_stats},
+                    stats_file,
+                    indent=2,
+                )
+            app.logger.info(f"Stage statistics written to {stats_path}")
 
-            # pprint([r for r in newrec_list if r['metadata']['resource_type']
-            # ['id'] == 'publication:journalArticle'])
-
-            # pprint([r for r in newrec_list if r['metadata']['identifiers'][0]
-            # ['identifier'] == 'hc:45177'])
-            # pprint([r for r in top_object if r['id'] == 'hc:45177'])
-
-            # auth_errors = {k:v for k, v in bad_data_dict.items() for i in v
-            # if i[0][:8] == 'authors' and len(i) == 2}
-            # pprint(auth_errors)
-            # app.logger.debug(bad_data_dict)
-            # print(len(auth_errors))
-        print(f"Processed {line_count} lines.")
-        print(f"Found {len(bad_data_dict)} records with bad data.")
-        app.logger.info(f"Processed {line_count} lines.")
-        app.logger.info(f"Found {len(bad_data_dict)} records with bad data.")
-        # FIXME: make issn field multiple?
-
-        with jsonlines.open(
-            Path(app.config["RECORD_IMPORTER_SERIALIZED_FAILED_PATH"]),
-            "w",
-        ) as failed_writer:
-            for k, v in bad_data_dict.items():
-                failed_writer.write({"id": k, "errors": v})
-
-        with jsonlines.open(
-            Path(app.config["RECORD_IMPORTER_SERIALIZED_PATH"]), mode="w"
-        ) as output_file:
-            for rec in newrec_list:
-                output_file.write(rec)
-
-    return newrec_list, bad_data_dict
+    return line_count, bad_data_count
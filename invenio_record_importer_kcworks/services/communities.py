@@ -7,6 +7,7 @@
 # and/or modify it under the terms of the MIT License; see
 # LICENSE file for more details.
 
+from collections import defaultdict
 from flask import current_app as app
 
 
@@ -37,12 +38,17 @@ from invenio_record_importer_kcworks.errors import (
     PublicationValidationError,
     RestrictedRecordPublicationError,
 )
+from invenio_record_importer_kcworks.services.group_collections import (
+    GroupCollectionCache,
+)
 from invenio_record_importer_kcworks.utils.utils import (
     CommunityRecordHelper,
 )
 from invenio_records_resources.services.uow import (
     unit_of_work,
+    RecordCommitOp,
     RecordIndexOp,
+    UnitOfWork,
 )
 from invenio_requests.proxies import current_requests_service
 from invenio_requests.errors import CannotExecuteActionError
@@ -53,12 +59,186 @@ from sqlalchemy.orm.exc import NoResultFound, StaleDataError
 from werkzeug.exceptions import UnprocessableEntity
 
 
+class CollectionInclusionUnitOfWork(UnitOfWork):
+    """Unit of work that indexes each record and parent only once.
+
+    Accepting a community inclusion request registers a commit of the
+    record's parent and an index operation for the record, both of which
+    index the record after the database commit. When a record is added
+    to several collections in one unit of work, each later operation of
+    the same kind for the same record still flushes its changes when it
+    is registered, but it replaces the earlier one instead of indexing
+    the record again. (The latest operation is kept, since its record
+    object carries all of the parent's new communities.)
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the unit of work."""
+        super().__init__(*args, **kwargs)
+        self._index_positions = {}
+
+    def register(self, op):
+        """Register an operation, replacing an earlier duplicate."""
+        if isinstance(op, RecordCommitOp):
+            key = (type(op), str(op._record.id))
+            if key in self._index_positions.keys():
+                op.on_register(self)
+                self._operations[self._index_positions[key]] = op
+                return
+            self._index_positions[key] = len(self._operations)
+        super().register(op)
+
+
 class CommunitiesHelper:
-    """Helper class for working with communities during record import."""
+    """Helper class for working with communities during record import.
+
+    The domain communities found or created by `prepare_invenio_community`
+    are cached by slug for the life of the process, since nearly every
+    imported record belongs to one of the few configured communities.
+    Likewise, the group collections found or created by
+    `add_record_to_group_collections` are cached by group id (see
+    `group_collection_cache`).
+    """
+
+    _community_cache: dict = {}
+    _group_collection_caches: dict = {}
 
     def __init__(self):
         pass
 
+    @classmethod
+    def warm_community_cache(cls, create_missing: bool = False) -> None:
+        """Look up all of the configured domain communities at once.
+
+        The communities listed in RECORD_IMPORTER_COMMUNITIES_DATA (for
+        every record source) are fetched in a single search and cached by
+        slug, so that `prepare_invenio_community` does not search for them
+        again during the run.
+
+        params:
+            create_missing (bool): whether to create the configured
+                communities that do not exist yet. The loader does this
+                before it hands records to parallel workers, so that no two
+                workers try to create the same community.
+        """
+        communities_data = app.config.get(
+            "RECORD_IMPORTER_COMMUNITIES_DATA", {}
+        )
+        sources = {
+            label: record_source
+            for record_source, communities in communities_data.items()
+            for label in communities.keys()
+        }
+        if not sources:
+            return
+        slugs = " OR ".join(f'"{label}"' for label in sources.keys())
+        found = current_communities.service.search(
+            system_identity, q=f"slug:({slugs})", size=len(sources)
+        ).to_dict()
+        for community in found["hits"]["hits"]:
+            if community["slug"] in sources.keys():
+                cls._community_cache[community["slug"]] = community
+        app.logger.debug(
+            f"cached {len(cls._community_cache)} of {len(sources)} "
+            "configured communities"
+        )
+        if create_missing:
+            for label, record_source in sources.items():
+                if label not in cls._community_cache.keys():
+                    app.logger.info(f"    creating community {label}...")
+                    cls().create_invenio_community(record_source, label)
+
+    @classmethod
+    def clear_community_cache(cls) -> None:
+        """Forget the communities cached in this process."""
+        cls._community_cache.clear()
+
+    @classmethod
+    def group_collection_cache(
+        cls, record_source: str
+    ) -> GroupCollectionCache:
+        """Get this process's group collection cache for a record source.
+
+        The cache is created on first use. It is stored in the
+        RECORD_IMPORTER_GROUP_COLLECTION_CACHE_PATH database if that is
+        configured. The groups in RECORD_IMPORTER_MISSING_GROUPS are
+        skipped, and groups found to be missing are remembered for
+        RECORD_IMPORTER_MISSING_GROUP_TTL seconds.
+        """
+        if record_source not in cls._group_collection_caches.keys():
+            cls._group_collection_caches[record_source] = GroupCollectionCache(
+                record_source,
+                app.config.get("RECORD_IMPORTER_GROUP_COLLECTION_CACHE_PATH"),
+                app.config.get("RECORD_IMPORTER_MISSING_GROUPS", []),
+                app.config.get("RECORD_IMPORTER_MISSING_GROUP_TTL", 86400),
+            )
+        return cls._group_collection_caches[record_source]
+
+    @staticmethod
+    def _group_ids(record: dict) -> list[str]:
+        """Return the ids of the groups a record should be added to."""
+        return [
+            g["group_identifier"]
+            for g in record["custom_fields"].get(
+                "hclegacy:groups_for_deposit", []
+            )
+            if g.get("group_identifier") and g.get("group_name")
+        ]
+
+    @classmethod
+    def warm_group_collection_cache(
+        cls, records: list[dict], record_source: str
+    ) -> None:
+        """Look up the group collections of a batch of records at once.
+
+        The collections of all of the records' groups that are not cached
+        yet are fetched in one search per 100 groups. Groups with no
+        collection (or with several) are left out of the cache, to be
+        looked up (and created if necessary) when a record is added to
+        them.
+
+        params:
+            records (list[dict]): the serialized records
+            record_source (str): the name of the records' source service
+        """
+        # FIXME: See whether this can be generalized
+        if record_source != "knowledgeCommons":
+            return
+        cache = cls.group_collection_cache(record_source)
+        group_ids = cache.uncached(
+            g for record in records for g in cls._group_ids(record)
+        )
+        for i in range(0, len(group_ids), 100):
+            batch = group_ids[i : i + 100]
+            ids = " OR ".join(f'"{g}"' for g in batch)
+            try:
+                hits = current_communities.service.search(
+                    system_identity,
+                    q=(
+                        "custom_fields.kcr\\:commons_instance:"
+                        f'"{record_source}" AND '
+                        f"custom_fields.kcr\\:commons_group_id:({ids})"
+                    ),
+                    size=len(batch) * 2,
+                ).to_dict()["hits"]["hits"]
+            except Exception as e:
+                app.logger.warning(
+                    f"    could not look up group collections in bulk: {e}"
+                )
+                return
+            found = defaultdict(list)
+            for hit in hits:
+                found[
+                    str(hit["custom_fields"].get("kcr:commons_group_id"))
+                ].append(hit)
+            cached = [g for g in batch if len(found.get(g, [])) == 1]
+            for group_id in cached:
+                cache.add(group_id, found[group_id][0])
+            app.logger.debug(
+                f"    found collections for {len(cached)} of {len(batch)} "
+                "groups"
+            )
+
     def prepare_invenio_community(
         self, record_source: str, community_string: str
     ) -> dict:
@@ -73,6 +253,9 @@ class CommunitiesHelper:
                 The label of the community to prepare. This
                 string will be used as the slug for the community.
 
+        Communities that were already found or created in this process
+        are returned from the community cache without a search.
+
         Return the community data as a dict. (The result
         of the CommunityItem.to_dict() method.)
         """
@@ -87,6 +270,9 @@ class CommunitiesHelper:
         if community_label == "hcommons":
             community_label = "kcommons"
 
+        if community_label in self._community_cache.keys():
+            return self._community_cache[community_label]
+
         app.logger.debug(f"checking for community {community_label}")
         community_check = current_communities.service.search(
             system_identity, q=f"slug:{community_label}"
@@ -103,6 +289,7 @@ class CommunitiesHelper:
             )
         else:
             community_check = community_check["hits"]["hits"][0]
+            self._community_cache[community_label] = community_check
 
         return community_check
 
@@ -117,6 +304,8 @@ class CommunitiesHelper:
             community_label: str
                 The label of the community to create.
 
+        The new community replaces any cached entry for its label.
+
         Return the community data as a dict. (The result
         of the CommunityItem.to_dict() method.)
         """
@@ -136,7 +325,8 @@ class CommunitiesHelper:
         )
         if result.data.get("errors"):
             raise RuntimeError(result)
-        return result.to_dict()
+        self._community_cache[community_label] = result.to_dict()
+        return self._community_cache[community_label]
 
     @unit_of_work()
     def publish_record_to_community(
@@ -463,6 +653,91 @@ class CommunitiesHelper:
                     review_accepted = request_obj
                 return review_accepted
 
+    def include_record_in_collections(
+        self, record_id: str, community_ids: list[str]
+    ) -> list:
+        """Add a published record to several collections at once.
+
+        The inclusion requests for all of the collections are created and
+        accepted in one `CollectionInclusionUnitOfWork`, so the record's
+        parent is committed in a single transaction and the record is
+        reindexed once, instead of once per collection. Collections that
+        already include the record are skipped.
+
+        Collections that cannot be handled in the batch (e.g., because an
+        inclusion request for the record is already open, or because the
+        record cannot be added to a restricted collection) are added one
+        at a time with `publish_record_to_community` after the batch is
+        committed.
+
+        params:
+            record_id (str): the id of the published record
+            community_ids (list[str]): the ids of the collections to add
+                the record to (must be UUIDs, not slugs)
+
+        returns:
+            list: the accepted inclusion requests
+        """
+        record_communities = current_rdm_records.record_communities_service
+        community_inclusion = current_rdm_records.community_inclusion_service
+        max_additions = getattr(
+            record_communities.config, "max_number_of_additions", 10
+        )
+        accepted = []
+        fallback = []
+        with CollectionInclusionUnitOfWork() as uow:
+            record = record_communities.record_cls.pid.resolve(record_id)
+            pending = [
+                c
+                for c in dict.fromkeys(community_ids)
+                if c not in record.parent.communities.ids
+            ]
+            for i in range(0, len(pending), max_additions):
+                processed, errors = record_communities.add(
+                    system_identity,
+                    record_id,
+                    {
+                        "communities": [
+                            {"id": c} for c in pending[i : i + max_additions]
+                        ]
+                    },
+                    uow=uow,
+                )
+                for e in errors:
+                    if "already included" not in e["message"]:
+                        app.logger.debug(
+                            f"    adding record to collection "
+                            f"{e['community_id']} separately: {e['message']}"
+                        )
+                        fallback.append(e["community_id"])
+                for p in processed:
+                    request_obj = current_requests_service.read(
+                        system_identity, p["request_id"]
+                    )._record
+                    if request_obj["status"] != "accepted":
+                        community = (
+                            current_communities.service.record_cls.pid.resolve(
+                                p["community_id"]
+                            )
+                        )
+                        accepted.append(
+                            community_inclusion.include(
+                                system_identity, community, request_obj, uow
+                            )
+                        )
+                    else:
+                        accepted.append(request_obj)
+            uow.commit()
+        app.logger.debug(
+            f"    added record {record_id} to {len(accepted)} collections "
+            "in one unit of work"
+        )
+        for community_id in fallback:
+            accepted.append(
+                self.publish_record_to_community(record_id, community_id)
+            )
+        return accepted
+
     def add_record_to_group_collections(
         self, metadata_record: dict, record_source: str
     ) -> list:
@@ -484,39 +759,45 @@ class CommunitiesHelper:
                 source service, for use by invenio-group-collections-kcworks
                 in linking the record to the appropriate group collections
 
+        The group collections are looked up in (and added to) the record
+        source's group collection cache. The groups listed in
+        RECORD_IMPORTER_MISSING_GROUPS are skipped. A group that turns out
+        to be missing is added to the cache's missing groups before the
+        CommonsGroupNotFoundError is raised, so that later records that
+        refer to it fail the same way without another lookup (until the
+        cache entry expires).
+
+        If RECORD_IMPORTER_BATCH_COLLECTION_INCLUSION is set, the record is
+        added to all of its group collections at once (see
+        `include_record_in_collections`) after they have been found or
+        created. (So if one of the groups is missing, the record is not
+        added to any of them until it is loaded again.) Otherwise it is
+        added to each collection in turn.
+
         returns:
             list: the list of group collections the record was added to
         """
-        bad_groups = [
-            "1003749",
-            "1000743",
-            "1004285",
-            "1000737",
-            "1000754",
-            "1003111",
-            "1001232",
-            "1004181",
-            "344",
-            "1002956",
-            "1002947",
-            "1003017",
-            "1003436",
-            "1003608",
-            "1003410",
-            "1004047",
-        ]
         # FIXME: See whether this can be generalized
         if record_source == "knowledgeCommons":
             added_to_collections = []
-            group_list = [
-                g
-                for g in metadata_record["custom_fields"].get(
-                    "hclegacy:groups_for_deposit", []
-                )
-                if g.get("group_identifier")
-                and g.get("group_name")
-                and g.get("group_identifier") not in bad_groups
-            ]
+            batch_inclusion = app.config.get(
+                "RECORD_IMPORTER_BATCH_COLLECTION_INCLUSION", False
+            )
+            batch_ids = []
+            cache = self.group_collection_cache(record_source)
+            group_list = []
+            for g in metadata_record["custom_fields"].get(
+                "hclegacy:groups_for_deposit", []
+            ):
+                if not (g.get("group_identifier") and g.get("group_name")):
+                    continue
+                if cache.is_skipped(g["group_identifier"]):
+                    app.logger.info(
+                        f"    skipping group {g['group_identifier']} "
+                        "(known to be missing)..."
+                    )
+                    continue
+                group_list.append(g)
             for group in group_list:
                 group_id = group["group_identifier"]
                 app.logger.debug(f"    linking to group_id: {group_id}")
@@ -524,72 +805,96 @@ class CommunitiesHelper:
                     f"    linking to group_name: {group['group_name']}"
                 )
                 group_name = group["group_name"]
-                coll_record = None
-                try:
-                    coll_search = collections_service.search(
-                        system_identity,
-                        record_source,
-                        commons_group_id=group_id,
+                if cache.is_missing(group_id):
+                    message = (
+                        f"    group {group_id} ({group_name}) "
+                        "not found on Knowledge Commons (cached). Could not "
+                        "create a group collection..."
                     )
-                    coll_records = coll_search.to_dict()["hits"]["hits"]
-                    # NOTE: Don't check for identical group name because
-                    # sometimes the group name has changed since the record
-                    # was created
-                    #
-                    # coll_records = [
-                    #     c
-                    #     for c in coll_records
-                    #     if c["custom_fields"].get("kcr:commons_group_name")
-                    #     == group_name
-                    # ]
-                    app.logger.debug(
-                        f"coll_record: {pformat(coll_search.to_dict())}"
-                    )
-                    try:
-                        assert len(coll_records) == 1
-                    except AssertionError as e:
-                        if len(coll_records) > 1:
-                            raise MultipleActiveCollectionsError(
-                                f"    multiple active collections found "
-                                f"for {group_id}"
-                            )
-                        else:
-                            raise e
-                    coll_record = coll_records[0]
+                    app.logger.warning(message)
+                    raise CommonsGroupNotFoundError(message)
+                coll_record = cache.get(group_id)
+                if coll_record:
                     app.logger.debug(
-                        f"    found group collection {coll_record['id']}"
+                        f"    found cached group collection "
+                        f"{coll_record['id']}"
                     )
-                except CollectionNotFoundError:
+                else:
                     try:
-                        app.logger.debug("    creating group collection...")
-                        coll_record = collections_service.create(
+                        coll_search = collections_service.search(
                             system_identity,
-                            group_id,
                             record_source,
+                            commons_group_id=group_id,
                         )
-                        app.logger.debug("   created group collection...")
-                    except UnprocessableEntity as e:
-                        if (
-                            "Something went wrong requesting group"
-                            in e.description
-                        ):
-                            app.logger.warning(
-                                f"Failed requesting group collection from API "
-                                f"{e.description}"
+                        coll_records = coll_search.to_dict()["hits"]["hits"]
+                        # NOTE: Don't check for identical group name because
+                        # sometimes the group name has changed since the
+                        # record was created
+                        #
+                        # coll_records = [
+                        #     c
+                        #     for c in coll_records
+                        #     if c["custom_fields"].get(
+                        #         "kcr:commons_group_name"
+                        #     )
+                        #     == group_name
+                        # ]
+                        app.logger.debug(
+                            "coll_record: " f"{pformat(coll_search.to_dict())}"
+                        )
+                        try:
+                            assert len(coll_records) == 1
+                        except AssertionError as e:
+                            if len(coll_records) > 1:
+                                raise MultipleActiveCollectionsError(
+                                    f"    multiple active collections found "
+                                    f"for {group_id}"
+                                )
+                            else:
+                                raise e
+                        coll_record = coll_records[0]
+                        app.logger.debug(
+                            "    found group collection "
+                            f"{coll_record['id']}"
+                        )
+                    except CollectionNotFoundError:
+                        try:
+                            app.logger.debug(
+                                "    creating group collection..."
                             )
-                            raise CommonsGroupServiceError(
-                                f"Failed requesting group collection from API "
-                                f"{e.description}"
+                            coll_record = collections_service.create(
+                                system_identity,
+                                group_id,
+                                record_source,
                             )
-                    except CommonsGroupNotFoundError:
-                        message = (
-                            f"    group {group_id} ({group_name})"
-                            f"not found on Knowledge Commons. Could not "
-                            f"create a group collection..."
-                        )
-                        app.logger.warning(message)
-                        raise CommonsGroupNotFoundError(message)
-                if coll_record:
+                            app.logger.debug("   created group collection...")
+                        except UnprocessableEntity as e:
+                            if (
+                                "Something went wrong requesting group"
+                                in e.description
+                            ):
+                                app.logger.warning(
+                                    "Failed requesting group collection from "
+                                    f"API {e.description}"
+                                )
+                                raise CommonsGroupServiceError(
+                                    "Failed requesting group collection from "
+                                    f"API {e.description}"
+                                )
+                        except CommonsGroupNotFoundError:
+                            cache.add_missing(group_id)
+                            message = (
+                                f"    group {group_id} ({group_name})"
+                                f"not found on Knowledge Commons. Could not "
+                                f"create a group collection..."
+                            )
+                            app.logger.warning(message)
+                            raise CommonsGroupNotFoundError(message)
+                    if coll_record:
+                        cache.add(group_id, coll_record)
+                if coll_record and batch_inclusion:
+                    batch_ids.append(coll_record["id"])
+                elif coll_record:
                     app.logger.debug(
                         f"    adding record to group collection "
                         f"{coll_record['id']}..."
@@ -604,6 +909,10 @@ class CommunitiesHelper:
                     )
                     # app.logger.debug(f"    add_result: "
                     #     f"{pformat(add_result)}")
+            if batch_ids:
+                added_to_collections = self.include_record_in_collections(
+                    metadata_record["id"], batch_ids
+                )
             if added_to_collections:
                 app.logger.info(
                     f"    record {metadata_record['id']} successfully added "
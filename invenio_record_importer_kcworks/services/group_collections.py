@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Cache of the group collections that imported records are added to."""
+
+import json
+from pathlib import Path
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+
+class GroupCollectionCache:
+    """Map of a record source's group ids to their group collections.
+
+    Each group id is mapped either to its group collection (the
+    collection's data as a dict) or to nothing, if the group was found to
+    be missing on the record source (so that no collection can be created
+    for it). Group ids that are not in the cache yet have to be looked up.
+
+    Groups found to be missing are only remembered for `missing_ttl`
+    seconds, so that a group that is created (or restored) later on the
+    record source is looked up again. `clear_missing` forgets them all
+    at once. The `skipped` groups, on the other hand, are known to be
+    missing for good and are never looked up.
+
+    The cache lives in memory for the run. If a `db_path` is given, the
+    entries are also stored in (and read from) a SQLite database, so that
+    later runs and other worker processes can use them. Each entry is
+    committed as soon as it is added.
+
+    >>> cache = GroupCollectionCache("knowledgeCommons", skipped=["344"])
+    >>> cache.add("1000", {"id": "abcd"})
+    >>> cache.add_missing("1001")
+    >>> cache.get("1000"), cache.is_skipped("344"), cache.is_missing("1001")
+    ({'id': 'abcd'}, True, True)
+    >>> cache.uncached(["1000", "344", "1001", "1002", "1002"])
+    ['1002']
+    """
+
+    def __init__(
+        self,
+        record_source: str,
+        db_path: Optional[Path] = None,
+        skipped: Iterable[str] = (),
+        missing_ttl: int = 86400,
+    ):
+        """Initialize the cache.
+
+        params:
+            record_source (str): the name of the record source
+            db_path (Path): the path of the SQLite database, if the cache
+                should be persistent
+            skipped (Iterable[str]): group ids known to be missing on the
+                record source for good
+            missing_ttl (int): the number of seconds for which a group
+                found to be missing is remembered
+        """
+        self.record_source = record_source
+        self.missing_ttl = missing_ttl
+        self._collections = {}
+        self._missing = {}
+        self._skipped = {str(g) for g in skipped}
+        self.conn = None
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(db_path, timeout=30)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS group_collections (
+                    record_source TEXT NOT NULL,
+                    group_id TEXT NOT NULL,
+                    collection TEXT,
+                    checked_at REAL,
+                    PRIMARY KEY (record_source, group_id)
+                );
+                """)
+            rows = self.conn.execute(
+                "SELECT group_id, collection, checked_at "
+                "FROM group_collections WHERE record_source = ?",
+                (record_source,),
+            )
+            for group_id, collection, checked_at in rows:
+                if collection is not None:
+                    self._collections[group_id] = json.loads(collection)
+                else:
+                    self._missing[group_id] = checked_at
+
+    def _store(self, group_id: str, collection: Optional[dict]) -> None:
+        if self.conn is not None:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO group_collections "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        self.record_source,
+                        group_id,
+                        None if collection is None else json.dumps(collection),
+                        time.time(),
+                    ),
+                )
+
+    def get(self, group_id: str) -> Optional[dict]:
+        """Return the cached group collection for a group id, if any."""
+        return self._collections.get(str(group_id))
+
+    def is_skipped(self, group_id: str) -> bool:
+        """Return whether a group is known to be missing for good."""
+        return str(group_id) in self._skipped
+
+    def is_missing(self, group_id: str) -> bool:
+        """Return whether a group was found to be missing recently."""
+        checked_at = self._missing.get(str(group_id))
+        return (
+            checked_at is not None
+            and checked_at > time.time() - self.missing_ttl
+        )
+
+    def uncached(self, group_ids: Iterable[str]) -> list[str]:
+        """Return the distinct group ids that are not in the cache."""
+        return [
+            g
+            for g in dict.fromkeys(str(i) for i in group_ids)
+            if g not in self._collections.keys()
+            and not self.is_skipped(g)
+            and not self.is_missing(g)
+        ]
+
+    def add(self, group_id: str, collection: dict) -> None:
+        """Cache the group collection of a group."""
+        group_id = str(group_id)
+        self._collections[group_id] = collection
+        self._missing.pop(group_id, None)
+        self._store(group_id, collection)
+
+    def add_missing(self, group_id: str) -> None:
+        """Record that a group was found to be missing on the source."""
+        group_id = str(group_id)
+        self._missing[group_id] = time.time()
+        self._collections.pop(group_id, None)
+        self._store(group_id, None)
+
+    def clear_missing(self) -> int:
+        """Forget the groups found to be missing, so they are looked up.
+
+        returns:
+            int: the number of groups forgotten
+        """
+        cleared = len(self._missing)
+        self._missing.clear()
+        if self.conn is not None:
+            with self.conn:
+                cleared = self.conn.execute(
+                    "DELETE FROM group_collections "
+                    "WHERE record_source = ? AND collection IS NULL",
+                    (self.record_source,),
+                ).rowcount
+        return cleared
+
+    def close(self) -> None:
+        """Close the database connection, if any."""
+        if self.conn is not None:
+            self.conn.close()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Memoized identifier scheme detection for the serializer."""
+
+from idutils import (
+    detect_identifier_schemes,
+    is_doi,
+    is_isbn,
+    is_issn,
+    is_url,
+    normalize_doi,
+    normalize_pid,
+)
+import re
+from typing import Callable, Optional
+
+
+class IdentifierClassifier:
+    """Memoized classification and normalization of identifier strings.
+
+    `detect` returns the schemes among RELEVANT_SCHEMES that
+    `idutils.detect_identifier_schemes` detects for a string (retrying
+    with an `https://` prefix if no scheme is detected at all). Common
+    shapes of DOIs, handles, ISBNs, ISSNs, and URLs are recognized by a
+    prefix-based pre-classifier that gives the same result without running
+    every idutils validator. Only ambiguous strings are passed to idutils.
+
+    The results of `detect` and of the idutils helpers wrapped by this
+    class are memoized, since the same strings (shared handles, publisher
+    URLs) recur across many records. Each memo holds at most `max_entries`
+    strings and is emptied when it fills up.
+
+    `stats` counts the memo hits and misses, and how many misses were
+    resolved by the pre-classifier or by idutils.
+    """
+
+    RELEVANT_SCHEMES = frozenset(["doi", "handle", "isbn", "issn", "url"])
+
+    _doi_url = re.compile(
+        r"https?://(?:dx\.)?doi\.org/10\.\d+(?:\.\d+)*/\S+", re.I
+    )
+    # idutils only keeps the handle scheme for lowercase handle.net urls
+    _handle_url = re.compile(r"https?://hdl\.handle\.net/[^\s:]+")
+    _bare_doi = re.compile(r"(?:doi:)?10\.\d+(?:\.\d+)*/\S+", re.I)
+    _url = re.compile(r"https?://([^\s/:?#]+)(?:[/?#]\S*)?", re.I)
+    _ambiguous_hosts = re.compile(
+        r"(?:dx\.)?doi\.org|hdl\.handle\.net|(?:.*\.)?viaf\.org", re.I
+    )
+    _number = re.compile(r"\d[\d-]*[\dXx]")
+    _hc_id = re.compile(r"hc:\d+")
+
+    def __init__(self, max_entries: int = 100000):
+        """Initialize the classifier.
+
+        params:
+            max_entries (int): the maximum number of strings in each memo
+        """
+        self.max_entries = max_entries
+        self._memos = {}
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {"hits": 0, "misses": 0, "prefix": 0, "idutils": 0}
+
+    def pop_stats(self) -> dict:
+        """Return the statistics gathered since the last call, and reset."""
+        stats, self.stats = self.stats, self._empty_stats()
+        return stats
+
+    def _memoized(self, name: str, func: Callable, *args):
+        memo = self._memos.setdefault(name, {})
+        try:
+            result = memo[args]
+            self.stats["hits"] += 1
+            return result
+        except KeyError:
+            pass
+        self.stats["misses"] += 1
+        result = func(*args)
+        if len(memo) >= self.max_entries:
+            memo.clear()
+        memo[args] = result
+        return result
+
+    @staticmethod
+    def _isbn_issn(value: str) -> frozenset:
+        return frozenset(
+            scheme
+            for scheme, test in [("isbn", is_isbn), ("issn", is_issn)]
+            if test(value)
+        )
+
+    @classmethod
+    def pre_classify(cls, value: str) -> Optional[frozenset]:
+        """Classify a string by its shape without calling idutils.
+
+        returns:
+            frozenset | None: the relevant schemes detected for the string,
+                or None if the string's shape is ambiguous
+        """
+        if cls._doi_url.fullmatch(value):
+            return frozenset(["doi", "url"])
+        if cls._handle_url.fullmatch(value):
+            return frozenset(["handle", "url"])
+        if cls._bare_doi.fullmatch(value):
+            return frozenset(["doi", "handle"]) | cls._isbn_issn(value)
+        url_match = cls._url.fullmatch(value)
+        if url_match:
+            if cls._ambiguous_hosts.fullmatch(url_match.group(1)):
+                return None
+            return frozenset(["url"])
+        if cls._number.fullmatch(value):
+            # numbers that are neither are left to idutils (which might
+            # detect a url on its `https://` retry)
+            return cls._isbn_issn(value) or None
+        if cls._hc_id.fullmatch(value):
+            return frozenset(["url"])
+        return None
+
+    def _detect(self, value: str) -> frozenset:
+        detected = self.pre_classify(value)
+        if detected is not None:
+            self.stats["prefix"] += 1
+            return detected
+        self.stats["idutils"] += 1
+        detected = detect_identifier_schemes(value)
+        if len(detected) < 1:
+            detected = detect_identifier_schemes(f"https://{value}")
+        return frozenset(detected) & self.RELEVANT_SCHEMES
+
+    def detect(self, value: str) -> frozenset:
+        """Return the relevant identifier schemes detected for a string."""
+        return self._memoized("detect", self._detect, value)
+
+    def is_doi(self, value: str) -> bool:
+        """Return the memoized result of `idutils.is_doi`."""
+        return self._memoized("is_doi", lambda v: bool(is_doi(v)), value)
+
+    def is_url(self, value: str) -> bool:
+        """Return the memoized result of `idutils.is_url`."""
+        return self._memoized("is_url", is_url, value)
+
+    def normalize_doi(self, value: str) -> str:
+        """Return the memoized result of `idutils.normalize_doi`."""
+        return self._memoized("normalize_doi", normalize_doi, value)
+
+    def normalize_pid(self, value: str, scheme: str) -> str:
+        """Return the memoized result of `idutils.normalize_pid`."""
+        return self._memoized("normalize_pid", normalize_pid, value, scheme)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Deferred, bulk indexing of the records touched by an import."""
+
+from flask import current_app as app
+from functools import partial
+from invenio_rdm_records.proxies import (
+    current_rdm_records_service as records_service,
+)
+from opensearchpy.exceptions import NotFoundError
+
+
+class DeferredIndexer:
+    """Stand-in for a service's indexer that collects record ids.
+
+    The records passed to `index`, `index_by_id`, or `bulk_index` are not
+    indexed. Their ids are only added to `pending` (a dict used as an
+    ordered set), to be sent to the wrapped indexer's bulk queue later
+    (see `DeferredIndexing.flush`). Deleting a record removes it from
+    `pending` and deletes it from the index if it was indexed before.
+    Index refreshes are skipped. All other attributes are those of the
+    wrapped indexer.
+    """
+
+    def __init__(self, indexer_cls, pending: dict, *args, **kwargs):
+        """Initialize the wrapped indexer.
+
+        params:
+            indexer_cls (type): the class of the wrapped indexer
+            pending (dict): the ids of the records waiting to be indexed
+            *args, **kwargs: the arguments for the wrapped indexer
+        """
+        self.indexer = indexer_cls(*args, **kwargs)
+        self.pending = pending
+
+    def __getattr__(self, name):
+        return getattr(self.indexer, name)
+
+    def index(self, record, arguments=None, **kwargs):
+        """Defer the indexing of a record."""
+        self.pending[str(record.id)] = None
+
+    def index_by_id(self, record_uuid, **kwargs):
+        """Defer the indexing of a record by its id."""
+        self.pending[str(record_uuid)] = None
+
+    def bulk_index(self, record_id_iterator):
+        """Defer the indexing of several records."""
+        for record_id in record_id_iterator:
+            self.pending[str(record_id)] = None
+
+    def refresh(self, index=None, **kwargs):
+        """Skip refreshing the index."""
+        pass
+
+    def delete(self, record, **kwargs):
+        """Delete a record from the index (if it is indexed)."""
+        self.pending.pop(str(record.id), None)
+        try:
+            return self.indexer.delete(record, **kwargs)
+        except NotFoundError:
+            return None
+
+    def delete_by_id(self, record_uuid, **kwargs):
+        """Delete a record from the index by its id (if it is indexed)."""
+        self.pending.pop(str(record_uuid), None)
+        try:
+            return self.indexer.delete_by_id(record_uuid, **kwargs)
+        except NotFoundError:
+            return None
+
+
+class DeferredIndexing:
+    """Defer the indexing of the records and drafts changed by an import.
+
+    Inside the context, the records service builds a `DeferredIndexer`
+    instead of each of its record and draft indexers. So the records and
+    drafts that would be indexed by each service call (create,
+    update_draft, publish, community inclusion, etc.) are collected
+    instead. That includes every version of a record whose parent is
+    committed. Each collected record is indexed once, through the bulk
+    indexing queue, when `flush` is called and when the context exits.
+
+    The queued records are indexed when the indexer's bulk queue is next
+    processed (e.g., by the `process_bulk_queue` Celery task of
+    invenio-indexer). Until then they can be read, but not searched for.
+    """
+
+    _indexer_classes = {
+        "indexer": "indexer_cls",
+        "draft_indexer": "draft_indexer_cls",
+    }
+
+    def __init__(self, service=None):
+        """Initialize the deferred indexing.
+
+        params:
+            service (RecordService): the service whose indexing is
+                deferred. Defaults to the RDM records service.
+        """
+        self.service = service or records_service
+        self.pending = {name: {} for name in self._indexer_classes.keys()}
+        self._original_classes = {}
+
+    def __enter__(self):
+        config = self.service.config
+        for name, cls_attr in self._indexer_classes.items():
+            indexer_cls = getattr(config, cls_attr)
+            self._original_classes[cls_attr] = indexer_cls
+            setattr(
+                config,
+                cls_attr,
+                partial(DeferredIndexer, indexer_cls, self.pending[name]),
+            )
+        return self
+
+    def __exit__(self, *args):
+        try:
+            self.flush()
+        finally:
+            for cls_attr, indexer_cls in self._original_classes.items():
+                setattr(self.service.config, cls_attr, indexer_cls)
+            self._original_classes = {}
+
+    def flush(self) -> int:
+        """Queue the collected records for bulk indexing.
+
+        returns:
+            int: the number of records and drafts queued
+        """
+        queued = 0
+        for name, pending in self.pending.items():
+            if pending:
+                record_ids = list(pending.keys())
+                pending.clear()
+                indexer = getattr(self.service, name)
+                getattr(indexer, "indexer", indexer).bulk_index(record_ids)
+                queued += len(record_ids)
+        if queued:
+            app.logger.info(
+                f"    queued {queued} records and drafts for bulk indexing..."
+            )
+        return queued
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Persistent cache of language detection results for the serializer."""
+
+from flask import current_app as app
+import hashlib
+import iso639
+import json
+from langdetect import DetectorFactory, detect_langs
+from pathlib import Path
+import sqlite3
+from typing import NamedTuple, Optional
+
+# langdetect is non-deterministic unless it is seeded
+DetectorFactory.seed = 0
+
+
+class CachedLanguage(NamedTuple):
+    """The fields of an `iso639.Language` used by the serializer."""
+
+    part3: str
+    name: str
+
+
+class LanguageDetectionCache:
+    """On-disk cache of langdetect results and iso639 lookups.
+
+    Detection results are keyed by a SHA-256 hash of the detected text,
+    so re-serializing an unchanged export does not run langdetect again.
+    The results of `iso639.Language.from_name` and
+    `iso639.Language.from_part1` are cached in the same SQLite database.
+    Failed detections and lookups are not cached, and their exceptions are
+    raised as usual.
+
+    Texts shorter than `short_text_length` characters are not passed to
+    langdetect at all, since its results for very short texts are
+    unreliable. They are reported as an inconclusive (probability 0)
+    detection of `short_text_language`.
+
+    Each entry is committed as soon as it is added, so the cache can be
+    shared by several serializer worker processes.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        short_text_length: Optional[int] = None,
+        short_text_language: Optional[str] = None,
+    ):
+        """Open the cache, creating it if necessary.
+
+        params:
+            db_path (Path): the path of the SQLite database. Defaults to the
+                RECORD_IMPORTER_LANGUAGE_CACHE_PATH config value.
+            short_text_length (int): texts shorter than this are not passed
+                to langdetect. Defaults to the
+                RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LENGTH config value
+                (or 0, which disables the short-text fast path, if no
+                db_path is given).
+            short_text_language (str): the ISO 639-1 code reported for
+                short texts. Defaults to the
+                RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LANGUAGE config value
+                (or "en" if no db_path is given).
+        """
+        if db_path is None:
+            db_path = app.config["RECORD_IMPORTER_LANGUAGE_CACHE_PATH"]
+            if short_text_length is None:
+                short_text_length = app.config.get(
+                    "RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LENGTH", 0
+                )
+            if short_text_language is None:
+                short_text_language = app.config.get(
+                    "RECORD_IMPORTER_LANGDETECT_SHORT_TEXT_LANGUAGE", "en"
+                )
+        self.db_path = Path(db_path)
+        self.short_text_length = short_text_length or 0
+        self.short_text_language = short_text_language or "en"
+        self._detections = {}
+        self._languages = {}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS detections (
+                text_hash TEXT PRIMARY KEY,
+                langs TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS languages (
+                lookup TEXT NOT NULL,
+                value TEXT NOT NULL,
+                part3 TEXT NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (lookup, value)
+            );
+            """
+        )
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def detect(self, text: str) -> list[dict]:
+        """Return the languages detected in a text, most probable first.
+
+        params:
+            text (str): the text to detect
+
+        returns:
+            list[dict]: a dictionary with the keys "code" (the ISO 639-1
+                code) and "prob" (the probability) for each detected
+                language
+
+        raises:
+            langdetect.LangDetectException: if langdetect cannot detect a
+                language in the text
+        """
+        if len(text) < self.short_text_length:
+            return [{"code": self.short_text_language, "prob": 0.0}]
+
+        text_hash = self._hash(text)
+        langs = self._detections.get(text_hash)
+        if langs is not None:
+            return langs
+
+        row = self.conn.execute(
+            "SELECT langs FROM detections WHERE text_hash = ?", (text_hash,)
+        ).fetchone()
+        if row is not None:
+            langs = json.loads(row[0])
+        else:
+            langs = [
+                {"code": lang.lang, "prob": lang.prob}
+                for lang in detect_langs(text)
+            ]
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO detections VALUES (?, ?)",
+                    (text_hash, json.dumps(langs)),
+                )
+        self._detections[text_hash] = langs
+        return langs
+
+    def _language(self, lookup: str, value: str) -> CachedLanguage:
+        language = self._languages.get((lookup, value))
+        if language is not None:
+            return language
+
+        row = self.conn.execute(
+            "SELECT part3, name FROM languages "
+            "WHERE lookup = ? AND value = ?",
+            (lookup, value),
+        ).fetchone()
+        if row is not None:
+            language = CachedLanguage(*row)
+        else:
+            found = getattr(iso639.Language, lookup)(value)
+            language = CachedLanguage(found.part3, found.name)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO languages VALUES (?, ?, ?, ?)",
+                    (lookup, value, *language),
+                )
+        self._languages[(lookup, value)] = language
+        return language
+
+    def language_from_name(self, name: str) -> CachedLanguage:
+        """Return the cached result of `iso639.Language.from_name`."""
+        return self._language("from_name", name)
+
+    def language_from_part1(self, code: str) -> CachedLanguage:
+        """Return the cached result of `iso639.Language.from_part1`."""
+        return self._language("from_part1", code)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
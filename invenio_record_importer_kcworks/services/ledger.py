@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""SQLite-backed ledger of the created and failed records of the loader."""
+
+from flask import current_app as app
+import hashlib
+import json
+import jsonlines
+from pathlib import Path
+import sqlite3
+from typing import Optional
+
+
+class ImportLedger:
+    """Ledger of the records created and failed by the loader.
+
+    The ledger keeps the contents of the created records log and the
+    failed records log in a local SQLite database, indexed by the
+    `commons_id` of each record, so that recording the outcome of a record
+    does not require scanning or rewriting the logs.
+
+    The jsonl logs are still written in their existing formats:
+
+    - New lines for the created records log are appended to the file as
+      records are logged. The file is only rewritten (by `export`) if the
+      Invenio record id of an already logged record changes.
+    - The failed records log is rewritten by `export` (sorted by index),
+      which the loader calls once at the end of each run.
+
+    The jsonl logs remain the canonical record of a run. If either log
+    file is edited, replaced, or deleted outside of the ledger, the
+    ledger's copy is rebuilt from the file the next time the ledger is
+    opened.
+
+    Created records log entries may carry a `fingerprint` of the payload
+    that was imported (see `fingerprint`), so that the loader can tell
+    whether a record has changed since it was last imported successfully
+    (see `unchanged_recid`).
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        created_log_path: Optional[Path] = None,
+        failed_log_path: Optional[Path] = None,
+    ):
+        """Open the ledger, creating or resyncing it as needed.
+
+        params:
+            db_path (Path): the path of the SQLite database. Defaults to the
+                RECORD_IMPORTER_LEDGER_PATH config value.
+            created_log_path (Path): the path of the created records log.
+                Defaults to the RECORD_IMPORTER_CREATED_LOG_PATH config
+                value.
+            failed_log_path (Path): the path of the failed records log.
+                Defaults to the RECORD_IMPORTER_FAILED_LOG_PATH config value.
+        """
+        self.db_path = Path(
+            db_path or app.config["RECORD_IMPORTER_LEDGER_PATH"]
+        )
+        self.created_log_path = Path(
+            created_log_path or app.config["RECORD_IMPORTER_CREATED_LOG_PATH"]
+        )
+        self.failed_log_path = Path(
+            failed_log_path or app.config["RECORD_IMPORTER_FAILED_LOG_PATH"]
+        )
+        self._created_dirty = False
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS created (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                commons_id TEXT NOT NULL,
+                invenio_id TEXT NOT NULL,
+                invenio_recid TEXT,
+                data TEXT NOT NULL,
+                fingerprint TEXT,
+                UNIQUE (commons_id, invenio_id)
+            );
+            CREATE TABLE IF NOT EXISTS failed (
+                commons_id TEXT PRIMARY KEY,
+                idx INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS failed_idx ON failed (idx);
+            CREATE TABLE IF NOT EXISTS log_files (
+                name TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                dirty INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+        self._sync_from_log("created", self.created_log_path)
+        self._sync_from_log("failed", self.failed_log_path)
+
+    @staticmethod
+    def _file_stat(file_path: Path) -> tuple[int, int]:
+        try:
+            stat = file_path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return -1, -1
+
+    def _record_stat(self, name: str, file_path: Path) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO log_files (name, size, mtime_ns, dirty) "
+            "VALUES (?, ?, ?, 0)",
+            (name, *self._file_stat(file_path)),
+        )
+
+    def _sync_from_log(self, name: str, file_path: Path) -> None:
+        """Rebuild one of the ledger tables if its log file has changed.
+
+        If the log file is unchanged but the ledger holds entries that have
+        not yet been exported to it, the file is marked for export.
+        """
+        recorded = self.conn.execute(
+            "SELECT size, mtime_ns, dirty FROM log_files WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if recorded is not None and tuple(recorded[:2]) == self._file_stat(
+            file_path
+        ):
+            if name == "created" and recorded[2]:
+                self._created_dirty = True
+            return
+
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {name}")
+            if file_path.exists():
+                with jsonlines.open(file_path, "r") as reader:
+                    for obj in reader:
+                        if name == "created":
+                            self._upsert_created(obj)
+                        else:
+                            self._upsert_failed(obj)
+            self._record_stat(name, file_path)
+
+    def _upsert_created(self, created_rec: dict) -> None:
+        self.conn.execute(
+            "DELETE FROM created WHERE commons_id = ? AND invenio_id = ?",
+            (created_rec["commons_id"], created_rec["invenio_id"] or ""),
+        )
+        self.conn.execute(
+            "INSERT INTO created (commons_id, invenio_id, invenio_recid, "
+            "data, fingerprint) VALUES (?, ?, ?, ?, ?)",
+            (
+                created_rec["commons_id"],
+                created_rec["invenio_id"] or "",
+                created_rec["invenio_recid"],
+                json.dumps(created_rec),
+                created_rec.get("fingerprint"),
+            ),
+        )
+
+    def _upsert_failed(self, failed_obj: dict) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO failed (commons_id, idx, data) "
+            "VALUES (?, ?, ?)",
+            (
+                failed_obj["commons_id"],
+                failed_obj["index"],
+                json.dumps(failed_obj),
+            ),
+        )
+
+    def log_created(self, created_rec: dict) -> bool:
+        """Record that a record was created (or updated) in Invenio.
+
+        If the record (by commons_id and invenio_id) is not yet in the log,
+        it is appended to the created records log. If it is already logged
+        with a different Invenio record id or payload fingerprint, the old
+        entry is replaced by the new one at the end of the log. Otherwise
+        nothing changes.
+
+        params:
+            created_rec (dict): the created records log entry
+
+        returns:
+            bool: whether the log was changed
+        """
+        existing = self.conn.execute(
+            "SELECT invenio_recid, fingerprint FROM created "
+            "WHERE commons_id = ? AND invenio_id = ?",
+            (created_rec["commons_id"], created_rec["invenio_id"] or ""),
+        ).fetchone()
+        if existing is not None and tuple(existing) == (
+            created_rec["invenio_recid"],
+            created_rec.get("fingerprint"),
+        ):
+            return False
+
+        with self.conn:
+            self._upsert_created(created_rec)
+            if existing is None and not self._created_dirty:
+                with jsonlines.open(
+                    self.created_log_path, "a"
+                ) as created_writer:
+                    created_writer.write(created_rec)
+                self._record_stat("created", self.created_log_path)
+            else:
+                self._created_dirty = True
+                self.conn.execute(
+                    "UPDATE log_files SET dirty = 1 WHERE name = 'created'"
+                )
+        return True
+
+    @staticmethod
+    def fingerprint(
+        rec: dict, overrides: dict = {}, record_source: str = ""
+    ) -> str:
+        """Return a fingerprint of the payload for importing a record.
+
+        The fingerprint is a SHA-256 hash of the serialized record
+        (metadata, custom fields, pids, and file entries), the metadata
+        overrides applied to it, and its source. It does not depend on the
+        order of any keys, or on the record's position in the serialized
+        records file.
+
+        >>> rec = {"metadata": {"title": "A"}, "files": {"entries": {}}}
+        >>> ImportLedger.fingerprint(rec) == ImportLedger.fingerprint(
+        ...     dict(reversed(rec.items()), jsonl_index=3)
+        ... )
+        True
+        >>> ImportLedger.fingerprint(rec) == ImportLedger.fingerprint(
+        ...     rec, {"metadata|title": "B"}
+        ... )
+        False
+        """
+        payload = {
+            "record": {k: v for k, v in rec.items() if k != "jsonl_index"},
+            "overrides": overrides,
+            "record_source": record_source,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def unchanged_recid(
+        self, commons_id: str, invenio_id: str, fingerprint: str
+    ) -> Optional[str]:
+        """Return the Invenio id of a record imported with a payload.
+
+        params:
+            commons_id (str): the source id of the record
+            invenio_id (str): the DOI of the record
+            fingerprint (str): the fingerprint of the payload to import
+
+        returns:
+            str | None: the Invenio record id logged for the record, if it
+                was last imported successfully with the same payload
+                fingerprint, or None otherwise
+        """
+        row = self.conn.execute(
+            "SELECT invenio_recid FROM created "
+            "WHERE commons_id = ? AND invenio_id = ? AND fingerprint = ?",
+            (commons_id, invenio_id or "", fingerprint),
+        ).fetchone()
+        return row[0] if row else None
+
+    def remove_created(
+        self,
+        commons_id: Optional[str] = None,
+        invenio_recid: Optional[str] = None,
+    ) -> int:
+        """Remove a record from the created records.
+
+        Used when a record is deleted from Invenio, so that loading it
+        again is not skipped as unchanged. The created records log is
+        rewritten by the next `export`.
+
+        params:
+            commons_id (str): the source id of the record to remove
+            invenio_recid (str): the Invenio id of the record to remove
+
+        returns:
+            int: the number of created records log entries removed
+        """
+        if commons_id is None and invenio_recid is None:
+            raise ValueError("A commons_id or an invenio_recid is required")
+        column, value = (
+            ("commons_id", commons_id)
+            if commons_id is not None
+            else ("invenio_recid", invenio_recid)
+        )
+        with self.conn:
+            cursor = self.conn.execute(
+                f"DELETE FROM created WHERE {column} = ?", (value,)
+            )
+            if cursor.rowcount > 0:
+                self._created_dirty = True
+                self.conn.execute(
+                    "UPDATE log_files SET dirty = 1 WHERE name = 'created'"
+                )
+        return cursor.rowcount
+
+    def log_failed(self, failed_obj: dict) -> None:
+        """Record a failed record, replacing any earlier failure entry."""
+        with self.conn:
+            self._upsert_failed(failed_obj)
+
+    def remove_failed(self, commons_id: str) -> bool:
+        """Remove a record from the failed records.
+
+        returns:
+            bool: whether the record was in the failed records
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM failed WHERE commons_id = ?", (commons_id,)
+            )
+        return cursor.rowcount > 0
+
+    def created_records(self) -> list[dict]:
+        """Return the created records log entries in log order."""
+        return [
+            json.loads(row[0])
+            for row in self.conn.execute(
+                "SELECT data FROM created ORDER BY seq"
+            )
+        ]
+
+    def failed_records(self) -> list[dict]:
+        """Return the failed records log entries sorted by index."""
+        return [
+            json.loads(row[0])
+            for row in self.conn.execute(
+                "SELECT data FROM failed ORDER BY idx, commons_id"
+            )
+        ]
+
+    def export(self) -> None:
+        """Write the ledger contents to the jsonl log files.
+
+        The failed records log is always rewritten. The created records
+        log is only rewritten if an existing entry was replaced since it
+        was last written.
+        """
+        with self.conn:
+            with jsonlines.open(self.failed_log_path, "w") as failed_writer:
+                failed_writer.write_all(self.failed_records())
+            self._record_stat("failed", self.failed_log_path)
+            if self._created_dirty:
+                with jsonlines.open(
+                    self.created_log_path, "w"
+                ) as created_writer:
+                    created_writer.write_all(self.created_records())
+                self._record_stat("created", self.created_log_path)
+                self._created_dirty = False
+
+    def close(self) -> None:
+        """Export the logs and close the database connection."""
+        self.export()
+        self.conn.close()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""In-memory index of the metadata overrides used during loading."""
+
+from flask import current_app as app
+import jsonlines
+from pathlib import Path
+from typing import Optional
+
+
+class OverridesIndex:
+    """Index of the metadata overrides for each record source.
+
+    Each source's overrides file (named
+    `record-importer-overrides_{record_source}.jsonl`) is read once into a
+    dictionary keyed by the `source_id` of each line. The `skip` flag of
+    each line is normalized to a boolean when the file is read. If a
+    source_id appears on more than one line, the last line wins.
+
+    The file is only read again if its modification time changes, so a
+    single index can be shared by a whole loading run (or queried from the
+    CLI) without re-scanning the file for every record.
+
+    If no overrides file exists for a source, the source has no overrides.
+    """
+
+    skip_values = [True, "True", "true", 1, "1"]
+
+    def __init__(self, folder: Optional[Path] = None):
+        """Initialize the index.
+
+        params:
+            folder (Path): the folder holding the overrides files. Defaults
+                to the RECORD_IMPORTER_OVERRIDES_FOLDER config value.
+        """
+        self.folder = Path(folder) if folder else None
+        self._sources = {}
+
+    def path_for(self, record_source: str) -> Path:
+        """Return the path of the overrides file for a record source."""
+        folder = self.folder or Path(
+            app.config["RECORD_IMPORTER_OVERRIDES_FOLDER"]
+        )
+        return folder / f"record-importer-overrides_{record_source}.jsonl"
+
+    def _read_file(self, file_path: Path) -> dict:
+        """Read an overrides file into a dictionary keyed by source_id."""
+        entries = {}
+        with jsonlines.open(file_path, "r") as override_reader:
+            for o in override_reader:
+                entries[o["source_id"]] = {
+                    "overrides": o.get("overrides") or {},
+                    "skip": o.get("skip") in self.skip_values,
+                }
+        return entries
+
+    def for_source(self, record_source: str) -> dict:
+        """Return the overrides for a record source keyed by source_id.
+
+        The overrides file is re-read if it has changed since it was last
+        read.
+        """
+        file_path = self.path_for(record_source)
+        try:
+            mtime = file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._sources.pop(record_source, None)
+            return {}
+
+        cached = self._sources.get(record_source)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, self._read_file(file_path))
+            self._sources[record_source] = cached
+        return cached[1]
+
+    def get(self, record_source: str, source_id: str) -> Optional[dict]:
+        """Return the override entry for one source_id, if there is one.
+
+        returns:
+            dict | None: a dictionary with the keys "overrides" (the
+                metadata overrides) and "skip" (whether to skip the
+                record), or None if the record has no overrides
+        """
+        return self.for_source(record_source).get(source_id)
+
+    def lookup(
+        self, record_source: str, source_ids: list
+    ) -> tuple[dict, bool]:
+        """Return the overrides and skip flag for a record.
+
+        If more than one of the record's ids has an override entry, the
+        entry for the last id in `source_ids` is used.
+
+        params:
+            record_source (str): the name of the record's source service
+            source_ids (list): the record's ids in the source system
+
+        returns:
+            tuple[dict, bool]: the metadata overrides for the record and
+                whether the record should be skipped
+        """
+        entries = self.for_source(record_source)
+        overrides, skip = {}, False
+        for source_id in source_ids:
+            entry = entries.get(source_id)
+            if entry is not None:
+                overrides, skip = entry["overrides"], entry["skip"]
+        return overrides, skip
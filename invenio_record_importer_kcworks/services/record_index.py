@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Random access to the records in the importer's data files."""
+
+from flask import current_app as app
+import json
+import mmap
+import os
+from pathlib import Path
+import re
+import sqlite3
+from typing import Iterator, Optional
+
+
+class RecordFileIndex:
+    """Byte-offset index for a file of json records.
+
+    The index is kept in a sidecar SQLite file next to the indexed file
+    (with the suffix `.index`). It maps the position of each record in the
+    file (beginning at 1) and each of the record's indexed identifiers to
+    the byte offset and length of the record, so that single records can
+    be read with a `seek` instead of reading and parsing the whole file.
+
+    The sidecar records the size and modification time of the file it was
+    built from, and it is rebuilt automatically whenever either of these
+    changes.
+
+    Subclasses define how the records are found in the file
+    (`_iter_spans`) and which identifiers are indexed (`_record_ids`).
+    """
+
+    schemes: list[str] = []
+    version = 2
+
+    def __init__(self, file_path: Path, index_path: Optional[Path] = None):
+        """Initialize the index.
+
+        params:
+            file_path (Path): the path of the indexed file
+            index_path (Path): the path of the sidecar index. Defaults to the
+                indexed file path with `.index` appended.
+        """
+        self.file_path = Path(file_path)
+        self.index_path = Path(index_path or f"{self.file_path}.index")
+        self._conn = None
+
+    def _file_stat(self) -> tuple[int, int]:
+        stat = self.file_path.stat()
+        return stat.st_size, stat.st_mtime_ns
+
+    def _iter_spans(self, source) -> Iterator[tuple[int, int]]:
+        """Yield the byte offset and length of each record in the file.
+
+        params:
+            source: the indexed file, opened in binary mode
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _record_ids(record: dict) -> dict:
+        """Return the indexed identifiers of a record, keyed by scheme."""
+        return {}
+
+    def _read_span(self, source, offset: int, length: int) -> dict:
+        source.seek(offset)
+        return json.loads(source.read(length))
+
+    def iter_records(self) -> Iterator[dict]:
+        """Read all of the records in the file in order.
+
+        This does not use (or build) the sidecar index, and only one
+        record at a time is held in memory.
+        """
+        with open(self.file_path, "rb") as source:
+            for offset, length in self._iter_spans(source):
+                yield self._read_span(source, offset, length)
+
+    def build(self) -> None:
+        """Build the sidecar index from the indexed file."""
+        file_stat = self._file_stat()
+        tmp_path = Path(f"{self.index_path}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(tmp_path)
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE meta (
+                    version INTEGER, size INTEGER, mtime_ns INTEGER
+                );
+                CREATE TABLE records (
+                    position INTEGER PRIMARY KEY,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL
+                );
+                CREATE TABLE ids (
+                    scheme TEXT NOT NULL,
+                    identifier TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    PRIMARY KEY (scheme, identifier)
+                );
+                """
+            )
+            conn.execute(
+                "INSERT INTO meta VALUES (?, ?, ?)", (self.version, *file_stat)
+            )
+            with open(self.file_path, "rb") as source:
+                for position, (offset, length) in enumerate(
+                    self._iter_spans(source), start=1
+                ):
+                    conn.execute(
+                        "INSERT INTO records VALUES (?, ?, ?)",
+                        (position, offset, length),
+                    )
+                    record_ids = self._record_ids(
+                        self._read_span(source, offset, length)
+                    )
+                    # keep the first record for duplicate identifiers
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO ids VALUES (?, ?, ?)",
+                        [
+                            (scheme, identifier, position)
+                            for scheme, identifier in record_ids.items()
+                            if identifier
+                        ],
+                    )
+        conn.close()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        os.replace(tmp_path, self.index_path)
+
+    def _is_current(self, conn: sqlite3.Connection) -> bool:
+        try:
+            meta = conn.execute("SELECT version, size, mtime_ns FROM meta")
+            return tuple(meta.fetchone()) == (
+                self.version,
+                *self._file_stat(),
+            )
+        except sqlite3.DatabaseError:
+            return False
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return a connection to an up-to-date sidecar index."""
+        if self._conn is not None:
+            if self._is_current(self._conn):
+                return self._conn
+            self._conn.close()
+            self._conn = None
+
+        if self.index_path.exists():
+            conn = sqlite3.connect(self.index_path)
+            if self._is_current(conn):
+                self._conn = conn
+                return conn
+            conn.close()
+
+        self.build()
+        self._conn = sqlite3.connect(self.index_path)
+        return self._conn
+
+    def __len__(self) -> int:
+        """Return the number of records in the file."""
+        count = self._connection().execute("SELECT COUNT(*) FROM records")
+        return count.fetchone()[0]
+
+    def position_for(self, scheme: str, identifier: str) -> Optional[int]:
+        """Return the position of the record with an identifier.
+
+        params:
+            scheme (str): the identifier scheme (one of `schemes`)
+            identifier (str): the identifier of the record
+
+        returns:
+            int | None: the position of the record in the file (beginning
+                at 1), or None if no record has the identifier
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT position FROM ids WHERE scheme = ? AND identifier = ?",
+                (scheme, identifier),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def read(self, position: int) -> dict:
+        """Return the record at a position in the file (beginning at 1).
+
+        raises:
+            IndexError: if the file has no record at that position
+        """
+        return next(self.read_many([position]))
+
+    def read_many(self, positions: list[int]) -> Iterator[dict]:
+        """Read the records at several positions, in the order given.
+
+        raises:
+            IndexError: if the file has no record at one of the positions
+        """
+        conn = self._connection()
+        with open(self.file_path, "rb") as source:
+            for position in positions:
+                row = conn.execute(
+                    "SELECT offset, length FROM records WHERE position = ?",
+                    (position,),
+                ).fetchone()
+                if row is None:
+                    raise IndexError(
+                        f"No record at position {position} of "
+                        f"{self.file_path}"
+                    )
+                yield self._read_span(source, *row)
+
+
+class SerializedRecordIndex(RecordFileIndex):
+    """Byte-offset index for the serialized records (jsonl) file.
+
+    Positions in this index are line numbers in the jsonl file. Records
+    are indexed by DOI and by hclegacy-pid.
+    """
+
+    schemes = ["doi", "hclegacy-pid"]
+
+    def __init__(
+        self,
+        file_path: Optional[Path] = None,
+        index_path: Optional[Path] = None,
+    ):
+        """Initialize the index.
+
+        params:
+            file_path (Path): the path of the serialized records file.
+                Defaults to the RECORD_IMPORTER_SERIALIZED_PATH config value.
+            index_path (Path): the path of the sidecar index. Defaults to the
+                serialized records file path with `.index` appended.
+        """
+        super().__init__(
+            file_path or app.config["RECORD_IMPORTER_SERIALIZED_PATH"],
+            index_path,
+        )
+
+    def _iter_spans(self, source) -> Iterator[tuple[int, int]]:
+        offset = 0
+        for raw_line in source:
+            if raw_line.strip():
+                yield offset, len(raw_line)
+            offset += len(raw_line)
+
+    @staticmethod
+    def _record_ids(record: dict) -> dict:
+        ids = {"doi": record.get("pids", {}).get("doi", {}).get("identifier")}
+        identifiers = record.get("metadata", {}).get("identifiers", [])
+        ids["hclegacy-pid"] = (
+            identifiers[0].get("identifier") if identifiers else None
+        )
+        return ids
+
+
+class RawRecordIndex(RecordFileIndex):
+    """Byte-offset index for the raw export (records-for-import.json).
+
+    The raw export is a single json array of records. The file is
+    memory-mapped and the byte spans of the array's members are found
+    by scanning for brackets outside of json strings, so records can be
+    read one at a time (with `iter_records`) without parsing or holding
+    the whole export in memory. Positions in this index are 1-based
+    positions in the array. Records are indexed by their deposit DOI
+    and by their id (hclegacy-pid).
+    """
+
+    schemes = ["doi", "hclegacy-pid"]
+
+    # json strings (which may contain brackets) and structural brackets
+    _token = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]')
+
+    def __init__(
+        self,
+        file_path: Optional[Path] = None,
+        index_path: Optional[Path] = None,
+    ):
+        """Initialize the index.
+
+        params:
+            file_path (Path): the path of the raw export file. Defaults to
+                `records-for-import.json` in RECORD_IMPORTER_DATA_DIR.
+            index_path (Path): the path of the sidecar index. Defaults to the
+                raw export file path with `.index` appended.
+        """
+        super().__init__(
+            file_path
+            or Path(
+                app.config["RECORD_IMPORTER_DATA_DIR"],
+                "records-for-import.json",
+            ),
+            index_path,
+        )
+
+    def _iter_spans(self, source) -> Iterator[tuple[int, int]]:
+        if os.fstat(source.fileno()).st_size == 0:
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            depth = 0
+            start = 0
+            for match in self._token.finditer(mm):
+                token = mm[match.start()]
+                if token == ord('"'):
+                    continue
+                if token in b"[{":
+                    depth += 1
+                    if depth == 2:
+                        start = match.start()
+                else:
+                    depth -= 1
+                    if depth == 1:
+                        yield start, match.end() - start
+
+    @staticmethod
+    def _record_ids(record: dict) -> dict:
+        return {
+            "doi": record.get("deposit_doi"),
+            "hclegacy-pid": record.get("id"),
+        }
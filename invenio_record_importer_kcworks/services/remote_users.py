@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Pooled and cached client for a record source's remote user data API."""
+
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app as app
+import json
+import os
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+import sqlite3
+import time
+from typing import Iterable, Optional
+
+
+class RemoteUserClient:
+    """Client for the user data API of a record source.
+
+    The users are fetched from the "users" endpoint configured for the
+    record source in REMOTE_USER_DATA_API_ENDPOINTS (as used by the
+    invenio_remote_user_data module). All requests go through one
+    `requests.Session`, so connections to the API are pooled and kept
+    alive between lookups.
+
+    Successful responses are cached in a SQLite database and reused for
+    `cache_ttl` seconds, so that users looked up in an earlier run (or by
+    another worker process) are not fetched again. Error responses are
+    never cached.
+
+    `prefetch` fetches many users at once, with at most `max_workers`
+    requests in flight, so that a batch of records does not wait on the
+    API for each of its new submitters in turn.
+    """
+
+    def __init__(
+        self,
+        record_source: str,
+        endpoint_config: Optional[dict] = None,
+        cache_path: Optional[Path] = None,
+        cache_ttl: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        timeout: int = 10,
+    ):
+        """Initialize the client and open its cache.
+
+        params:
+            record_source (str): the name of the record source
+            endpoint_config (dict): the configuration of the users
+                endpoint, with the keys "remote_endpoint",
+                "remote_method", and "token_env_variable_label". Defaults
+                to the record source's entry in the
+                REMOTE_USER_DATA_API_ENDPOINTS config value.
+            cache_path (Path): the path of the SQLite cache. Defaults to
+                the RECORD_IMPORTER_REMOTE_USER_CACHE_PATH config value.
+            cache_ttl (int): the number of seconds for which a cached
+                response is used. Defaults to the
+                RECORD_IMPORTER_REMOTE_USER_CACHE_TTL config value (or one
+                day if a cache_path is given).
+            max_workers (int): the maximum number of concurrent requests
+                made by `prefetch`. Defaults to the
+                RECORD_IMPORTER_REMOTE_USER_WORKERS config value (or 8 if
+                a cache_path is given).
+            timeout (int): the timeout of each request in seconds
+        """
+        if endpoint_config is None:
+            endpoint_config = app.config["REMOTE_USER_DATA_API_ENDPOINTS"][
+                record_source
+            ]["users"]
+        if cache_path is None:
+            cache_path = app.config["RECORD_IMPORTER_REMOTE_USER_CACHE_PATH"]
+            if cache_ttl is None:
+                cache_ttl = app.config.get(
+                    "RECORD_IMPORTER_REMOTE_USER_CACHE_TTL", 86400
+                )
+            if max_workers is None:
+                max_workers = app.config.get(
+                    "RECORD_IMPORTER_REMOTE_USER_WORKERS", 8
+                )
+        self.record_source = record_source
+        self.endpoint = endpoint_config["remote_endpoint"]
+        self.method = endpoint_config["remote_method"]
+        self.cache_ttl = 86400 if cache_ttl is None else cache_ttl
+        self.max_workers = max_workers or 8
+        self.timeout = timeout
+        self._users = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_workers
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.verify = False
+        token = os.environ[endpoint_config["token_env_variable_label"]]
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+        self.cache_path = Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.cache_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                record_source TEXT NOT NULL,
+                source_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (record_source, source_id)
+            );
+            """
+        )
+
+    def _cached(self, source_id: str) -> Optional[dict]:
+        if source_id in self._users.keys():
+            return self._users[source_id]
+        row = self.conn.execute(
+            "SELECT data FROM users "
+            "WHERE record_source = ? AND source_id = ? AND fetched_at > ?",
+            (self.record_source, source_id, time.time() - self.cache_ttl),
+        ).fetchone()
+        if row is None:
+            return None
+        self._users[source_id] = json.loads(row[0])
+        return self._users[source_id]
+
+    def _fetch(self, source_id: str) -> requests.Response:
+        return self.session.request(
+            self.method,
+            url=f"{self.endpoint}/{source_id}",
+            timeout=self.timeout,
+        )
+
+    def _store(self, source_id: str, response: requests.Response):
+        """Return the data in a response, caching it if it is valid."""
+        if response.status_code != 200:
+            app.logger.error(
+                f"Error fetching user data from remote API: {response.url}"
+            )
+            app.logger.error(
+                "Response status code: " + str(response.status_code)
+            )
+        try:
+            data = response.json()
+        except requests.exceptions.JSONDecodeError:
+            app.logger.error(
+                "JSONDecodeError: User group data API response was not"
+                " JSON:"
+            )
+            return None
+        if response.status_code == 200:
+            self._users[source_id] = data
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+                    (
+                        self.record_source,
+                        source_id,
+                        json.dumps(data),
+                        time.time(),
+                    ),
+                )
+        return data
+
+    def get(self, source_id: str) -> Optional[dict]:
+        """Get a user's data by their id on the record source.
+
+        params:
+            source_id (str): the id of the user on the source service
+                (e.g. '1234')
+
+        returns:
+            dict | None: the user data returned by the API (which is the
+                API's error data if the user could not be fetched), or
+                None if the response was not JSON
+        """
+        source_id = str(source_id)
+        data = self._cached(source_id)
+        if data is not None:
+            return data
+        return self._store(source_id, self._fetch(source_id))
+
+    def prefetch(self, source_ids: Iterable[str]) -> dict:
+        """Fetch the data of several users concurrently.
+
+        The users that are not already cached are fetched with at most
+        `max_workers` concurrent requests. Users that cannot be fetched
+        are left out, so that the error is raised by `get` when the user
+        is looked up.
+
+        params:
+            source_ids (Iterable[str]): the ids of the users on the source
+                service
+
+        returns:
+            dict: the data of each user that was cached or fetched, keyed
+                by their source id
+        """
+        users = {}
+        missing = []
+        for source_id in dict.fromkeys(str(i) for i in source_ids):
+            data = self._cached(source_id)
+            if data is not None:
+                users[source_id] = data
+            else:
+                missing.append(source_id)
+        if not missing:
+            return users
+
+        def fetch(source_id):
+            try:
+                return self._fetch(source_id)
+            except requests.exceptions.RequestException as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            responses = list(executor.map(fetch, missing))
+        for source_id, response in zip(missing, responses):
+            if isinstance(response, Exception):
+                app.logger.warning(
+                    f"    could not prefetch user {source_id} from "
+                    f"{self.record_source}: {response}"
+                )
+            elif response.status_code == 200:
+                data = self._store(source_id, response)
+                if data is not None:
+                    users[source_id] = data
+        return users
+
+    def close(self) -> None:
+        """Close the session and the cache's database connection."""
+        self.session.close()
+        self.conn.close()
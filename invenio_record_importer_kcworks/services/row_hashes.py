@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Content hashes of the raw records behind the serialized records file."""
+
+from flask import current_app as app
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+from typing import Optional
+
+
+class RowHashStore:
+    """Content hashes of the raw CORE records that were serialized.
+
+    The store is kept in a sidecar SQLite file next to the serialized
+    records file (with the suffix `.hashes`). It maps the `id` of each raw
+    record to a SHA-256 hash of the record's contents, and records the
+    serializer stages that produced the serialized file. An incremental
+    serializer run compares the hashes of a refreshed export with the
+    stored ones to find the records that were added, changed, or removed.
+
+    The store is replaced as a whole (by `save`) at the end of each
+    completed serializer run, so it never describes a partly written
+    serialized records file.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """Initialize the store.
+
+        params:
+            db_path (Path): the path of the SQLite file. Defaults to the
+                RECORD_IMPORTER_SERIALIZED_PATH config value with `.hashes`
+                appended.
+        """
+        self.db_path = Path(
+            db_path
+            or f"{app.config['RECORD_IMPORTER_SERIALIZED_PATH']}.hashes"
+        )
+
+    @staticmethod
+    def row_hash(row: dict) -> str:
+        """Return the content hash of a raw record.
+
+        The hash does not depend on the order of the record's keys.
+
+        >>> RowHashStore.row_hash({"a": 1, "b": [2]}) == (
+        ...     RowHashStore.row_hash({"b": [2], "a": 1})
+        ... )
+        True
+        """
+        return hashlib.sha256(
+            json.dumps(row, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def compare(old: dict, new: dict) -> dict:
+        """Compare two mappings of record ids to hashes.
+
+        params:
+            old (dict): the stored hashes
+            new (dict): the hashes of the refreshed export
+
+        returns:
+            dict: lists of the "added" and "changed" ids (in the order of
+                `new`) and of the "removed" ids (in the order of `old`)
+
+        >>> RowHashStore.compare(
+        ...     {"hc:1": "a", "hc:2": "b", "hc:3": "c"},
+        ...     {"hc:1": "a", "hc:2": "x", "hc:4": "d"},
+        ... )
+        {'added': ['hc:4'], 'changed': ['hc:2'], 'removed': ['hc:3']}
+        """
+        return {
+            "added": [i for i in new if i not in old],
+            "changed": [i for i in new if i in old and old[i] != new[i]],
+            "removed": [i for i in old if i not in new],
+        }
+
+    def load(self) -> tuple[Optional[list[str]], dict]:
+        """Read the stored stages and hashes.
+
+        returns:
+            tuple[list | None, dict]: the names of the serializer stages
+                that produced the serialized file, and the hash of each
+                record keyed by its id. If there is no (readable) store,
+                the stages are None and the hashes are empty.
+        """
+        if not self.db_path.exists():
+            return None, {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            stages = conn.execute("SELECT stages FROM meta").fetchone()
+            hashes = dict(conn.execute("SELECT id, hash FROM rows"))
+        except sqlite3.DatabaseError:
+            return None, {}
+        finally:
+            conn.close()
+        if stages is None:
+            return None, {}
+        return json.loads(stages[0]), hashes
+
+    def save(self, hashes: dict, stages: list[str]) -> None:
+        """Replace the store's contents.
+
+        params:
+            hashes (dict): the hash of each serialized record, keyed by id
+            stages (list[str]): the names of the serializer stages run
+        """
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = Path(f"{self.db_path}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        conn = sqlite3.connect(tmp_path)
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE meta (stages TEXT NOT NULL);
+                CREATE TABLE rows (
+                    id TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL
+                );
+                """
+            )
+            conn.execute("INSERT INTO meta VALUES (?)", (json.dumps(stages),))
+            conn.executemany("INSERT INTO rows VALUES (?, ?)", hashes.items())
+        conn.close()
+        os.replace(tmp_path, self.db_path)
+
+    def clear(self) -> None:
+        """Delete the store."""
+        self.db_path.unlink(missing_ok=True)
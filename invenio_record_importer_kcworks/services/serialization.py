@@ -9,9 +9,13 @@
 
 from flask import current_app as app
 import json
-import jsonlines
 from pathlib import Path
 
+from invenio_record_importer_kcworks.services.record_index import (
+    RawRecordIndex,
+    SerializedRecordIndex,
+)
+
 
 class SerializationService:
     """Serialization service."""
@@ -29,13 +33,6 @@ class SerializationService:
     #     """Dump a record."""
     #     return self.serialize(record)
 
-    serialized_id_fetchers = {
-        "doi": "pids.doi.identifier",
-        "hclegacy-pid": lambda x: x["metadata"]["identifiers"][0][
-            "identifier"
-        ],
-    }
-
     raw_id_fetchers = {
         "doi": "deposit_doi",
         "hclegacy-pid": "id",
@@ -61,51 +58,45 @@ class SerializationService:
         When indices are provided they are treated as 0-based indices,
         not 1-based line numbers.
 
+        Records are read directly from their position in the serialized
+        file using the file's SerializedRecordIndex.
+
         Returns:
             list[dict]: List of serialized json records as python dictionaries.
         """
 
-        file_path = Path(app.config["RECORD_IMPORTER_SERIALIZED_PATH"])
+        record_index = SerializedRecordIndex(
+            Path(app.config["RECORD_IMPORTER_SERIALIZED_PATH"])
+        )
 
         serialized_recs = []
 
-        try:
-            with jsonlines.open(file_path) as reader:
-                iterlist = list(iter(reader))
-                if identifiers:
-                    id_fetch_path = cls.serialized_id_fetchers[id_scheme]
-                    for i in identifiers:
-                        if isinstance(id_fetch_path, str):
-                            record_val = [
-                                r
-                                for r in iterlist
-                                if cls._get_by_dot_string(r, id_fetch_path)
-                                == i
-                            ][0]
-                        else:
-                            record_val = [
-                                r for r in iterlist if id_fetch_path(r) == i
-                            ][0]
-                        if field_path:
-                            record_val = cls._get_by_dot_string(
-                                record_val, field_path
-                            )
-                        serialized_recs.append(
-                            {
-                                "id": i,
-                                "record": record_val,
-                            }
-                        )
-                elif indices:
-                    for n in indices:
-                        record_val = iterlist[int(n)]
-                        if field_path:
-                            record_val = cls._get_by_dot_string(
-                                record_val, field_path
-                            )
-                        serialized_recs.append({"id": n, "record": record_val})
-        except IndexError as e:
-            raise e
+        if identifiers:
+            for i in identifiers:
+                line_num = record_index.position_for(id_scheme, i)
+                if line_num is None:
+                    raise IndexError(f"No serialized record found for {i}")
+                record_val = record_index.read(line_num)
+                if field_path:
+                    record_val = cls._get_by_dot_string(
+                        record_val, field_path
+                    )
+                serialized_recs.append(
+                    {
+                        "id": i,
+                        "record": record_val,
+                    }
+                )
+        elif indices:
+            for n in indices:
+                n = int(n)
+                line_num = n + 1 if n >= 0 else len(record_index) + n + 1
+                record_val = record_index.read(line_num)
+                if field_path:
+                    record_val = cls._get_by_dot_string(
+                        record_val, field_path
+                    )
+                serialized_recs.append({"id": n, "record": record_val})
 
         return serialized_recs
 
@@ -136,51 +127,59 @@ class SerializationService:
         id_scheme: str = "doi",
         field_path: str = "",
     ) -> dict:
-        """Read raw data."""
+        """Read raw data.
+
+        Records are read directly from their position in the raw export
+        using the file's RawRecordIndex. If no record has an exact match
+        for a requested identifier, the first record whose identifier
+        contains it is returned.
+        """
 
-        file_path = Path(
-            app.config["RECORD_IMPORTER_DATA_DIR"],
-            "records-for-import.json",
+        raw_index = RawRecordIndex(
+            Path(
+                app.config["RECORD_IMPORTER_DATA_DIR"],
+                "records-for-import.json",
+            )
         )
 
         print(identifiers, indices, id_scheme, field_path)
 
         raw_records = []
 
-        with open(file_path) as file:
-            data = json.load(file)
-
-            if identifiers:
-                id_fetch_path = cls.raw_id_fetchers[id_scheme]
-                for i in identifiers:
-                    if isinstance(id_fetch_path, str):
-                        record_val = [
-                            d
-                            for d in data
-                            if i in cls._get_by_dot_string(d, id_fetch_path)
-                        ][0]
-                    else:
-                        record_val = [
-                            d for d in data if id_fetch_path(d) == i
-                        ][0]
-                    if field_path:
-                        record_val = cls._get_by_dot_string(
-                            record_val, field_path
-                        )
-                    raw_records.append(
-                        {
-                            "id": i,
-                            "record": record_val,
-                        }
+        if identifiers:
+            id_fetch_path = cls.raw_id_fetchers[id_scheme]
+            for i in identifiers:
+                position = raw_index.position_for(id_scheme, i)
+                if position is not None:
+                    record_val = raw_index.read(position)
+                else:
+                    # fall back to a partial match on the identifier
+                    record_val = [
+                        d
+                        for d in raw_index.iter_records()
+                        if i
+                        in (cls._get_by_dot_string(d, id_fetch_path) or "")
+                    ][0]
+                if field_path:
+                    record_val = cls._get_by_dot_string(
+                        record_val, field_path
+                    )
+                raw_records.append(
+                    {
+                        "id": i,
+                        "record": record_val,
+                    }
+                )
+        elif indices:
+            for n in indices:
+                n = int(n)
+                position = n + 1 if n >= 0 else len(raw_index) + n + 1
+                record_val = raw_index.read(position)
+                if field_path:
+                    record_val = cls._get_by_dot_string(
+                        record_val, field_path
                     )
-            elif indices:
-                for n in indices:
-                    record_val = data[int(n)]
-                    if field_path:
-                        record_val = cls._get_by_dot_string(
-                            record_val, field_path
-                        )
-                    raw_records.append({"id": n, "record": record_val})
+                raw_records.append({"id": n, "record": record_val})
 
         return raw_records
 
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Indexed FAST subject vocabulary used by the serializer."""
+
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+import unicodedata
+
+# FAST ids for subject labels found in the legacy data without an id
+# (all topical headings)
+# FIXME: Finish finding id numbers
+FAST_SUBJECT_IDS = {
+    "Linguistics": "999202",
+    "Digital humanities": "963599",
+    "Arabic language": "812287",
+    "Spanish language": "1128292",
+    "American literature": "807113",
+    "English literature": "911989",
+    "Poetics": "1067682",
+    "Comparative literature": "1734553",
+    "Literature and science": "1000093",
+    "German language": "941408",
+    "Philosophy": "1060777",
+    "Ethics": "915833",
+    "Religion": "1093763",
+    "Rhetoric": "1096948",
+    "Portuguese literature": "1072577",
+    "Biopolitics": "832668",
+    "Irish literature": "979030",
+    "Literature": "999953",
+    "Church history": "860740",
+    "British literature": "839082",
+    "Animal rights": "809364",
+    "Art criticism": "815492",
+    "Sculpture": "1109483",
+    "Research libraries": "1095327",
+    "Writing": "1181638",
+    "Anthropology": "810196",
+    "Environmental sociology": "1749638",
+    "Ethnomusicology": "916186",
+    "Film criticism": "924259",
+    "Continental philosophy": "1765182",
+    "Critical geography": "2031407",
+    "Earth sciences": "900729",
+    # 'Arts': '',
+    "Geography": "940469",
+    "History": "1411628",
+    "Greek literature": "947441",
+    "Jewish literature": "982834",
+    "Spanish literature": "1128568",
+    # "Ethnic studies": "",
+    "Library science": "997916",
+    "Music": "1030269",
+    "Psychiatry": "1081152",
+    "Aesthetics": "798702",
+    "Ecocriticism": "901428",
+    "Economics": "902116",
+    "Intertextuality": "977562",
+    "American poetry": "807348",
+    "Beat literature": "2002327",
+    "Dutch literature": "899846",
+    "Italian literature": "980660",
+    "Feminism": "922671",
+    "Music libraries": "1030573",
+    "Musicology": "1030893",
+    "Character": "852264",
+    "Sustainability": "1747391",
+    "Cognitive science": "866547",
+    "Polish language": "1068925",
+    "Postmodernism": "1073164",
+    "Neoliberalism": "1737382",
+    "Imperialism": "968126",
+}
+
+# Subject labels in the legacy data with no FAST equivalent. These are
+# kept as user-defined tags.
+MISSING_SUBJECTS = [
+    "17th century",
+    "19th-century German literature",
+    "20th century",
+    "Accelerationism",
+    "African American culture",
+    "African American studies",
+    "African studies",
+    "American art",
+    "American studies",
+    "Ancient Greece",
+    "Ancient history",
+    "Ancient literature",
+    "Ancient Mediterranean religions",
+    "Archival studies",
+    "Arts",
+    "Asian history",
+    "Asian-American studies",
+    "Behavioral anthropology",
+    "Biblical studies",
+    "Bibliography",
+    "Biography",
+    "Classical studies",
+    "Coming-of-age literature",
+    "Comparative religious ethics",
+    "Contemporary art",
+    "Criticism of the arts",
+    "Cultural anthropology",
+    "Data sharing",
+    "Early Christianity",
+    "Education",
+    "English",
+    "European history",
+    "Film studies",
+    "Hebrew bible",
+    "Immigration history",
+    "Late Antiquity",
+    "Literary criticism",
+    "Literature and economics",
+    "Literature and philosophy",
+    "Medieval studies",
+    "Migration studies",
+    "Modern history",
+    "Music analysis",
+    "Music composition",
+    "Music criticism",
+    "Music information retrieval",
+    "Native American literature",
+    "Pentateuchal studies",
+    "Poesia",
+    "Polish culture",
+    "Polish studies",
+    "Poetry",
+    "Postcolonial literature",
+    "Public humanities",
+    "Religions of late Antiquity",
+    "Romanticism",
+    "Scholarly communication",
+    "Sociology of development",
+    "Theory of the arts",
+    "Translation studies",
+    "Urban studies",
+]
+
+# Corrected FAST subject strings for malformed or mislabeled subjects in
+# the legacy data
+SUBJECT_CORRECTIONS = {
+    "1178850:Transnationalism:topical": ("1154884:Transnationalism:topical"),
+    "815177:Art, American:topical": "815895:Art, American:topical",
+    "1205213:Cyprus:topical": "1205213:Cyprus:geographic",
+    "1240495:Asia:topical": "1240495:Asia:geographic",
+    "1205757:Civilization, Ancient:topical": (
+        "862946:Civilization, Ancient:topical"
+    ),
+    "1239509:Africa:topical": "1239509:Africa:geographic",
+    "29097:Dante Alighieri, 1265-1321:topical": (
+        "29097:Dante Alighieri, 1265-1321:personal"
+    ),
+    "1020301:Middles Ages:topical": "1020301:Middle Ages:topical",
+    "1204082:Japan:topical": "1204082:Japan:geographic",
+    "1204543:Australia:topical": "1204543:Australia:geographic",
+    "1208380:Greece:topical": "1208380:Greece:geographic",
+    "1242804:Scandinavia:topical": "1242804:Scandinavia:geographic",
+    "1411635:Criticism, interpretation, etc.:topical": (
+        "1411635:Criticism, interpretation, etc.:form"
+    ),
+    "21st-century American literature": ("807113:American literature:topical"),
+    "863509:Classsical literature:topical": (
+        "863509:Classical literature:topical"
+    ),
+    "Academic librarianship": "794993:Academic librarians:topical",
+    "Ancient law": "993683:Law--Antiquities:topical",
+    "Apostle Paul": "288253:St. Paul:personal",
+    "Art history": "815264:Art--History:topical",
+    "Australasian/Pacific literature": (
+        "821406:Australasian literature:topical"
+    ),
+    "Aesthetic theory": "798702:Aesthetics:topical",
+    "Book history": "836420:Books--History:topical",
+    "Central Europe": "1244544:Central Europe:geographic",
+    "Comics": "1921613:Comics (Graphic works):form",
+    "Contemporary history": ("1865054:History of contemporary events:topical"),
+    "Cultural history": "885069:Culture--History:topical",
+    "Cultural studies": "885059:Culture:topical",
+    "Digital communication": "893634:Digital communications:topical",
+    "Epicurus": "44478:Epicurus:personal",
+    "Epigraphy": "973837:Inscriptions:topical",
+    "Ethnic studies": "916061:Ethnicity--Study and teaching:topical",
+    "Feminisms": "922671:Feminism:topical",
+    "Feminist art history": "922756:Feminist art criticism:topical",
+    "Gender studies": "939598:Gender identity--Research:topical",
+    "Gospels": "1766655:Bible stories, English--N.T. Gospels:topical",
+    "Graphic novels": "1726630:Graphic novels:form",
+    "Harlem Renaissance": "951467:Harlem Renaissance:topical",
+    "Historical musicology": "1030896:Musicology--History:topical",
+    "History of religions": "1093783:Religion--History:topical",
+    "History of the arts": "817758:Arts--History:topical",
+    "Holocaust studies": "958866:Jewish Holocaust (1939-1945):topical",
+    "Illuminated manuscripts": (
+        "967235:Illumination of books and manuscripts:topical"
+    ),
+    "India": "1210276:India:geographic",
+    "Interdisciplinary studies": ("976131:Interdisciplinary research:topical"),
+    "Internet sociology": "1766793:Internet--Social aspects:topical",
+    "Jack Kerouac": "52352:Kerouac, Jack, 1922-1969:personal",
+    "James Joyce": "370728:Joyce, James:personal",
+    "Labor history": "989812:Labor--History:topical",
+    "Latin America": "1245945:Latin America:geographic",
+    "Latin American studies": "1245945:Latin America:geographic",
+    "Library and information science": "997916:Library science:topical",
+    "Literary theory": "1353577:Literature--Theory:topical",
+    "Literature and psychology": ("1081551:Psychology and literature:topical"),
+    "Manuscript studies": "1008230:Manuscripts:topical",
+    "Medieval literature": "1000151:Literature, Medieval:topical",
+    "Music history": "1030330:Music--History:topical",
+    "Music performance": "1030398:Music--Performance:topical",
+    "Poetics and poetry": "1067682:Poetics:topical",
+    "Political philosophy": ("1060799:Philosophy--Political aspects:topical"),
+    "Portuguese culture": ("1072404:Portuguese--Ethnic identity:topical"),
+    "Religious studies": "1093763:Religion:topical",
+    "Shakespeare": "314312:Shakespeare, William, 1849-1931:personal",
+    "Social anthropology": ("810233:Anthropology--Social aspects:topical"),
+    "Sociology of aging": "800348:Aging--Social aspects:topical",
+    "Sociology of agriculture": ("801646:Agriculture--Social aspects:topical"),
+    "Sociology of culture": "885083:Culture--Social aspects:topical",
+    "Sociology of finance": (
+        "842573:Business enterprises--Finance--Social aspects:topical"
+    ),
+    "Stanley Cavell": "28565:Cavell, Stanley, 1926-2018:personal",
+    "Translation": "1154795:Translating and interpreting:topical",
+    "Translation of poetry": ("1067745:Poetry--Translating:topical"),
+    "Venezuela": "1204166:Venezuela:geographic",
+}
+
+
+def normalize_subject_label(label: str) -> str:
+    """Return the casefolded, normalized index key for a subject label.
+
+    >>> normalize_subject_label("  Digital   HUMANITIES ")
+    'digital humanities'
+    """
+    return " ".join(unicodedata.normalize("NFC", label).split()).casefold()
+
+
+class SubjectVocabulary:
+    """Index of FAST subject headings keyed by normalized label.
+
+    The index maps the casefolded and normalized label of each heading to
+    its FAST id number, display label, and facet, so subject labels from
+    the legacy data can be looked up in constant time regardless of case
+    or spacing. It is built from FAST_SUBJECT_IDS and can be extended with
+    the entries of a subjects vocabulary file (see `load_file`).
+
+    >>> vocab = SubjectVocabulary()
+    >>> vocab.lookup("digital humanities")
+    '963599:Digital humanities:topical'
+    >>> vocab.is_missing("poetry")
+    True
+    """
+
+    def __init__(self, subject_ids: Optional[dict] = None):
+        """Build the index.
+
+        params:
+            subject_ids (dict): topical headings to index, as a mapping
+                from label to FAST id number. Defaults to FAST_SUBJECT_IDS.
+        """
+        self._index = {}
+        self._missing = frozenset(
+            normalize_subject_label(s) for s in MISSING_SUBJECTS
+        )
+        if subject_ids is None:
+            subject_ids = FAST_SUBJECT_IDS
+        for label, id_num in subject_ids.items():
+            self.add(id_num, label, "topical")
+
+    def __len__(self) -> int:
+        """Return the number of indexed headings."""
+        return len(self._index)
+
+    def add(
+        self, id_num: str, label: str, facet: str, replace: bool = False
+    ) -> bool:
+        """Add a heading to the index.
+
+        params:
+            id_num (str): the FAST id number of the heading
+            label (str): the heading's label
+            facet (str): the FAST facet of the heading (e.g. "topical")
+            replace (bool): whether to replace an existing heading with the
+                same normalized label. Defaults to False.
+
+        returns:
+            bool: whether the heading was added
+        """
+        key = normalize_subject_label(label)
+        if key in self._index and not replace:
+            return False
+        self._index[key] = (str(id_num), label, facet)
+        return True
+
+    def load(self, entries: Iterable[dict], replace: bool = False) -> int:
+        """Add the FAST headings from subjects vocabulary entries.
+
+        Each entry has the shape of an InvenioRDM subjects vocabulary
+        record, e.g. `{"id": "http://id.worldcat.org/fast/963599",
+        "scheme": "FAST-topical", "subject": "Digital humanities"}`.
+        Entries from other schemes are ignored.
+
+        returns:
+            int: the number of headings added
+        """
+        added = 0
+        for entry in entries:
+            scheme = entry.get("scheme", "")
+            if not scheme.startswith("FAST-") or not entry.get("subject"):
+                continue
+            id_num = str(entry["id"]).rstrip("/").rsplit("/", 1)[-1]
+            added += self.add(
+                id_num, entry["subject"], scheme[len("FAST-") :], replace
+            )
+        return added
+
+    def load_file(self, file_path: Path, replace: bool = False) -> int:
+        """Add the FAST headings from a subjects vocabulary file.
+
+        The file may be a json lines file (.jsonl), a json array (.json),
+        or a YAML list (.yaml or .yml) of vocabulary entries (see `load`).
+
+        returns:
+            int: the number of headings added
+        """
+        file_path = Path(file_path)
+        with open(file_path, encoding="utf-8") as vocab_file:
+            if file_path.suffix in [".yaml", ".yml"]:
+                import yaml
+
+                entries = yaml.safe_load(vocab_file) or []
+            elif file_path.suffix == ".jsonl":
+                entries = [
+                    json.loads(line) for line in vocab_file if line.strip()
+                ]
+            else:
+                entries = json.load(vocab_file)
+        return self.load(entries, replace)
+
+    def lookup(self, label: str) -> Optional[str]:
+        """Return the FAST subject string for a label.
+
+        returns:
+            str | None: the subject as "id:label:facet", or None if the
+                label is not in the index
+        """
+        heading = self._index.get(normalize_subject_label(label))
+        return ":".join(heading) if heading else None
+
+    def is_missing(self, label: str) -> bool:
+        """Return whether a label is known to have no FAST heading."""
+        return normalize_subject_label(label) in self._missing
+
+    @staticmethod
+    def correct(subject: str) -> str:
+        """Return the corrected subject string for a known bad subject."""
+        return SUBJECT_CORRECTIONS.get(subject, subject)
@@ -40,3 +40,31 @@ def aggregate_events(
         app.logger.warning(f"Aggregator task complete {aggr_name}")
 
     return results
+
+
+@shared_task(ignore_result=False)
+def load_record_chunk(
+    load_tasks: list, no_updates: bool = False, defer_indexing: bool = False
+) -> list:
+    """Import a chunk of serialized records.
+
+    Each item in `load_tasks` holds the keyword arguments for one call
+    to `record_loader._load_record`. Returns the list of record outcomes
+    so that they can be logged by the process that queued the task (see
+    `record_loader._load_records_with_celery`). If `defer_indexing` is
+    True, the records changed by the chunk are queued for bulk indexing
+    when the chunk is loaded.
+
+    The task never raises. If the chunk fails as a whole, its records
+    are returned as "failed" outcomes.
+    """
+    from .record_loader import _failed_chunk_outcomes, _load_record_chunk
+
+    try:
+        return _load_record_chunk(load_tasks, no_updates, defer_indexing)
+    except Exception as e:
+        app.logger.error(
+            f"    failed to load the chunk of records "
+            f"{[t['index'] for t in load_tasks]}: {e}"
+        )
+        return _failed_chunk_outcomes(load_tasks, e)
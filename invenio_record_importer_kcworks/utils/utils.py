@@ -12,22 +12,26 @@ Utility functions for core-migrate
 """
 
 from datetime import datetime
+from functools import lru_cache
 from flask import current_app as app
 from flask_security.utils import hash_password
 from invenio_access.permissions import system_identity
 from invenio_accounts.proxies import current_accounts
 from invenio_communities.proxies import current_communities
 from invenio_communities.members.records.api import Member
+from invenio_record_importer_kcworks.services.remote_users import (
+    RemoteUserClient,
+)
 from invenio_search.proxies import current_search_client
 from isbnlib import is_isbn10, is_isbn13, clean
-import os
 import random
 import re
-import requests
 import string
 from typing import Any, Union
 import unicodedata
 
+NORMALIZED_STRING_CACHE_SIZE = 65536
+
 
 class IndexHelper:
 
@@ -91,6 +95,8 @@ class IndexHelper:
 class UsersHelper:
     """A collection of methods for working with users."""
 
+    _remote_user_clients: dict = {}
+
     def __init__(self):
         pass
 
@@ -107,14 +113,33 @@ class UsersHelper:
         assert len(admin_role_holders) > 0  # should be at least one admin
         return admin_role_holders
 
-    @staticmethod
-    def get_user_by_source_id(source_id: str, record_source: str) -> dict:
+    @classmethod
+    def remote_user_client(cls, record_source: str) -> RemoteUserClient:
+        """Get this process's client for a record source's user data API.
+
+        :param record_source: The name of the source service (e.g.
+            'knowledgeCommons')
+
+        :returns: The RemoteUserClient for the record source, created on
+            first use
+        """
+        if record_source not in cls._remote_user_clients.keys():
+            cls._remote_user_clients[record_source] = RemoteUserClient(
+                record_source
+            )
+        return cls._remote_user_clients[record_source]
+
+    @classmethod
+    def get_user_by_source_id(cls, source_id: str, record_source: str) -> dict:
         """Get a user by their source id.
 
         Note that this method depends on the invenio_remote_user_data module
         being installed and configured. The record_source parameter should
         correspond to the name of a remote api in the REMOTE_USER_DATA_API_ENDPOINTS config variable.
 
+        The lookup goes through the record source's RemoteUserClient, so
+        users fetched recently (or prefetched) are read from its cache.
+
         :param source_id: The id of the user on the source service from which
             the record is coming (e.g. '1234')
         :param record_source: The name of the source service from which the
@@ -122,38 +147,9 @@ class UsersHelper:
 
         :returns: A dictionary containing the user data
         """
-        endpoint_config = app.config.get("REMOTE_USER_DATA_API_ENDPOINTS")[
-            record_source
-        ]["users"]
-
-        remote_api_token = os.environ[
-            endpoint_config["token_env_variable_label"]
-        ]
-        api_url = f"{endpoint_config['remote_endpoint']}/{source_id}"
-        headers = {"Authorization": f"Bearer {remote_api_token}"}
-        response = requests.request(
-            endpoint_config["remote_method"],
-            url=api_url,
-            headers=headers,
-            verify=False,
-            timeout=10,
-        )
-        if response.status_code != 200:
-            app.logger.error(
-                f"Error fetching user data from remote API: {api_url}"
-            )
-            app.logger.error(
-                "Response status code: " + str(response.status_code)
-            )
-        try:
-            app.logger.debug(response.json())
-            return response.json()
-        except requests.exceptions.JSONDecodeError:
-            app.logger.error(
-                "JSONDecodeError: User group data API response was not"
-                " JSON:"
-            )
-            return None
+        user_data = cls.remote_user_client(record_source).get(source_id)
+        app.logger.debug(user_data)
+        return user_data
 
 
 class CommunityRecordHelper:
@@ -359,6 +355,21 @@ class CommunityRecordHelper:
         return owner
 
 
+def init_worker_app_context() -> None:
+    """
+    Set up the application context for a worker process.
+
+    Used as the initializer for the process pools of the loader and the
+    serializer. Each worker builds its own application so that it has its
+    own database session and search client rather than sharing the
+    connections of the parent process.
+    """
+    from invenio_app.factory import create_app
+
+    worker_app = create_app()
+    worker_app.app_context().push()
+
+
 def generate_random_string(length):
     """
     Generate a random string of lowercase letters and integer numbers.
@@ -439,66 +450,94 @@ def compare_metadata(A: dict, B: dict) -> dict:
         elif a is None:
             return a is b
         elif type(a) is list:
+            if a == b:
+                return True
             return all(deep_compare(a[i], b[i]) for i in range(len(a)))
         elif type(a) is dict:
             # if the key "en" is present, then we only care about that
             # because Invenio automatically adds other translations
             # to things like titles
-            if "en" in list(a.keys()):
-                a = {k: v for k, v in a.items() if k == "en"}
+            if "en" in a:
+                a = {"en": a["en"]}
+            elif a == b:
+                return True
             return all(deep_compare(a[k], b[k]) for k in a.keys())
 
+    def index_by_key(items, key):
+        # the first item wins if several share a normalized key
+        index = {}
+        for item in items:
+            index.setdefault(_normalize_punctuation(item.get(key)), item)
+        return index
+
     def obj_list_compare(list_name, key, a, b, comparators):
-        VERBOSE = True
-        if VERBOSE:
-            app.logger.debug(f"comparing {list_name} &&&&&&")
-            app.logger.debug(a.get(list_name))
-            app.logger.debug(b.get(list_name))
         out = {}
         if list_name not in a.keys():
             a[list_name] = []
         if list_name not in b.keys():
             b[list_name] = []
-        existing_items = [
-            _normalize_punctuation(i.get(key)) for i in a[list_name]
-        ]
+        existing_items = index_by_key(a[list_name], key)
+        # matching an item requires every existing item to have the key
+        keyless = any(key not in i2 for i2 in a[list_name])
         for i in b[list_name]:
-            if _normalize_punctuation(i[key]) not in existing_items:
+            i_2 = existing_items.get(_normalize_punctuation(i[key]))
+            if i_2 is None:
                 out.setdefault("A", []).append({})
                 out.setdefault("B", []).append(i)
-            else:
-                same = True
-                i_2 = [
-                    i2
-                    for i2 in a[list_name]
-                    if _normalize_punctuation(i2[key])
-                    == _normalize_punctuation(i[key])
-                ][0]
-                for k in comparators:
-                    if not (
-                        deep_compare(
-                            _normalize_punctuation(i[k]),
-                            _normalize_punctuation(i_2[k]),
-                        )
-                    ):
-                        if VERBOSE:
-                            app.logger.debug(f"{k} is different: {i} != {i_2}")
-                        same = False
-                if not same:
-                    out.setdefault("A", []).append(i_2)
-                    out.setdefault("B", []).append(i)
+                continue
+            if keyless:
+                raise KeyError(key)
+            if i_2 == i and all(k in i for k in comparators):
+                continue
+            elif not all(
+                [
+                    deep_compare(
+                        _normalize_punctuation(i[k]),
+                        _normalize_punctuation(i_2[k]),
+                    )
+                    for k in comparators
+                ]
+            ):
+                out.setdefault("A", []).append(i_2)
+                out.setdefault("B", []).append(i)
         if len(a[list_name]) != len(b[list_name]):
             out.setdefault("A", []).append(a[list_name])
             out.setdefault("B", []).append(b[list_name])
-
-        if VERBOSE:
-            app.logger.debug(f"comparing {list_name} &&&&&&")
-        if VERBOSE:
-            app.logger.debug(a[list_name])
-        if VERBOSE:
-            app.logger.debug(b[list_name])
         return out
 
+    def same_person(c, c_2):
+        if (
+            c == c_2
+            and "person_or_org" in c
+            and "role" in c
+            and "id" in c["role"]
+        ):
+            return True
+        same = True
+        if _normalize_punctuation(
+            c_2["person_or_org"].get("name")
+        ) != _normalize_punctuation(c["person_or_org"].get("name")):
+            same = False
+        for k in c["person_or_org"].keys():
+            if k == "identifiers":
+                if (
+                    k not in c_2["person_or_org"].keys()
+                    or c["person_or_org"][k] != c_2["person_or_org"][k]
+                ):
+                    same = False
+            else:
+                if k not in c_2[
+                    "person_or_org"
+                ].keys() or _normalize_punctuation(
+                    c["person_or_org"][k]
+                ) != _normalize_punctuation(
+                    c_2["person_or_org"][k]
+                ):
+                    same = False
+        if "role" not in c_2.keys() or c["role"]["id"] != c_2["role"]["id"]:
+            same = False
+        return same
+
     def compare_people(list_a, list_b):
         people_diff = {}
         if not list_a:
@@ -509,34 +548,8 @@ def compare_metadata(A: dict, B: dict) -> dict:
                 people_diff["B"] = list_b
                 return people_diff
         for idx, c in enumerate(list_b):
-            same = True
             c_2 = list_a[idx]  # order should be the same
-            if _normalize_punctuation(
-                c_2["person_or_org"].get("name")
-            ) != _normalize_punctuation(c["person_or_org"].get("name")):
-                same = False
-            for k in c["person_or_org"].keys():
-                if k == "identifiers":
-                    if (
-                        k not in c_2["person_or_org"].keys()
-                        or c["person_or_org"][k] != c_2["person_or_org"][k]
-                    ):
-                        same = False
-                else:
-                    if k not in c_2[
-                        "person_or_org"
-                    ].keys() or _normalize_punctuation(
-                        c["person_or_org"][k]
-                    ) != _normalize_punctuation(
-                        c_2["person_or_org"][k]
-                    ):
-                        same = False
-            if (
-                "role" not in c_2.keys()
-                or c["role"]["id"] != c_2["role"]["id"]
-            ):
-                same = False
-            if not same:
+            if not same_person(c, c_2):
                 people_diff.setdefault("A", []).append(c_2)
                 people_diff.setdefault("B", []).append(c)
         return people_diff
@@ -617,39 +630,27 @@ def compare_metadata(A: dict, B: dict) -> dict:
         if "additional_titles" in meta_b.keys():
             if "additional_titles" not in meta_a.keys():
                 meta_a["additional_titles"] = []
-            existing_titles = [
-                _normalize_punctuation(t["title"])
-                for t in meta_a["additional_titles"]
-            ]
+            existing_titles = {}
+            for t in meta_a["additional_titles"]:
+                existing_titles.setdefault(
+                    _normalize_punctuation(t["title"]), t
+                )
             for t in meta_b["additional_titles"]:
-                if _normalize_punctuation(t["title"]) not in existing_titles:
+                t_2 = existing_titles.get(_normalize_punctuation(t["title"]))
+                if t_2 is None:
                     meta_diff["A"].setdefault("additional_titles", []).append(
                         {}
                     )
                     meta_diff["B"].setdefault("additional_titles", []).append(
                         t
                     )
-                else:
-                    same = True
-                    t_2 = [
-                        t2
-                        for t2 in meta_a["additional_titles"]
-                        if _normalize_punctuation(t2["title"])
-                        == _normalize_punctuation(t["title"])
-                    ][0]
-                    if (
-                        _normalize_punctuation(t["title"])
-                        != _normalize_punctuation(t_2["title"])
-                        or t["type"]["id"] != t_2["type"]["id"]
-                    ):
-                        same = False
-                    if not same:
-                        meta_diff["A"].setdefault(
-                            "additional_titles", []
-                        ).append(t_2)
-                        meta_diff["B"].setdefault(
-                            "additional_titles", []
-                        ).append(t)
+                elif t["type"]["id"] != t_2["type"]["id"]:
+                    meta_diff["A"].setdefault("additional_titles", []).append(
+                        t_2
+                    )
+                    meta_diff["B"].setdefault("additional_titles", []).append(
+                        t
+                    )
 
         if "identifiers" in meta_b.keys() or "identifiers" in meta_a.keys():
             comp = obj_list_compare(
@@ -915,18 +916,7 @@ def _normalize_punctuation(mystring) -> str:
     display.
     """
     if isinstance(mystring, str):
-        mystring = mystring.replace("’", "'")
-        mystring = mystring.replace("‘", "'")
-        mystring = mystring.replace("“", '"')
-        mystring = mystring.replace("”", '"')
-        mystring = mystring.replace("&amp;", "&")
-        mystring = mystring.replace("'", "'")
-        mystring = mystring.replace('"', '"')
-        mystring = re.sub("[ ]+", " ", mystring)
-        mystring = mystring.strip()
-        mystring = unicodedata.normalize("NFC", mystring)
-        mystring = mystring.replace("\r\n", "\n")
-        return mystring
+        return _normalize_punctuation_str(mystring)
     elif isinstance(mystring, list):
         return [_normalize_punctuation(i) for i in mystring]
     elif isinstance(mystring, dict):
@@ -935,6 +925,28 @@ def _normalize_punctuation(mystring) -> str:
         return mystring
 
 
+@lru_cache(maxsize=NORMALIZED_STRING_CACHE_SIZE)
+def _normalize_punctuation_str(mystring: str) -> str:
+    """Normalize the punctuation in a string (memoized).
+
+    The same strings (titles, names, identifiers) are normalized many
+    times while records are compared, so the results are kept in a
+    bounded LRU cache.
+    """
+    mystring = mystring.replace("’", "'")
+    mystring = mystring.replace("‘", "'")
+    mystring = mystring.replace("“", '"')
+    mystring = mystring.replace("”", '"')
+    mystring = mystring.replace("&amp;", "&")
+    mystring = mystring.replace("'", "'")
+    mystring = mystring.replace('"', '"')
+    mystring = re.sub("[ ]+", " ", mystring)
+    mystring = mystring.strip()
+    mystring = unicodedata.normalize("NFC", mystring)
+    mystring = mystring.replace("\r\n", "\n")
+    return mystring
+
+
 def _clean_backslashes_and_spaces(mystring: str) -> str:
     """
     Remove unwanted characters from a string and return it.
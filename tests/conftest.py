@@ -8,6 +8,7 @@
 # details.
 
 # from traceback import format_exc
+import jsonlines
 import pytest
 from invenio_app.factory import create_api
 from invenio_communities.proxies import current_communities
@@ -249,7 +250,13 @@ test_config["RECORD_IMPORTER_COMMUNITIES_DATA"] = {
 
 @pytest.fixture(scope="module")
 def serialized_records(app):
-    actual_serialized_json, actual_bad_data = serialize_json()
+    serialize_json()
+    with jsonlines.open(app.config["RECORD_IMPORTER_SERIALIZED_PATH"]) as r:
+        actual_serialized_json = list(r)
+    with jsonlines.open(
+        app.config["RECORD_IMPORTER_SERIALIZED_FAILED_PATH"]
+    ) as r:
+        actual_bad_data = {f["id"]: f["errors"] for f in r}
     return {
         "actual_serialized_json": actual_serialized_json,
         "actual_bad_data": actual_bad_data,
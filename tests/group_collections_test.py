@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from invenio_record_importer_kcworks.services.group_collections import (
+    GroupCollectionCache,
+)
+
+
+def test_group_collection_cache(tmp_path):
+    db_path = tmp_path / "group_collections.sqlite3"
+
+    cache = GroupCollectionCache(
+        "knowledgeCommons", db_path=db_path, skipped=["344"]
+    )
+    assert cache.uncached(["1000", "1001", "344", "1000"]) == [
+        "1000",
+        "1001",
+    ]
+    cache.add("1000", {"id": "abcd", "slug": "group-1000"})
+    cache.add_missing(1001)
+    assert cache.get("1000")["slug"] == "group-1000"
+    assert cache.is_missing("1001")
+    assert not cache.is_skipped("1001")
+    assert cache.is_skipped("344")
+    assert cache.uncached(["1000", "1001", "344", "1002"]) == ["1002"]
+    cache.close()
+
+    # a new cache reads the stored entries, but not the skipped ids
+    cache = GroupCollectionCache("knowledgeCommons", db_path=db_path)
+    assert cache.get(1000) == {"id": "abcd", "slug": "group-1000"}
+    assert cache.is_missing("1001")
+    assert not cache.is_skipped("344")
+
+    # a group found after all replaces its missing entry
+    cache.add("1001", {"id": "efgh"})
+    assert not cache.is_missing("1001")
+    cache.close()
+    cache = GroupCollectionCache("knowledgeCommons", db_path=db_path)
+    assert cache.get("1001") == {"id": "efgh"}
+    cache.close()
+
+    # entries are kept apart by record source
+    cache = GroupCollectionCache("otherSource", db_path=db_path)
+    assert cache.uncached(["1000", "1001"]) == ["1000", "1001"]
+    cache.close()
+
+
+def test_group_collection_cache_missing_expiry(tmp_path):
+    db_path = tmp_path / "group_collections.sqlite3"
+
+    cache = GroupCollectionCache("knowledgeCommons", db_path=db_path)
+    cache.add("1000", {"id": "abcd"})
+    cache.add_missing("1001")
+    cache.add_missing("1002")
+    cache.close()
+
+    # expired missing entries are looked up again, collections are kept
+    cache = GroupCollectionCache(
+        "knowledgeCommons", db_path=db_path, missing_ttl=0
+    )
+    assert not cache.is_missing("1001")
+    assert cache.uncached(["1000", "1001"]) == ["1001"]
+    cache.close()
+
+    # clearing the missing entries removes them from the database
+    cache = GroupCollectionCache("knowledgeCommons", db_path=db_path)
+    assert cache.is_missing("1001")
+    assert cache.clear_missing() == 2
+    assert not cache.is_missing("1001")
+    cache.close()
+    cache = GroupCollectionCache("knowledgeCommons", db_path=db_path)
+    assert cache.uncached(["1000", "1001", "1002"]) == ["1001", "1002"]
+    cache.close()
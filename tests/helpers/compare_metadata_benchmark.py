@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Microbenchmark for compare_metadata.
+
+The corpus is the sample records in tests/helpers/sample_records. Each
+loaded record is compared with its serialized record (as when an existing
+record is updated) and with a copy of itself (as when an unchanged record
+is imported again). Since compare_metadata fills in missing fields of the
+first record, every round compares fresh copies, made before timing
+starts.
+
+Run it from the repository root with:
+
+    python -m tests.helpers.compare_metadata_benchmark --rounds 200
+"""
+
+import argparse
+import copy
+import time
+
+from invenio_record_importer_kcworks.utils.utils import (
+    _normalize_punctuation_str,
+    compare_metadata,
+)
+from tests.helpers import sample_records
+
+
+def sample_pairs() -> list[tuple[dict, dict]]:
+    """Return the (existing, incoming) record pairs to compare."""
+    pairs = []
+    for name in dir(sample_records):
+        if name.startswith("rec"):
+            record = getattr(sample_records, name)
+            loaded = record["expected_loaded"]
+            pairs.append((loaded, record["expected_serialized"]))
+            pairs.append((loaded, loaded))
+    return pairs
+
+
+def run_rounds(pairs: list[tuple[dict, dict]], rounds: int):
+    """Return the seconds taken to compare every pair `rounds` times."""
+    copies = [copy.deepcopy(pairs) for _ in range(rounds)]
+    start = time.perf_counter()
+    for round_pairs in copies:
+        for existing, incoming in round_pairs:
+            compare_metadata(existing, incoming)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    arg_parser.add_argument("--rounds", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    pairs = sample_pairs()
+    calls = len(pairs) * args.rounds
+
+    _normalize_punctuation_str.cache_clear()
+    cold = run_rounds(pairs, 1)
+    warm = run_rounds(pairs, args.rounds)
+
+    print(f"{len(pairs)} record pairs, {args.rounds} rounds, {calls} calls")
+    print(f"first round: {cold:8.3f}s {len(pairs) / cold:12.0f} calls/s")
+    print(f"all rounds:  {warm:8.3f}s {calls / warm:12.0f} calls/s")
+    print(_normalize_punctuation_str.cache_info())
+
+
+if __name__ == "__main__":
+    main()
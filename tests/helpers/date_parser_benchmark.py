@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the invenio_record_importer_kcworks package.
+# Copyright (C) 2024, MESH Research.
+#
+# invenio_record_importer_kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see
+# LICENSE file for more details.
+
+"""Microbenchmark for DateParser.repair_date and DateParser.repair_range.
+
+The corpus is the set of inputs in the doctests of the two methods. Each
+round passes every input to both methods, first with the LRU caches
+emptied before every call and then with the caches in use.
+
+Run it from the repository root with:
+
+    python -m tests.helpers.date_parser_benchmark --rounds 20
+"""
+
+import argparse
+import doctest
+import re
+import time
+
+from invenio_record_importer_kcworks.libs.date_parser import DateParser
+
+
+def doctest_corpus() -> list[str]:
+    """Return the date strings used in the DateParser doctests."""
+    parser = doctest.DocTestParser()
+    call = re.compile(r"DateParser\.repair_(?:date|range)\((.*)\)\s*$")
+    corpus = []
+    for method in (DateParser.repair_date, DateParser.repair_range):
+        for example in parser.get_examples(method.__doc__):
+            match = call.match(example.source.strip())
+            if match:
+                corpus.append(eval(match.group(1)))
+    return corpus
+
+
+def run_rounds(repair_date, repair_range, corpus: list[str], rounds: int):
+    """Return the seconds taken to repair every input `rounds` times."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for date in corpus:
+            repair_date(date)
+            repair_range(date)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    arg_parser.add_argument("--rounds", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    corpus = doctest_corpus()
+    calls = len(corpus) * 2 * args.rounds
+
+    def without_cache(method):
+        def call(date):
+            DateParser.cache_clear()
+            return method(date)
+
+        return call
+
+    uncached = run_rounds(
+        without_cache(DateParser.repair_date),
+        without_cache(DateParser.repair_range),
+        corpus,
+        args.rounds,
+    )
+    DateParser.cache_clear()
+    cached = run_rounds(
+        DateParser.repair_date, DateParser.repair_range, corpus, args.rounds
+    )
+
+    print(f"{len(corpus)} inputs, {args.rounds} rounds, {calls} calls")
+    print(f"uncached: {uncached:8.3f}s {calls / uncached:12.0f} calls/s")
+    print(f"cached:   {cached:8.3f}s {calls / cached:12.0f} calls/s")
+    print(f"speedup:  {uncached / cached:8.1f}x")
+    print(DateParser.cache_info())
+
+
+if __name__ == "__main__":
+    main()
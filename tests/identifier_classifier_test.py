@@ -0,0 +1,80 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from idutils import detect_identifier_schemes
+import pytest
+from invenio_record_importer_kcworks.services.identifier_classifier import (
+    IdentifierClassifier,
+)
+
+IDENTIFIERS = [
+    "https://doi.org/10.17613/M6XS8R",
+    "http://dx.doi.org/10.1080/0305764X.2015.1011597",
+    "10.5281/zenodo.1234567",
+    "doi:10.1353/pmc.2011.0002",
+    "https://hdl.handle.net/2027/spo.3336451.0015.101",
+    "HTTPS://hdl.handle.net/2027/spo.3336451.0015.101",
+    "hdl.handle.net/2027/spo.3336451.0015.101",
+    "http://www.jstor.org/stable/10.5325/style.48.4.0529",
+    "https://viaf.org/viaf/102333412",
+    "978-0-19-955975-4",
+    "0-19-955975-X",
+    "0031-8108",
+    "12345",
+    "hc:12345",
+    "www.example.com/article",
+    "not an identifier",
+]
+
+
+def _idutils_schemes(value):
+    detected = detect_identifier_schemes(value)
+    if len(detected) < 1:
+        detected = detect_identifier_schemes(f"https://{value}")
+    return frozenset(detected) & IdentifierClassifier.RELEVANT_SCHEMES
+
+
+@pytest.mark.parametrize("value", IDENTIFIERS)
+def test_identifier_classifier_matches_idutils(value):
+    assert IdentifierClassifier().detect(value) == _idutils_schemes(value)
+
+
+def test_identifier_classifier_pre_classify():
+    pre_classify = IdentifierClassifier.pre_classify
+    assert pre_classify("https://doi.org/10.17613/M6XS8R") == {"doi", "url"}
+    assert pre_classify("https://hdl.handle.net/2027/spo.1") == {
+        "handle",
+        "url",
+    }
+    assert pre_classify("http://example.com/article") == {"url"}
+    assert pre_classify("0031-8108") == {"issn"}
+    # ambiguous shapes are left to idutils
+    assert pre_classify("https://viaf.org/viaf/102333412") is None
+    assert pre_classify("not an identifier") is None
+
+
+def test_identifier_classifier_stats():
+    classifier = IdentifierClassifier()
+    for value in ["http://example.com/a", "http://example.com/a", "ab cd"]:
+        classifier.detect(value)
+    assert classifier.normalize_doi("doi:10.1/ABC") == "10.1/ABC"
+    assert classifier.pop_stats() == {
+        "hits": 1,
+        "misses": 3,
+        "prefix": 1,
+        "idutils": 1,
+    }
+    assert classifier.pop_stats()["misses"] == 0
+
+
+def test_identifier_classifier_max_entries():
+    classifier = IdentifierClassifier(max_entries=2)
+    for value in ["http://a.org", "http://b.org", "http://c.org"]:
+        classifier.detect(value)
+    assert len(classifier._memos["detect"]) == 1
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from invenio_record_importer_kcworks.services.indexing import (
+    DeferredIndexing,
+)
+from opensearchpy.exceptions import NotFoundError
+from types import SimpleNamespace
+
+
+class _FakeIndexer:
+    calls = []
+
+    def __init__(self, name):
+        self.name = name
+
+    def index(self, record, arguments=None):
+        self.calls.append((self.name, "index", str(record.id)))
+
+    def bulk_index(self, record_ids):
+        self.calls.append((self.name, "bulk_index", list(record_ids)))
+
+    def delete(self, record, **kwargs):
+        if record.id == "never-indexed":
+            raise NotFoundError(404, "not_found")
+        self.calls.append((self.name, "delete", str(record.id)))
+
+
+class _FakeService:
+    def __init__(self):
+        self.config = SimpleNamespace(
+            indexer_cls=_FakeIndexer, draft_indexer_cls=_FakeIndexer
+        )
+
+    @property
+    def indexer(self):
+        return self.config.indexer_cls("records")
+
+    @property
+    def draft_indexer(self):
+        return self.config.draft_indexer_cls("drafts")
+
+
+def test_deferred_indexing(app):
+    _FakeIndexer.calls = []
+    service = _FakeService()
+
+    with DeferredIndexing(service) as deferred:
+        service.draft_indexer.index(SimpleNamespace(id="draft-1"))
+        service.draft_indexer.index(SimpleNamespace(id="draft-2"))
+        service.indexer.index(SimpleNamespace(id="rec-1"))
+        service.indexer.bulk_index(["rec-1", "rec-2"])
+        service.indexer.refresh()
+        # drafts deleted on publication are never indexed
+        service.draft_indexer.delete(SimpleNamespace(id="draft-1"))
+        service.draft_indexer.delete(SimpleNamespace(id="never-indexed"))
+        assert _FakeIndexer.calls == [("drafts", "delete", "draft-1")]
+
+        assert deferred.flush() == 3
+        assert _FakeIndexer.calls[1:] == [
+            ("records", "bulk_index", ["rec-1", "rec-2"]),
+            ("drafts", "bulk_index", ["draft-2"]),
+        ]
+        assert deferred.flush() == 0
+
+        service.indexer.index(SimpleNamespace(id="rec-3"))
+
+    # the remaining records are queued when the context exits
+    assert _FakeIndexer.calls[-1] == ("records", "bulk_index", ["rec-3"])
+    assert service.config.indexer_cls is _FakeIndexer
+    assert service.config.draft_indexer_cls is _FakeIndexer
+    service.indexer.index(SimpleNamespace(id="rec-4"))
+    assert _FakeIndexer.calls[-1] == ("records", "index", "rec-4")
@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from invenio_record_importer_kcworks.services import language_cache
+from invenio_record_importer_kcworks.services.language_cache import (
+    CachedLanguage,
+    LanguageDetectionCache,
+)
+
+
+def _fail(text):
+    raise AssertionError("langdetect should not run")
+
+
+def test_language_cache_detect(tmp_path, monkeypatch):
+    db_path = tmp_path / "languages.sqlite3"
+    text = "The quick brown fox jumps over the lazy dog near the river bank"
+
+    cache = LanguageDetectionCache(db_path)
+    langs = cache.detect(text)
+    assert langs[0]["code"] == "en"
+    cache.close()
+
+    # a new cache reads the stored result without running langdetect
+    monkeypatch.setattr(language_cache, "detect_langs", _fail)
+    cache = LanguageDetectionCache(db_path)
+    assert cache.detect(text) == langs
+    cache.close()
+
+
+def test_language_cache_short_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(language_cache, "detect_langs", _fail)
+    cache = LanguageDetectionCache(
+        tmp_path / "languages.sqlite3",
+        short_text_length=10,
+        short_text_language="fr",
+    )
+    assert cache.detect("Le chat") == [{"code": "fr", "prob": 0.0}]
+    cache.close()
+
+
+def test_language_cache_lookups(tmp_path):
+    db_path = tmp_path / "languages.sqlite3"
+    cache = LanguageDetectionCache(db_path)
+    assert cache.language_from_part1("de") == CachedLanguage("deu", "German")
+    assert cache.language_from_name("Spanish").part3 == "spa"
+    cache.close()
+
+    cache = LanguageDetectionCache(db_path)
+    rows = cache.conn.execute(
+        "SELECT lookup, value, part3 FROM languages ORDER BY lookup"
+    ).fetchall()
+    assert rows == [
+        ("from_name", "Spanish", "spa"),
+        ("from_part1", "de", "deu"),
+    ]
+    cache.close()
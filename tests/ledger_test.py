@@ -0,0 +1,146 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import jsonlines
+from invenio_record_importer_kcworks.services.ledger import ImportLedger
+
+
+def _created(commons_id, recid, index=1):
+    return {
+        "index": index,
+        "invenio_id": f"10.17613/{commons_id}",
+        "invenio_recid": recid,
+        "commons_id": commons_id,
+        "core_record_id": "1000",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def _failed(commons_id, index):
+    return {
+        "index": index,
+        "invenio_id": f"10.17613/{commons_id}",
+        "commons_id": commons_id,
+        "core_record_id": "1000",
+        "reason": None,
+        "datestamp": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def _read(file_path):
+    with jsonlines.open(file_path) as reader:
+        return list(reader)
+
+
+def test_ledger_created_log(tmp_path):
+    created_path = tmp_path / "created.jsonl"
+    ledger = ImportLedger(
+        tmp_path / "ledger.sqlite3", created_path, tmp_path / "failed.jsonl"
+    )
+    assert ledger.log_created(_created("hc:1", "abc"))
+    assert ledger.log_created(_created("hc:2", "def"))
+    assert not ledger.log_created(_created("hc:1", "abc"))
+    # new records are appended without rewriting the file
+    assert [r["commons_id"] for r in _read(created_path)] == ["hc:1", "hc:2"]
+
+    # a changed recid moves the record to the end of the log on export
+    assert ledger.log_created(_created("hc:1", "xyz"))
+    ledger.close()
+    assert [
+        (r["commons_id"], r["invenio_recid"]) for r in _read(created_path)
+    ] == [
+        ("hc:2", "def"),
+        ("hc:1", "xyz"),
+    ]
+
+
+def test_ledger_failed_log(tmp_path):
+    failed_path = tmp_path / "failed.jsonl"
+    with jsonlines.open(failed_path, "w") as writer:
+        writer.write_all([_failed("hc:5", 5), _failed("hc:3", 3)])
+
+    ledger = ImportLedger(
+        tmp_path / "ledger.sqlite3", tmp_path / "created.jsonl", failed_path
+    )
+    assert [r["commons_id"] for r in ledger.failed_records()] == [
+        "hc:3",
+        "hc:5",
+    ]
+    ledger.log_failed(_failed("hc:1", 1))
+    ledger.log_failed(_failed("hc:5", 5))
+    assert ledger.remove_failed("hc:3")
+    assert not ledger.remove_failed("hc:4")
+    ledger.close()
+    assert [r["commons_id"] for r in _read(failed_path)] == ["hc:1", "hc:5"]
+
+    # the ledger is rebuilt if the log is changed outside of it
+    failed_path.unlink()
+    ledger = ImportLedger(
+        tmp_path / "ledger.sqlite3", tmp_path / "created.jsonl", failed_path
+    )
+    assert ledger.failed_records() == []
+    ledger.close()
+
+
+def test_ledger_fingerprints(tmp_path):
+    created_path = tmp_path / "created.jsonl"
+    db_path = tmp_path / "ledger.sqlite3"
+    rec = {"metadata": {"title": "A"}, "files": {"entries": {}}}
+    fingerprint = ImportLedger.fingerprint(rec, {}, "knowledgeCommons")
+
+    ledger = ImportLedger(db_path, created_path, tmp_path / "failed.jsonl")
+    assert ledger.unchanged_recid("hc:1", "10.17613/hc:1", fingerprint) is None
+    ledger.log_created(dict(_created("hc:1", "abc"), fingerprint=fingerprint))
+    assert ledger.unchanged_recid("hc:1", "10.17613/hc:1", fingerprint) == (
+        "abc"
+    )
+    assert ledger.unchanged_recid("hc:1", "10.17613/hc:1", "other") is None
+
+    # a new payload for the same Invenio record replaces the fingerprint
+    new_fingerprint = ImportLedger.fingerprint(
+        rec, {"metadata|title": "B"}, "knowledgeCommons"
+    )
+    assert ledger.log_created(
+        dict(_created("hc:1", "abc"), fingerprint=new_fingerprint)
+    )
+    ledger.close()
+    assert [r["fingerprint"] for r in _read(created_path)] == [new_fingerprint]
+
+    # the fingerprints survive a rebuild of the ledger from the log
+    db_path.unlink()
+    ledger = ImportLedger(db_path, created_path, tmp_path / "failed.jsonl")
+    assert ledger.unchanged_recid("hc:1", "10.17613/hc:1", fingerprint) is None
+    assert (
+        ledger.unchanged_recid("hc:1", "10.17613/hc:1", new_fingerprint)
+        == "abc"
+    )
+    ledger.close()
+
+
+def test_ledger_remove_created(tmp_path):
+    created_path = tmp_path / "created.jsonl"
+    db_path = tmp_path / "ledger.sqlite3"
+    fingerprint = ImportLedger.fingerprint({"metadata": {"title": "A"}})
+
+    ledger = ImportLedger(db_path, created_path, tmp_path / "failed.jsonl")
+    for commons_id, recid in [("hc:1", "abc"), ("hc:2", "def")]:
+        ledger.log_created(
+            dict(_created(commons_id, recid), fingerprint=fingerprint)
+        )
+    # a deleted record is no longer skipped as unchanged
+    assert ledger.remove_created(invenio_recid="abc") == 1
+    assert ledger.unchanged_recid("hc:1", "10.17613/hc:1", fingerprint) is None
+    assert ledger.remove_created(invenio_recid="abc") == 0
+    ledger.close()
+    assert [r["commons_id"] for r in _read(created_path)] == ["hc:2"]
+
+    ledger = ImportLedger(db_path, created_path, tmp_path / "failed.jsonl")
+    assert ledger.remove_created(commons_id="hc:2") == 1
+    ledger.close()
+    assert _read(created_path) == []
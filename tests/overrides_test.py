@@ -0,0 +1,71 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import jsonlines
+import os
+from invenio_record_importer_kcworks.services.overrides import OverridesIndex
+
+
+def _write_overrides(folder, lines, source="knowledgeCommons"):
+    file_path = folder / f"record-importer-overrides_{source}.jsonl"
+    with jsonlines.open(file_path, "w") as writer:
+        writer.write_all(lines)
+    return file_path
+
+
+def test_overrides_index_lookup(tmp_path):
+    _write_overrides(
+        tmp_path,
+        [
+            {"source_id": "hc:1", "overrides": {"metadata|title": "A"}},
+            {"source_id": "hc:2", "skip": "true", "notes": "bad record"},
+            {"source_id": "hc:3", "skip": 1},
+            {"source_id": "hc:1", "overrides": {"metadata|title": "B"}},
+        ],
+    )
+    index = OverridesIndex(tmp_path)
+
+    assert index.lookup("knowledgeCommons", ["hc:1"]) == (
+        {"metadata|title": "B"},
+        False,
+    )
+    assert index.lookup("knowledgeCommons", ["hc:2"]) == ({}, True)
+    assert index.lookup("knowledgeCommons", ["hc:3"]) == ({}, True)
+    assert index.lookup("knowledgeCommons", ["hc:4"]) == ({}, False)
+    assert index.get("knowledgeCommons", "hc:4") is None
+    assert index.lookup("otherSource", ["hc:1"]) == ({}, False)
+
+
+def test_overrides_index_reloads_on_change(tmp_path):
+    file_path = _write_overrides(
+        tmp_path, [{"source_id": "hc:1", "overrides": {"metadata|title": "A"}}]
+    )
+    index = OverridesIndex(tmp_path)
+    assert index.get("knowledgeCommons", "hc:1")["overrides"] == {
+        "metadata|title": "A"
+    }
+
+    # Unchanged files are not read again
+    first = index.for_source("knowledgeCommons")
+    assert index.for_source("knowledgeCommons") is first
+
+    _write_overrides(
+        tmp_path, [{"source_id": "hc:1", "skip": True}, {"source_id": "hc:2"}]
+    )
+    stat = file_path.stat()
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert index.get("knowledgeCommons", "hc:1") == {
+        "overrides": {},
+        "skip": True,
+    }
+    assert index.get("knowledgeCommons", "hc:2") == {
+        "overrides": {},
+        "skip": False,
+    }
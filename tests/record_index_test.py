@@ -0,0 +1,89 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import json
+import jsonlines
+import pytest
+from invenio_record_importer_kcworks.services.record_index import (
+    RawRecordIndex,
+    SerializedRecordIndex,
+)
+
+
+def _serialized(n):
+    return {
+        "pids": {
+            "doi": {"identifier": f"10.17613/{n}", "provider": "datacite"}
+        },
+        "metadata": {
+            "title": f"Record {n} – ünïcode",
+            "identifiers": [
+                {"identifier": f"hc:{n}", "scheme": "hclegacy-pid"},
+                {"identifier": str(1000 + n), "scheme": "hclegacy-record-id"},
+            ],
+        },
+    }
+
+
+def test_serialized_record_index(tmp_path):
+    file_path = tmp_path / "serialized.jsonl"
+    with jsonlines.open(file_path, "w") as writer:
+        writer.write_all([_serialized(n) for n in range(1, 6)])
+
+    index = SerializedRecordIndex(file_path)
+    assert len(index) == 5
+    assert index.read(3)["metadata"]["title"] == "Record 3 – ünïcode"
+    assert index.position_for("doi", "10.17613/4") == 4
+    assert index.position_for("hclegacy-pid", "hc:2") == 2
+    assert index.position_for("hclegacy-pid", "hc:99") is None
+    assert [
+        r["metadata"]["identifiers"][0]["identifier"]
+        for r in index.read_many([5, 1])
+    ] == ["hc:5", "hc:1"]
+    with pytest.raises(IndexError):
+        index.read(6)
+    assert index.index_path.exists()
+
+    # the index is rebuilt when the serialized file changes
+    with jsonlines.open(file_path, "a") as writer:
+        writer.write(_serialized(6))
+    assert index.position_for("hclegacy-pid", "hc:6") == 6
+    assert (
+        SerializedRecordIndex(file_path).read(6)["pids"]["doi"]["identifier"]
+        == "10.17613/6"
+    )
+
+
+def test_raw_record_index(tmp_path):
+    raw = [
+        {
+            "id": "hc:1",
+            "deposit_doi": "doi:10.17613/1",
+            "title": 'Brackets [in] {strings} and "escaped \\" quotes"',
+            "authors": [{"name": "A"}, {"name": "B"}],
+        },
+        {"id": "hc:2", "deposit_doi": "doi:10.17613/2", "title": "ü ] }"},
+        {"id": "hc:3", "deposit_doi": "", "title": "\\"},
+    ]
+    file_path = tmp_path / "records-for-import.json"
+    with open(file_path, "w") as raw_file:
+        json.dump(raw, raw_file, indent=2, ensure_ascii=False)
+
+    index = RawRecordIndex(file_path)
+    assert list(index.iter_records()) == raw
+    assert len(index) == 3
+    assert index.read(2) == raw[1]
+    assert index.position_for("hclegacy-pid", "hc:3") == 3
+    assert index.position_for("doi", "doi:10.17613/1") == 1
+    assert index.position_for("doi", "") is None
+    assert list(index.read_many([3, 1])) == [raw[2], raw[0]]
+
+    empty_path = tmp_path / "empty.json"
+    empty_path.write_text("")
+    assert list(RawRecordIndex(empty_path).iter_records()) == []
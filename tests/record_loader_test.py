@@ -11,7 +11,9 @@ import arrow
 from copy import deepcopy
 from click.testing import CliRunner
 from invenio_access.permissions import system_identity
-from invenio_pidstore.errors import PIDUnregistered
+from invenio_accounts.models import User
+from invenio_pidstore.errors import PIDDoesNotExistError, PIDUnregistered
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_rdm_records.proxies import (
     current_rdm_records_service as records_service,
 )
@@ -22,6 +24,7 @@ from invenio_record_importer_kcworks.services.stats.stats import (
     AggregationFabricator,
 )
 from invenio_record_importer_kcworks.utils import (
+    compare_metadata,
     valid_date,
     generate_random_string,
 )
@@ -37,8 +40,13 @@ from invenio_record_importer_kcworks.record_loader import (
     create_invenio_user,
     delete_invenio_draft_record,
     import_record_to_invenio,
+    resolve_existing_dois,
+    resolve_submitters,
 )
+from invenio_record_importer_kcworks import cli as cli_module
+from invenio_record_importer_kcworks import record_loader
 from invenio_record_importer_kcworks.services.communities import (
+    CollectionInclusionUnitOfWork,
     CommunitiesHelper,
 )
 from invenio_record_importer_kcworks.services.files import FilesHelper
@@ -49,6 +57,9 @@ import re
 from pprint import pprint, pformat
 import pytest
 import pytz
+from types import SimpleNamespace
+from sqlalchemy.orm.exc import StaleDataError
+import uuid
 from dateutil.parser import isoparse
 from .helpers.sample_records import (
     rec11451,
@@ -411,6 +422,30 @@ def test_api_request(
     )
 
 
+def test_compare_metadata():
+    existing = deepcopy(rec11451["expected_loaded"])
+    assert compare_metadata(existing, deepcopy(existing)) == {}
+
+    incoming = deepcopy(existing)
+    incoming["metadata"]["title"] += "  "
+    identifiers = incoming["metadata"]["identifiers"]
+    identifiers[0]["scheme"] = "url"
+    identifiers.append({"identifier": "10.1/x", "scheme": "doi"})
+    old_identifiers = deepcopy(existing["metadata"]["identifiers"])
+    assert compare_metadata(existing, incoming) == {
+        "A": {
+            "metadata": {
+                "identifiers": [old_identifiers[0], {}, old_identifiers]
+            }
+        },
+        "B": {
+            "metadata": {
+                "identifiers": [identifiers[0], identifiers[3], identifiers]
+            }
+        },
+    }
+
+
 @pytest.mark.parametrize(
     "json_payload,expected_status_code,expected_json",
     [
@@ -910,6 +945,97 @@ def test_create_invenio_community(
     assert actual_community["slug"] == slug
 
 
+class _FakeCommunityItem:
+    def __init__(self, data):
+        self.data = data
+
+    def to_dict(self):
+        return self.data
+
+
+def test_community_cache(app, monkeypatch):
+    searches = []
+    created = []
+
+    class FakeService:
+        def search(self, identity, q, size=10):
+            searches.append(q)
+            hits = [{"id": "id-msu", "slug": "msu"}]
+            return _FakeCommunityItem(
+                {"hits": {"total": len(hits), "hits": hits}}
+            )
+
+        def create(self, identity, data):
+            created.append(data["slug"])
+            return _FakeCommunityItem(
+                {"id": f"id-{data['slug']}", "slug": data["slug"]}
+            )
+
+    monkeypatch.setattr(
+        "invenio_record_importer_kcworks.services.communities."
+        "current_communities",
+        SimpleNamespace(service=FakeService()),
+    )
+    monkeypatch.setitem(
+        app.config,
+        "RECORD_IMPORTER_COMMUNITIES_DATA",
+        {
+            "knowledgeCommons": {
+                slug: {"slug": slug, "metadata": {"title": slug}}
+                for slug in ["msu", "ajs"]
+            }
+        },
+    )
+    CommunitiesHelper.clear_community_cache()
+
+    # one search for all of the configured communities
+    CommunitiesHelper.warm_community_cache(create_missing=True)
+    assert searches == ['slug:("msu" OR "ajs")']
+    assert created == ["ajs"]
+
+    for _ in range(3):
+        for domain in ["msu.hcommons.org", "ajs.hcommons.org"]:
+            community = CommunitiesHelper().prepare_invenio_community(
+                "knowledgeCommons", domain
+            )
+            assert community["id"] == f"id-{domain.split('.')[0]}"
+    assert len(searches) == 1
+    assert created == ["ajs"]
+    CommunitiesHelper.clear_community_cache()
+
+
+def test_collection_inclusion_unit_of_work(app, db):
+    from invenio_records_resources.services.uow import (
+        IndexRefreshOp,
+        RecordIndexOp,
+    )
+
+    def index_op(record_id, tag):
+        op = RecordIndexOp(SimpleNamespace(id=record_id), indexer=None)
+        op.tag = tag
+        return op
+
+    ops = [
+        index_op("rec", 1),
+        IndexRefreshOp(indexer=None),
+        index_op("request-1", 1),
+        index_op("rec", 2),
+        index_op("request-2", 1),
+        index_op("rec", 3),
+    ]
+    with CollectionInclusionUnitOfWork() as uow:
+        for op in ops:
+            uow.register(op)
+        # the record is indexed once, from its latest operation
+        assert [
+            (op._record.id, op.tag)
+            for op in uow._operations
+            if isinstance(op, RecordIndexOp)
+        ] == [("rec", 3), ("request-1", 1), ("request-2", 1)]
+        assert len(uow._operations) == 4
+        uow.rollback()
+
+
 @pytest.mark.parametrize(
     "json_in",
     [
@@ -1213,6 +1339,364 @@ def test_create_invenio_user(
     assert actual_user["new_user"] == new_user_flag
 
 
+def test_resolve_submitters(app, db, user_factory, monkeypatch):
+    existing_user = user_factory(email="existing@example.org").user
+    created = []
+
+    def fake_create_invenio_user(email, username, full_name, record_source):
+        created.append((email, username))
+        return {"user": SimpleNamespace(id=999)}
+
+    monkeypatch.setattr(
+        record_loader, "create_invenio_user", fake_create_invenio_user
+    )
+    records = [
+        {
+            "custom_fields": {
+                "kcr:submitter_email": email,
+                "kcr:submitter_username": username,
+            },
+            "metadata": {"creators": []},
+        }
+        for email, username in [
+            ("existing@example.org", "existing"),
+            ("new@example.org", "newuser"),
+            ("existing@example.org", "existing"),
+            ("new@example.org", "newuser"),
+        ]
+    ]
+    submitter_ids = resolve_submitters(records, "knowledgeCommons")
+    assert submitter_ids == {
+        ("existing@example.org", "existing"): existing_user.id,
+        ("new@example.org", "newuser"): 999,
+    }
+    # each missing submitter is provisioned once
+    assert created == [("new@example.org", "newuser")]
+    # known submitters are not looked up again
+    assert resolve_submitters(records, "knowledgeCommons", submitter_ids) == {}
+
+
+def test_resolve_submitters_failed_user(app, db, user_factory, monkeypatch):
+    user = user_factory(email="old@example.org").user
+    user.username = "knowledgecommons-olduser"
+    db.session.commit()
+
+    def fake_create_invenio_user(email, username, full_name, record_source):
+        raise RuntimeError("user data API unavailable")
+
+    monkeypatch.setattr(
+        record_loader, "create_invenio_user", fake_create_invenio_user
+    )
+    records = [
+        {
+            "custom_fields": {
+                "kcr:submitter_email": email,
+                "kcr:submitter_username": username,
+            },
+            "metadata": {"creators": []},
+        }
+        for email, username in [
+            ("new@example.org", "olduser"),
+            ("broken@example.org", "broken"),
+        ]
+    ]
+    submitter_ids = resolve_submitters(records, "knowledgeCommons")
+    assert submitter_ids == {("new@example.org", "olduser"): user.id}
+    # the failed provisioning does not roll back the found user's profile
+    db.session.expire_all()
+    profile = User.query.get(user.id).user_profile
+    assert list(profile["identifier_email"]) == ["new@example.org"]
+    assert list(profile["identifier_kc_username"]) == ["olduser"]
+
+
+def test_chunk_outcomes_failed_chunk(app):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    load_tasks = [
+        {
+            "rec": {
+                "metadata": {
+                    "identifiers": [
+                        {"scheme": "hclegacy-pid", "identifier": "hc:1"},
+                        {"scheme": "hclegacy-record-id", "identifier": "1"},
+                    ]
+                }
+            },
+            "index": 1,
+            "fingerprint": "abc",
+        },
+        # a malformed record still gets an outcome
+        {"rec": {}, "index": 2},
+    ]
+    future = Future()
+    future.set_exception(BrokenProcessPool("worker died"))
+    outcomes = record_loader._chunk_outcomes(future, load_tasks)
+    assert [o["status"] for o in outcomes] == ["failed", "failed"]
+    assert [o["log_object"]["index"] for o in outcomes] == [1, 2]
+    assert outcomes[0]["log_object"]["commons_id"] == "hc:1"
+    assert outcomes[0]["fingerprint"] == "abc"
+    assert outcomes[1]["reason"] == "BrokenProcessPool: worker died"
+
+    future = Future()
+    future.set_result(["outcome"])
+    assert record_loader._chunk_outcomes(future, load_tasks) == ["outcome"]
+
+
+def test_load_record_chunk_task_failure(app, monkeypatch):
+    from invenio_record_importer_kcworks.tasks import load_record_chunk
+
+    def failing_chunk(load_tasks, no_updates, defer_indexing):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(record_loader, "_load_record_chunk", failing_chunk)
+    load_tasks = [{"rec": {}, "index": 1}, {"rec": {}, "index": 2}]
+    # the task returns failed outcomes instead of breaking the chord
+    outcomes = load_record_chunk.run(load_tasks)
+    assert [(o["log_object"]["index"], o["status"]) for o in outcomes] == [
+        (1, "failed"),
+        (2, "failed"),
+    ]
+    assert outcomes[0]["reason"] == "RuntimeError: database is gone"
+
+
+def test_load_records_with_celery(app, monkeypatch):
+    from invenio_record_importer_kcworks import tasks
+
+    queued = []
+
+    class FakeResult:
+        def __init__(self, load_tasks):
+            self.load_tasks = load_tasks
+
+        def get(self):
+            if self.load_tasks[0]["index"] == 3:
+                raise RuntimeError("worker lost")
+            return [
+                {"log_object": {"index": t["index"]}, "status": "new_record"}
+                for t in self.load_tasks
+            ]
+
+    def fake_delay(load_tasks, no_updates=False, defer_indexing=False):
+        queued.append([t["index"] for t in load_tasks])
+        return FakeResult(load_tasks)
+
+    monkeypatch.setattr(tasks.load_record_chunk, "delay", fake_delay)
+    monkeypatch.setitem(app.config, "RECORD_IMPORTER_LOAD_CHUNK_SIZE", 2)
+    load_tasks = [{"rec": {}, "index": i} for i in range(1, 5)]
+    tracker = SimpleNamespace(outcomes=[])
+    tracker.add = tracker.outcomes.append
+
+    # the outcomes are tallied by the calling process, and the records of
+    # a chunk whose result is lost are tallied as failed
+    record_loader._load_records_with_celery(iter(load_tasks), tracker)
+    assert queued == [[1, 2], [3, 4]]
+    assert [
+        (o["log_object"]["index"], o["status"]) for o in tracker.outcomes
+    ] == [(1, "new_record"), (2, "new_record"), (3, "failed"), (4, "failed")]
+    assert tracker.outcomes[2]["reason"] == "RuntimeError: worker lost"
+
+
+def test_load_records_in_batches_bad_record(app, db, monkeypatch):
+    loaded = []
+
+    def fake_load_record(**kwargs):
+        loaded.append((kwargs["index"], kwargs["submitter_ids"]))
+        return {"index": kwargs["index"], "status": "failed"}
+
+    monkeypatch.setattr(record_loader, "_load_record", fake_load_record)
+    monkeypatch.setattr(
+        record_loader, "resolve_existing_dois", lambda dois: {}
+    )
+    good_record = {
+        "custom_fields": {
+            "kcr:submitter_email": "new@example.org",
+            "kcr:submitter_username": "newuser",
+        },
+        "metadata": {"creators": []},
+    }
+    # a record without custom fields breaks the batch's submitter lookup
+    bad_record = {"metadata": {"creators": []}}
+    load_tasks = [
+        {
+            "rec": rec,
+            "index": i,
+            "record_source": "knowledgeCommons",
+            "skip": False,
+        }
+        for i, rec in enumerate([good_record, bad_record], start=1)
+    ]
+    tracker = SimpleNamespace(outcomes=[], failed_records=[])
+    tracker.add = tracker.outcomes.append
+
+    record_loader._load_records_in_batches(load_tasks, tracker)
+
+    # every record is still loaded, with the per-record submitter lookup
+    assert loaded == [(1, {}), (2, {})]
+    assert [o["index"] for o in tracker.outcomes] == [1, 2]
+
+
+@pytest.mark.parametrize("defer_indexing", [True, False])
+def test_load_records_in_batches_same_doi(
+    app, db, monkeypatch, defer_indexing
+):
+    passed_records = []
+
+    def fake_load_record(**kwargs):
+        passed_records.append(kwargs["existing_records"])
+        return {
+            "log_object": {
+                "index": kwargs["index"],
+                "invenio_id": kwargs["rec"]["pids"]["doi"]["identifier"],
+            },
+            "status": "new_record",
+            "invenio_recid": f"rec-{kwargs['index']}",
+        }
+
+    def fake_read_draft(identity, id_):
+        raise PIDDoesNotExistError("recid", id_)
+
+    def fake_read(identity, id_):
+        data = {"id": id_, "status": "published"}
+        return SimpleNamespace(
+            to_dict=lambda: data, _record=SimpleNamespace(id=f"uuid-{id_}")
+        )
+
+    monkeypatch.setattr(record_loader, "_load_record", fake_load_record)
+    monkeypatch.setattr(
+        record_loader, "resolve_existing_dois", lambda dois: {}
+    )
+    monkeypatch.setattr(
+        record_loader, "resolve_submitters", lambda *args, **kwargs: {}
+    )
+    monkeypatch.setattr(
+        record_loader,
+        "records_service",
+        SimpleNamespace(read_draft=fake_read_draft, read=fake_read),
+    )
+    load_tasks = [
+        {
+            "rec": {
+                "pids": {"doi": {"identifier": doi}},
+                "custom_fields": {},
+                "metadata": {"creators": []},
+            },
+            "index": i,
+            "record_source": "knowledgeCommons",
+            "skip": False,
+        }
+        for i, doi in enumerate(
+            ["10.17613/abc", "10.17613/def", "10.17613/ABC"], start=1
+        )
+    ]
+    tracker = SimpleNamespace(outcomes=[], failed_records=[])
+    tracker.add = tracker.outcomes.append
+
+    record_loader._load_records_in_batches(
+        load_tasks, tracker, defer_indexing=defer_indexing
+    )
+
+    assert passed_records[:2] == [{}, {}]
+    if defer_indexing:
+        # the unindexed record loaded earlier with the same DOI is updated
+        assert passed_records[2] == {
+            "10.17613/abc": record_loader.ExistingRecord(
+                "rec-1",
+                "uuid-rec-1",
+                "published",
+                {"id": "rec-1", "status": "published"},
+            )
+        }
+    else:
+        # the record loaded earlier is found by the usual DOI search
+        assert passed_records[2] == {}
+
+
+@pytest.mark.parametrize("defer_indexing", [True, False])
+def test_load_record_stale_data_retry(app, db, monkeypatch, defer_indexing):
+    # the draft saved by the first attempt, which is not indexed
+    record_uuid = uuid.uuid4()
+    PersistentIdentifier.create(
+        "recid",
+        "abcd-1234",
+        object_type="rec",
+        object_uuid=record_uuid,
+        status=PIDStatus.REGISTERED,
+    )
+    PersistentIdentifier.create(
+        "doi",
+        "10.17613/ABC",
+        object_type="rec",
+        object_uuid=record_uuid,
+        status=PIDStatus.RESERVED,
+    )
+    db.session.commit()
+    passed_records = []
+
+    def fake_import_record_to_invenio(
+        rec,
+        no_updates,
+        record_source,
+        overrides,
+        existing_records=None,
+        submitter_ids=None,
+    ):
+        passed_records.append(existing_records)
+        if len(passed_records) == 1:
+            raise StaleDataError("stale parent")
+        return {
+            "status": "unchanged_existing_draft",
+            "metadata_record_created": {"record_data": {"id": "abcd-1234"}},
+            "existing_record": {"id": "abcd-1234"},
+        }
+
+    def fake_read_draft(identity, id_):
+        data = {"id": id_, "status": "draft"}
+        return SimpleNamespace(
+            to_dict=lambda: data, _record=SimpleNamespace(id=record_uuid)
+        )
+
+    monkeypatch.setattr(
+        record_loader,
+        "import_record_to_invenio",
+        fake_import_record_to_invenio,
+    )
+    monkeypatch.setattr(
+        record_loader,
+        "records_service",
+        SimpleNamespace(read_draft=fake_read_draft),
+    )
+    rec = {
+        "pids": {"doi": {"identifier": "10.17613/abc"}},
+        "metadata": {
+            "identifiers": [
+                {"identifier": "hc:1", "scheme": "hclegacy-pid"},
+                {"identifier": "1001", "scheme": "hclegacy-record-id"},
+            ]
+        },
+    }
+
+    outcome = record_loader._load_record(
+        rec, 1, "knowledgeCommons", defer_indexing=defer_indexing
+    )
+
+    assert outcome["status"] == "unchanged_existing_draft"
+    assert passed_records[0] is None
+    if defer_indexing:
+        # the retry finds the unindexed draft through the pidstore
+        assert passed_records[1] == {
+            "10.17613/abc": record_loader.ExistingRecord(
+                "abcd-1234",
+                str(record_uuid),
+                "draft",
+                {"id": "abcd-1234", "status": "draft"},
+            )
+        }
+    else:
+        # the retry searches for the DOI as usual
+        assert passed_records[1] is None
+
+
 def test_record_loader(app, admin, script_info):
     # app.config["RECORD_IMPORTER_API_TOKEN"] = admin.allowed_token
     runner = CliRunner()
@@ -1220,3 +1704,93 @@ def test_record_loader(app, admin, script_info):
     assert result.exit_code == 0
     assert "Finished!" in result.output
     assert "Created 1 records in InvenioRDM" in result.output
+
+
+@pytest.mark.parametrize("parallel_flags", [["--workers", "2"], ["--celery"]])
+def test_defer_indexing_in_parallel(
+    app, script_info, monkeypatch, parallel_flags
+):
+    calls = []
+    monkeypatch.setattr(
+        cli_module,
+        "load_records_into_invenio",
+        lambda **kwargs: calls.append(kwargs),
+    )
+    runner = CliRunner()
+    result = runner.invoke(cli, ["load", "--defer-indexing", *parallel_flags])
+    assert result.exit_code == 2
+    assert "--defer-indexing" in result.output
+    assert calls == []
+
+    with pytest.raises(ValueError):
+        record_loader.load_records_into_invenio(
+            defer_indexing=True,
+            workers=2 if "--workers" in parallel_flags else 1,
+            use_celery="--celery" in parallel_flags,
+        )
+
+
+class _FakeHit(dict):
+    def to_dict(self):
+        return self
+
+
+class _FakeSearchResult:
+    def __init__(self, hits):
+        self.hits = iter([dict(h) for h in hits])
+        self._results = [_FakeHit(h) for h in hits]
+        self.total = len(hits)
+
+
+def test_resolve_existing_dois(app, monkeypatch):
+    queries = []
+    hits = [
+        {
+            "id": "abcd-1234",
+            "uuid": "uuid-1",
+            "status": "published",
+            "pids": {"doi": {"identifier": "10.17613/one"}},
+        },
+        {
+            "id": "efgh-5678",
+            "uuid": "uuid-2",
+            "status": "draft",
+            "pids": {"doi": {"identifier": "10.17613/two"}},
+        },
+        {
+            "id": "ijkl-9012",
+            "uuid": "uuid-3",
+            "status": "draft",
+            "pids": {"doi": {"identifier": "10.17613/two"}},
+        },
+    ]
+
+    class FakeService:
+        def search_drafts(self, identity, q, size):
+            queries.append(q)
+            return _FakeSearchResult(hits)
+
+    monkeypatch.setattr(record_loader, "records_service", FakeService())
+    resolved = resolve_existing_dois(
+        [
+            "10.17613/One",
+            "10.17613/two",
+            "10.17613/three",
+            "10.17613/four",
+            "10.17613/four",
+            "10.17613/five/six",
+        ],
+        batch_size=10,
+    )
+    # one query for all of the unambiguous DOIs
+    assert queries == [
+        'pids.doi.identifier:("10.17613/One" OR "10.17613/two" OR '
+        '"10.17613/three")'
+    ]
+    assert resolved["10.17613/one"].uuid == "uuid-1"
+    assert resolved["10.17613/one"].status == "published"
+    assert resolved["10.17613/three"] is None
+    # ambiguous DOIs are left to the per-record search
+    assert "10.17613/two" not in resolved
+    assert "10.17613/four" not in resolved
+    assert "10.17613/five/six" not in resolved
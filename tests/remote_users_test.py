@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+from invenio_record_importer_kcworks.services.remote_users import (
+    RemoteUserClient,
+)
+import pytest
+
+
+class _StubUserHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        source_id = self.path.rsplit("/", 1)[-1]
+        self.requests.append(
+            (source_id, self.headers["Authorization"], self.client_address)
+        )
+        body = json.dumps(
+            {"username": source_id, "email": f"{source_id}@example.org"}
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_user_api(monkeypatch):
+    monkeypatch.setenv("STUB_USER_API_TOKEN", "secret")
+    _StubUserHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubUserHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield {
+        "remote_endpoint": f"http://127.0.0.1:{server.server_port}/users",
+        "remote_method": "GET",
+        "token_env_variable_label": "STUB_USER_API_TOKEN",
+    }
+    server.shutdown()
+    server.server_close()
+
+
+def test_remote_user_client_get(stub_user_api, tmp_path):
+    client = RemoteUserClient(
+        "knowledgeCommons",
+        endpoint_config=stub_user_api,
+        cache_path=tmp_path / "users.sqlite3",
+        max_workers=1,
+    )
+    for source_id in ["alice", "bob", "alice"]:
+        user = client.get(source_id)
+        assert user["email"] == f"{source_id}@example.org"
+    client.close()
+
+    requests = _StubUserHandler.requests
+    assert [r[0] for r in requests] == ["alice", "bob"]
+    assert {r[1] for r in requests} == {"Bearer secret"}
+    # the connection is kept alive between requests
+    assert len({r[2] for r in requests}) == 1
+
+
+def test_remote_user_client_prefetch(stub_user_api, tmp_path):
+    cache_path = tmp_path / "users.sqlite3"
+    source_ids = [f"user{i}" for i in range(20)]
+
+    client = RemoteUserClient(
+        "knowledgeCommons",
+        endpoint_config=stub_user_api,
+        cache_path=cache_path,
+        max_workers=4,
+    )
+    users = client.prefetch(source_ids + source_ids[:5])
+    assert sorted(users.keys()) == sorted(source_ids)
+    assert client.get("user3")["username"] == "user3"
+    client.close()
+    assert sorted(r[0] for r in _StubUserHandler.requests) == sorted(
+        source_ids
+    )
+
+    # a new client reads the cached responses from disk
+    client = RemoteUserClient(
+        "knowledgeCommons",
+        endpoint_config=stub_user_api,
+        cache_path=cache_path,
+    )
+    assert client.prefetch(source_ids) == users
+    assert len(_StubUserHandler.requests) == len(source_ids)
+    client.close()
+
+    # expired responses are fetched again
+    client = RemoteUserClient(
+        "knowledgeCommons",
+        endpoint_config=stub_user_api,
+        cache_path=cache_path,
+        cache_ttl=0,
+    )
+    assert client.get("user0")["username"] == "user0"
+    assert len(_StubUserHandler.requests) == len(source_ids) + 1
+    client.close()
@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+from invenio_record_importer_kcworks.services.row_hashes import RowHashStore
+
+
+def test_row_hash_store_round_trip(tmp_path):
+    store = RowHashStore(tmp_path / "serialized.jsonl.hashes")
+    assert store.load() == (None, {})
+
+    rows = [{"id": "hc:1", "title": "One"}, {"id": "hc:2", "title": "Two"}]
+    hashes = {row["id"]: RowHashStore.row_hash(row) for row in rows}
+    store.save(hashes, ["titles", "identifiers"])
+    assert store.load() == (["titles", "identifiers"], hashes)
+
+    # saving again replaces the stored hashes
+    store.save({"hc:3": "abc"}, ["titles"])
+    assert store.load() == (["titles"], {"hc:3": "abc"})
+
+    store.clear()
+    assert store.load() == (None, {})
+
+
+def test_row_hash_store_detects_changes(tmp_path):
+    store = RowHashStore(tmp_path / "serialized.jsonl.hashes")
+    old_rows = [
+        {"id": "hc:1", "title": "One"},
+        {"id": "hc:2", "title": "Two"},
+        {"id": "hc:3", "title": "Three"},
+    ]
+    store.save({row["id"]: RowHashStore.row_hash(row) for row in old_rows}, [])
+
+    new_rows = [
+        {"title": "One", "id": "hc:1"},
+        {"id": "hc:2", "title": "Two (revised)"},
+        {"id": "hc:4", "title": "Four"},
+    ]
+    _, old_hashes = store.load()
+    assert RowHashStore.compare(
+        old_hashes,
+        {row["id"]: RowHashStore.row_hash(row) for row in new_rows},
+    ) == {"added": ["hc:4"], "changed": ["hc:2"], "removed": ["hc:3"]}
+
+
+def test_row_hash_store_unreadable(tmp_path):
+    db_path = tmp_path / "serialized.jsonl.hashes"
+    db_path.write_text("not a database")
+    assert RowHashStore(db_path).load() == (None, {})
@@ -0,0 +1,178 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import json
+import jsonlines
+from invenio_record_importer_kcworks.serializer import (
+    _prepare_resume,
+    _serialize_incremental,
+)
+from invenio_record_importer_kcworks.services.record_index import (
+    RawRecordIndex,
+)
+from invenio_record_importer_kcworks.services.row_hashes import RowHashStore
+
+
+def _write_output(serialized_path, failed_path, ids, partial=False):
+    with open(serialized_path, "w") as serialized_file:
+        for i in ids:
+            rec = {"metadata": {"identifiers": [{"identifier": i}]}}
+            serialized_file.write(json.dumps(rec) + "\n")
+        if partial:
+            serialized_file.write('{"metadata": {"identif')
+    with jsonlines.open(failed_path, "w") as failed_writer:
+        failed_writer.write_all(
+            [{"id": i, "errors": {"title": "bad"}} for i in ids]
+        )
+
+
+def _read_output(serialized_path, failed_path):
+    with jsonlines.open(serialized_path) as serialized_reader:
+        serialized_ids = [
+            r["metadata"]["identifiers"][0]["identifier"]
+            for r in serialized_reader
+        ]
+    with jsonlines.open(failed_path) as failed_reader:
+        failed_ids = [f["id"] for f in failed_reader]
+    return serialized_ids, failed_ids
+
+
+def test_prepare_resume(tmp_path):
+    serialized_path = tmp_path / "serialized.jsonl"
+    failed_path = tmp_path / "serialized_failed.jsonl"
+    ids = ["hc:1", "hc:2", "hc:3", "hc:4"]
+
+    # resume at a line number: the lines from there on are dropped
+    _write_output(serialized_path, failed_path, ids)
+    assert _prepare_resume(serialized_path, failed_path, 3) == 2
+    assert _read_output(serialized_path, failed_path) == (
+        ["hc:1", "hc:2"],
+        ["hc:1", "hc:2"],
+    )
+
+    # resume after the last complete line: a partly written line is dropped
+    _write_output(serialized_path, failed_path, ids, partial=True)
+    assert _prepare_resume(serialized_path, failed_path, "last") == 4
+    assert _read_output(serialized_path, failed_path) == (ids, ids)
+
+    # resume at the first line: nothing is kept
+    _write_output(serialized_path, failed_path, ids)
+    assert _prepare_resume(serialized_path, failed_path, 1) == 0
+    assert _read_output(serialized_path, failed_path) == ([], [])
+
+    # a line number past the end keeps every complete line
+    _write_output(serialized_path, failed_path, ids, partial=True)
+    assert _prepare_resume(serialized_path, failed_path, 10) == 4
+    assert _read_output(serialized_path, failed_path) == (ids, ids)
+
+
+def test_prepare_resume_no_output(tmp_path):
+    serialized_path = tmp_path / "serialized.jsonl"
+    failed_path = tmp_path / "serialized_failed.jsonl"
+
+    assert _prepare_resume(serialized_path, failed_path, "last") == 0
+    assert not serialized_path.exists()
+    assert not failed_path.exists()
+
+
+class _TitlePipeline:
+    """Stand-in pipeline that serializes only a raw record's title."""
+
+    stages = [("titles", None)]
+
+    def __init__(self):
+        self.serialized_ids = []
+
+    def run(self, row):
+        self.serialized_ids.append(row["id"])
+        newrec = {
+            "metadata": {
+                "title": row["title"],
+                "identifiers": [
+                    {"identifier": row["id"], "scheme": "hclegacy-pid"}
+                ],
+            }
+        }
+        bad_data = {row["id"]: {"title": "bad"}} if row.get("bad") else {}
+        return newrec, bad_data
+
+
+def test_serialize_incremental(app, tmp_path):
+    raw_path = tmp_path / "records-for-import.json"
+    serialized_path = tmp_path / "serialized.jsonl"
+    failed_path = tmp_path / "serialized_failed.jsonl"
+    hash_store = RowHashStore(tmp_path / "serialized.jsonl.hashes")
+
+    def _run(rows):
+        raw_path.write_text(json.dumps(rows))
+        pipeline = _TitlePipeline()
+        result = _serialize_incremental(
+            RawRecordIndex(raw_path),
+            pipeline,
+            1,
+            serialized_path,
+            failed_path,
+            hash_store,
+        )
+        return result, pipeline.serialized_ids
+
+    # without stored hashes every record is serialized
+    (changed, removed, bad_count), serialized_ids = _run(
+        [
+            {"id": "hc:1", "title": "One", "bad": True},
+            {"id": "hc:2", "title": "Two"},
+            {"id": "hc:3", "title": "Three"},
+            {"id": "hc:6", "title": "Six", "bad": True},
+        ]
+    )
+    assert changed == ["hc:1", "hc:2", "hc:3", "hc:6"]
+    assert serialized_ids == changed
+    assert (removed, bad_count) == ([], 2)
+    assert _read_output(serialized_path, failed_path) == (
+        ["hc:1", "hc:2", "hc:3", "hc:6"],
+        ["hc:1", "hc:6"],
+    )
+
+    # hc:1 is changed, hc:2 removed, hc:4 added, and hc:3 duplicated
+    (changed, removed, bad_count), serialized_ids = _run(
+        [
+            {"id": "hc:1", "title": "One, revised"},
+            {"id": "hc:3", "title": "Three"},
+            {"id": "hc:6", "title": "Six", "bad": True},
+            {"id": "hc:4", "title": "Four", "bad": True},
+            {"id": "hc:3", "title": "Three again"},
+        ]
+    )
+    assert changed == ["hc:1", "hc:3", "hc:4"]
+    assert serialized_ids == ["hc:1", "hc:3", "hc:4", "hc:3"]
+    assert (removed, bad_count) == (["hc:2"], 1)
+    with jsonlines.open(serialized_path) as serialized_reader:
+        assert [r["metadata"]["title"] for r in serialized_reader] == [
+            "One, revised",
+            "Three",
+            "Six",
+            "Four",
+            "Three again",
+        ]
+    # the entries of unchanged records are kept, those of changed and
+    # removed records are replaced
+    assert _read_output(serialized_path, failed_path)[1] == ["hc:6", "hc:4"]
+
+    # nothing changed: nothing is serialized and the output is kept
+    rows = [
+        {"id": "hc:1", "title": "One, revised"},
+        {"id": "hc:6", "title": "Six", "bad": True},
+    ]
+    _run(rows)
+    (changed, removed, bad_count), serialized_ids = _run(rows)
+    assert (changed, removed, bad_count, serialized_ids) == ([], [], 0, [])
+    assert _read_output(serialized_path, failed_path) == (
+        ["hc:1", "hc:6"],
+        ["hc:6"],
+    )
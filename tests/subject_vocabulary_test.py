@@ -0,0 +1,71 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2024 MESH Research
+#
+# invenio-record-importer-kcworks is free software; you can redistribute it
+# and/or modify it under the terms of the MIT License; see LICENSE file for
+# more details.
+
+import json
+from invenio_record_importer_kcworks.services.subject_vocabulary import (
+    SubjectVocabulary,
+)
+
+vocabulary_entries = [
+    {
+        "id": "http://id.worldcat.org/fast/963599",
+        "scheme": "FAST-topical",
+        "subject": "Digital humanities",
+    },
+    {
+        "id": "http://id.worldcat.org/fast/1072100",
+        "scheme": "FAST-geographic",
+        "subject": "Portugal",
+    },
+    {
+        "id": "http://id.worldcat.org/fast/913799",
+        "scheme": "FAST-topical",
+        "subject": "Epic poetry",
+    },
+    {
+        "id": "https://example.org/other/1",
+        "scheme": "other",
+        "subject": "Not FAST",
+    },
+]
+
+
+def test_subject_vocabulary_lookup():
+    vocab = SubjectVocabulary()
+    assert vocab.lookup("Linguistics") == "999202:Linguistics:topical"
+    assert vocab.lookup(" linguistics  ") == "999202:Linguistics:topical"
+    assert vocab.lookup("Not a subject") is None
+    assert vocab.is_missing("Public Humanities")
+    assert not vocab.is_missing("Linguistics")
+    assert vocab.correct("1204082:Japan:topical") == (
+        "1204082:Japan:geographic"
+    )
+    assert vocab.correct("999202:Linguistics:topical") == (
+        "999202:Linguistics:topical"
+    )
+
+
+def test_subject_vocabulary_load_file(tmp_path):
+    vocab_path = tmp_path / "subjects.jsonl"
+    with open(vocab_path, "w") as vocab_file:
+        for entry in vocabulary_entries:
+            vocab_file.write(json.dumps(entry) + "\n")
+
+    vocab = SubjectVocabulary()
+    size = len(vocab)
+    # Digital humanities is already indexed and the last entry is not FAST
+    assert vocab.load_file(vocab_path) == 2
+    assert len(vocab) == size + 2
+    assert vocab.lookup("PORTUGAL") == "1072100:Portugal:geographic"
+    assert vocab.lookup("epic poetry") == "913799:Epic poetry:topical"
+    assert vocab.lookup("Not FAST") is None
+
+    json_path = tmp_path / "subjects.json"
+    json_path.write_text(json.dumps(vocabulary_entries))
+    assert SubjectVocabulary({}).load_file(json_path) == 3